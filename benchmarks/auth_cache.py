@@ -0,0 +1,84 @@
+"""
+Auth round trips on JWT endpoints. After one warm-up request per user, role checks
+should not touch the users table at all. A token of the wrong role must be turned
+away before any query runs, and a user deleted through /admin must be locked out at
+once. Exits non-zero otherwise.
+
+    python -m benchmarks.auth_cache
+"""
+import logging
+import sys
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import auth_headers, make_api_app
+from model import db, Seller, User
+
+USERS = {'admin': 1, 'buyer': 2, 'passenger': 3, 'seller': 4}
+
+# Hot read endpoints, the role used to call them and whether other roles are refused
+ENDPOINTS = [
+    ('/buyers', 'buyer', True),
+    ('/sellers', 'seller', True),
+    ('/bookings', 'passenger', False),
+]
+
+
+def seed():
+    for role, user_id in USERS.items():
+        db.session.add(User(id=user_id, username=role, email=f'{role}@example.com', password_hash='x', role=role))
+    db.session.add(User(id=5, username='leaver', email='leaver@example.com', password_hash='x', role='buyer'))
+    db.session.add(Seller(id=1, user_id=4, stall_name='Mama Mboga', location='Gikomba', contact_info='0722000000'))
+    db.session.commit()
+
+
+def main():
+    logging.disable(logging.WARNING)
+    app = make_api_app()
+    statements = []
+    with app.app_context():
+        seed()
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+    client = app.test_client()
+    ok = True
+
+    def users_queries():
+        return sum(1 for statement in statements if 'FROM users' in statement)
+
+    for url, role, restricted in ENDPOINTS:
+        headers = auth_headers(app, USERS[role], role)
+        statements.clear()
+        cold = client.get(url, headers=headers).status_code
+        cold_users = users_queries()
+
+        statements.clear()
+        start = time.perf_counter()
+        warm = client.get(url, headers=headers).status_code
+        elapsed = (time.perf_counter() - start) * 1000
+        warm_users = users_queries()
+
+        ok &= cold == warm == 200 and warm_users == 0
+        print(f"{url:<10} users queries cold {cold_users} warm {warm_users}   {elapsed:6.2f} ms warm", end='')
+
+        if restricted:
+            statements.clear()
+            wrong_role = client.get(url, headers=auth_headers(app, USERS['admin'], 'admin')).status_code
+            ok &= wrong_role == 403 and not statements
+            print(f"   wrong role {wrong_role} after {len(statements)} queries", end='')
+        print()
+
+    leaver = auth_headers(app, 5, 'buyer')
+    before = client.get('/buyers', headers=leaver).status_code
+    deleted = client.delete('/admin/5', headers=auth_headers(app, USERS['admin'], 'admin')).status_code
+    after = client.get('/buyers', headers=leaver).status_code
+    ok &= before == 200 and deleted == 200 and after == 401
+    print(f"deleted user: {before} before, {after} after deletion")
+
+    print("role checks make no users queries once warm" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
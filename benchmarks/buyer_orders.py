@@ -0,0 +1,93 @@
+"""
+SQL statement count and latency of GET /buyers as the buyer's order count grows.
+Exits non-zero if the number of statements depends on the number of orders, or if
+paging with `after` and filtering with `since` return the wrong orders.
+
+    python -m benchmarks.buyer_orders
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from benchmarks.common import auth_headers, make_api_app
+from model import db, Order, OrderItem, Product, Stall, User
+
+ORDER_COUNTS = (1, 10, 100, 1000)
+START = datetime(2024, 1, 1)
+
+
+def seed(items_per_order):
+    db.session.add(Stall(id=1, seller_id=1, stall_name='Mama Mboga', location='Gikomba'))
+    db.session.add(Product(id=1, name='Sukuma', price=20, available_quantity=10, stall_id=1, stall_name='Mama Mboga'))
+    order_id = 0
+    for user_id, orders in enumerate(ORDER_COUNTS, start=1):
+        db.session.add(User(id=user_id, username=f'buyer{user_id}', email=f'b{user_id}@example.com', password_hash='x', role='buyer'))
+        order_rows, item_rows = [], []
+        for n in range(orders):
+            order_id += 1
+            stamp = START + timedelta(hours=n)
+            order_rows.append({'id': order_id, 'user_id': user_id, 'total_price': 20 * items_per_order, 'created_at': stamp, 'updated_at': stamp})
+            item_rows.extend({'order_id': order_id, 'product_id': 1, 'quantity': 1, 'unit_price': 20} for _ in range(items_per_order))
+        db.session.bulk_insert_mappings(Order, order_rows)
+        db.session.bulk_insert_mappings(OrderItem, item_rows)
+    db.session.commit()
+
+
+def fetch_all(client, headers, query):
+    orders, requests = [], 0
+    url = f'/buyers?{query}'
+    while url:
+        body = client.get(url, headers=headers).get_json()
+        requests += 1
+        orders.extend(body['orders'])
+        url = f"/buyers?{query}&after={body['next_cursor']}" if body['next_cursor'] else None
+    return orders, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items-per-order', type=int, default=3)
+    args = parser.parse_args()
+
+    app = make_api_app()
+    statements = []
+    with app.app_context():
+        seed(args.items_per_order)
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+    client = app.test_client()
+    counts = set()
+    ok = True
+    for user_id, orders in enumerate(ORDER_COUNTS, start=1):
+        headers = auth_headers(app, user_id, 'buyer')
+        statements.clear()
+        start = time.perf_counter()
+        response = client.get('/buyers?limit=500', headers=headers)
+        elapsed = (time.perf_counter() - start) * 1000
+        body = response.get_json()
+
+        ok &= response.status_code == 200 and len(body['orders']) == min(orders, 500)
+        ok &= all(len(order['items']) == args.items_per_order for order in body['orders'])
+        counts.add(len(statements))
+        print(f"{orders:>5} orders  {len(statements)} statements  {elapsed:8.2f} ms")
+
+    # Paging and `since` on the largest history
+    headers = auth_headers(app, len(ORDER_COUNTS), 'buyer')
+    paged, requests = fetch_all(client, headers, 'limit=64')
+    ok &= [order['order_id'] for order in paged] == sorted({order['order_id'] for order in paged})
+    ok &= len(paged) == ORDER_COUNTS[-1] and requests == -(-ORDER_COUNTS[-1] // 64)
+    since = (START + timedelta(hours=900)).strftime('%Y-%m-%d %H:%M:%S')
+    recent, _ = fetch_all(client, headers, f'limit=64&since={since}')
+    ok &= len(recent) == ORDER_COUNTS[-1] - 900
+    print(f"paged {len(paged)} orders in {requests} requests, {len(recent)} updated since {since}")
+
+    ok &= len(counts) == 1
+    print("statement count is constant" if ok else "FAILED: statement count grows with orders or paging is wrong")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
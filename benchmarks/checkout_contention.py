@@ -0,0 +1,130 @@
+"""
+Multi-threaded load test for utils.checkout. Every thread checks out carts that all
+contain the same hot product, plus a few others, until stock runs out. Exits non-zero
+if any stock goes negative, a product is oversold, or order items disagree with the
+stock that was taken.
+
+    python -m benchmarks.checkout_contention --threads 32 --attempts 4000
+    python -m benchmarks.checkout_contention --uri postgresql://localhost/konnect_bench
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.common import make_app
+from model import db, Order, OrderItem, Product, Stall
+from utils.checkout import OutOfStock, checkout
+
+HOT_PRODUCT = 1
+
+
+def seed(products, stock):
+    db.session.add(Stall(id=1, seller_id=1, stall_name='Mama Mboga', location='Gikomba'))
+    db.session.bulk_insert_mappings(Product, [
+        {'id': product_id, 'name': f'Product {product_id}', 'price': 10.0 * product_id, 'available_quantity': stock,
+         'sold_quantity': 0, 'stall_id': 1, 'stall_name': 'Mama Mboga'}
+        for product_id in range(1, products + 1)
+    ])
+    db.session.commit()
+
+
+def worker(app, attempts, products, outcomes):
+    rng = random.Random()
+    counts = Counter()
+    with app.app_context():
+        for _ in range(attempts):
+            cart = Counter({HOT_PRODUCT: rng.randint(1, 3)})
+            for product_id in rng.sample(range(2, products + 1), rng.randint(0, 3)):
+                cart[product_id] += rng.randint(1, 5)
+            try:
+                checkout(user_id=rng.randint(1, 100), cart=cart)
+                db.session.commit()
+                counts['ordered'] += 1
+            except OutOfStock:
+                db.session.rollback()
+                counts['out_of_stock'] += 1
+            except OperationalError:
+                db.session.rollback()
+                counts['lock_timeout'] += 1
+    outcomes.append(counts)
+
+
+def verify(stock):
+    ok = True
+    ordered = dict(db.session.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(OrderItem.product_id)
+    ).all())
+    for product in Product.query.order_by(Product.id):
+        taken = ordered.get(product.id, 0)
+        if product.available_quantity < 0 or product.available_quantity != stock - taken or product.sold_quantity != taken:
+            ok = False
+            print(f"product {product.id}: {product.available_quantity} left, {product.sold_quantity} sold, {taken} in orders")
+
+    # Every order's total must match its own items
+    mismatched = db.session.execute(
+        select(func.count()).select_from(
+            select(Order.id)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .group_by(Order.id, Order.total_price)
+            .having(func.abs(func.sum(OrderItem.unit_price * OrderItem.quantity) - Order.total_price) > 0.005)
+            .subquery()
+        )
+    ).scalar()
+    if mismatched:
+        ok = False
+        print(f"{mismatched} orders whose total does not match their items")
+    return ok, ordered.get(HOT_PRODUCT, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--attempts', type=int, default=4000, help="total checkouts across all threads")
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--stock', type=int, default=1000)
+    parser.add_argument('--uri', help="database to run against (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    if args.uri:
+        app = make_app(args.uri, {'pool_size': args.threads, 'max_overflow': 0})
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'checkout.db')
+        app = make_app(f'sqlite:///{path}', {'connect_args': {'timeout': 30, 'check_same_thread': False}})
+
+    with app.app_context():
+        seed(args.products, args.stock)
+
+    outcomes = []
+    per_thread = args.attempts // args.threads
+    threads = [threading.Thread(target=worker, args=(app, per_thread, args.products, outcomes))
+               for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    outcomes = sum(outcomes, Counter())
+    total = per_thread * args.threads
+    print(f"{total} checkouts from {args.threads} threads in {elapsed:.2f}s ({total / elapsed:,.0f} req/s)")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome:<22} {count}")
+
+    with app.app_context():
+        ok, hot_sold = verify(args.stock)
+    print(f"  hot product sold       {hot_sold} of {args.stock}")
+    print("stock never went negative and matches the orders" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
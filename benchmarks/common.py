@@ -0,0 +1,57 @@
+"""
+Shared helpers for the scripts in this directory. Run them from the repo root as
+modules, e.g. `python -m benchmarks.serializers`, so `model` and `resources` import.
+"""
+import time
+
+from flask import Flask
+
+from model import db
+
+# Passed as ?token= on every POST /mpesa/callback
+CALLBACK_TOKEN = 'benchmark-callback-token'
+
+
+def make_app(uri='sqlite://', engine_options=None):
+    """Bare Flask app bound to its own database, so benchmarks never touch instance/"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options or {}
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def timed(fn, *args, **kwargs):
+    """Run `fn` once and return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def make_api_app(uri='sqlite://', engine_options=None, **config):
+    """
+    The real app from app.create_app() with JWT enabled, on its own database with the
+    schema created. Extra keyword arguments override its config.
+    """
+    from app import create_app
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options or {},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-that-is-long-enough',
+        'MPESA_CALLBACK_TOKEN': CALLBACK_TOKEN,
+        **config,
+    })
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def auth_headers(app, user_id, role):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity={'id': user_id, 'role': role})
+    return {'Authorization': f'Bearer {token}'}
@@ -0,0 +1,125 @@
+"""
+Bytes saved and CPU spent by the response pipeline on the seeded catalog. For each
+list endpoint it prints the body size as is, with gzip and with brotli at the levels
+COMPRESSION_LEVELS picks, and the request latency without compression, when the body
+is compressed, on a repeat that reuses the compressed body, and for a 304. Then it
+sweeps the gzip levels and brotli qualities over product JSON of 16 KB to 4 MB, the
+numbers behind COMPRESSION_LEVELS. The larger bodies repeat the same 500 products, which
+flatters brotli's ratio there but not its CPU time. Exits non-zero when a compressed body does not
+decode to the original, or a conditional request for any representation is not a 304.
+
+    python -m benchmarks.compression --scale 0.05
+"""
+import argparse
+import gzip
+import json
+import logging
+import statistics
+import sys
+import time
+
+import brotli
+
+from benchmarks.common import auth_headers, make_api_app
+from model import db, User
+from utils.response_pipeline import compress, levels_for
+import seed
+
+DECODE = {'gzip': gzip.decompress, 'br': brotli.decompress}
+SIZES = (16 * 1024, 256 * 1024, 4 * 1024 * 1024)
+
+
+def median_ms(client, url, headers, requests, fresh=None):
+    latencies = []
+    for _ in range(requests):
+        if fresh:
+            fresh()
+        start = time.perf_counter()
+        client.get(url, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def cpu_ms(fn, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = fn()
+    return (time.process_time() - start) * 1000 / repeat, result
+
+
+def endpoints(app, client, urls, requests):
+    ok = True
+    print(f"  {'':<22} {'identity':>9} {'gzip':>9} {'br':>9}   latency ms: {'plain':>6} {'compress':>8} {'reuse':>6} {'304':>6}")
+    for url, headers in urls:
+        plain = client.get(url, headers=headers)
+        sizes, etags = [len(plain.data)], [plain.headers['ETag']]
+        for encoding in ('gzip', 'br'):
+            response = client.get(url, headers={**headers, 'Accept-Encoding': encoding})
+            body = DECODE[encoding](response.data) if response.headers.get('Content-Encoding') == encoding else response.data
+            ok &= body == plain.data
+            sizes.append(len(response.data))
+            etags.append(response.headers['ETag'])
+        for etag in etags:
+            ok &= client.get(url, headers={**headers, 'Accept-Encoding': 'br', 'If-None-Match': etag}).status_code == 304
+
+        br = {**headers, 'Accept-Encoding': 'br'}
+        timings = (
+            median_ms(client, url, headers, requests),
+            median_ms(client, url, br, requests, fresh=app.extensions['compressed_bodies']._bodies.clear),
+            median_ms(client, url, br, requests),
+            median_ms(client, url, {**br, 'If-None-Match': etags[2]}, requests),
+        )
+        print(f"  {url:<22} {sizes[0]:>9,} {sizes[1]:>9,} {sizes[2]:>9,}   "
+              f"{'':<12}{timings[0]:>6.2f} {timings[1]:>8.2f} {timings[2]:>6.2f} {timings[3]:>6.2f}")
+    return ok
+
+
+def sweep(sample):
+    print("\n  level sweep (compressed/original, CPU ms); * marks COMPRESSION_LEVELS")
+    records = json.loads(sample)
+    for size in SIZES:
+        count = size * len(records) // len(sample)
+        body = json.dumps((records * (count // len(records) + 1))[:count]).encode()
+        repeat = max(1, (1024 * 1024) // size)
+        gzip_level, brotli_quality = levels_for(len(body))
+        print(f"  {len(body):>9,} bytes")
+        for name, levels, fn, chosen in (
+            ('gzip', (1, 3, 5, 6, 9), lambda b, level: gzip.compress(b, compresslevel=level, mtime=0), gzip_level),
+            ('br', (1, 3, 4, 5, 6, 9, 11), lambda b, level: brotli.compress(b, mode=brotli.MODE_TEXT, quality=level), brotli_quality),
+        ):
+            cells = []
+            for level in levels:
+                ms, out = cpu_ms(lambda: fn(body, level), repeat if level < 10 else 1)
+                cells.append(f"{'*' if level == chosen else ' '}{level}: {len(out) / len(body):.3f} {ms:7.2f}")
+            print(f"    {name:<5}" + "  ".join(cells))
+        ok = all(DECODE[encoding](compress(body, encoding)) == body for encoding in DECODE)
+        if not ok:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=float, default=0.05, help="seed.py scale")
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    app = make_api_app()
+    with app.app_context():
+        seed.seed_db(scale=args.scale, tables=('users', 'drivers', 'buses', 'routes', 'schedules', 'stalls', 'products'))
+        admin_id = db.session.execute(db.select(User.id).where(User.role == 'admin')).scalar()
+    admin = auth_headers(app, admin_id, 'admin')
+    client = app.test_client()
+
+    urls = [('/products?limit=500', {}), ('/stalls?limit=500', {}), ('/schedules?limit=500', {}),
+            ('/routes?limit=500', {}), ('/buses?limit=500', {}), ('/admin?limit=500', admin)]
+    ok = endpoints(app, client, urls, args.requests)
+    ok &= sweep(client.get('/products?limit=500').data)
+
+    print("compression checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
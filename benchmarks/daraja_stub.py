@@ -0,0 +1,173 @@
+"""
+Local stand-in for the Safaricom Daraja API, for benchmarks and manual testing
+without sandbox credentials. Implements the OAuth token endpoint and STK push with
+configurable latency, token lifetime and injected failures, and the STK push query
+with the results set in `results`. Counts every call.
+
+    python -m benchmarks.daraja_stub --port 8089 --latency 0.05
+    MPESA_BASE_URL=http://127.0.0.1:8089 python app.py
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class DarajaStub(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, port=0, latency=0.0, token_ttl=3599, oauth_failures=0, stk_failures=0, read_delay=0.0):
+        super().__init__(('127.0.0.1', port), DarajaHandler)
+        self.latency = latency
+        self.token_ttl = token_ttl
+        # The next N calls to each endpoint answer 503
+        self.oauth_failures = oauth_failures
+        self.stk_failures = stk_failures
+        # Extra delay on STK pushes, for exercising client read timeouts
+        self.read_delay = read_delay
+        self.calls = Counter()
+        self.connections = set()
+        self.tokens = {}
+        self.pushes = {}
+        # CheckoutRequestID -> ResultCode the STK push query answers with. Pushes without
+        # one are still being processed; ids Daraja never issued are invalid.
+        self.results = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up on a slow response (read timeouts) are expected here
+        pass
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def app_config(self):
+        """The MPESA_* settings that point create_app() at this stub"""
+        return {'MPESA_BASE_URL': self.url, 'MPESA_CONSUMER_KEY': 'key', 'MPESA_CONSUMER_SECRET': 'secret',
+                'MPESA_PASSKEY': 'passkey'}
+
+
+class DarajaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _fail_once(self, attribute):
+        with self.server.lock:
+            remaining = getattr(self.server, attribute)
+            if remaining:
+                setattr(self.server, attribute, remaining - 1)
+            return bool(remaining)
+
+    def _begin(self, name):
+        with self.server.lock:
+            self.server.calls[name] += 1
+            self.server.connections.add(self.client_address)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path != '/oauth/v1/generate':
+            return self._reply(404, {'errorMessage': 'Not found'})
+        self._begin('oauth')
+        if not self.headers.get('Authorization', '').startswith('Basic '):
+            return self._reply(400, {'errorMessage': 'Invalid Authentication passed'})
+        if self._fail_once('oauth_failures'):
+            return self._reply(503, {'errorMessage': 'Service unavailable'})
+
+        token = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.tokens[token] = time.monotonic() + self.server.token_ttl
+        self._reply(200, {'access_token': token, 'expires_in': str(self.server.token_ttl)})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)) or 0)
+        path = urlparse(self.path).path
+        name = {'/mpesa/stkpush/v1/processrequest': 'stk_push', '/mpesa/stkpushquery/v1/query': 'stk_query'}.get(path)
+        if name is None:
+            return self._reply(404, {'errorMessage': 'Not found'})
+        self._begin(name)
+
+        token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+        with self.server.lock:
+            expires_at = self.server.tokens.get(token)
+        if expires_at is None or expires_at <= time.monotonic():
+            return self._reply(401, {'errorCode': '404.001.03', 'errorMessage': 'Invalid Access Token'})
+        request = json.loads(body or b'{}')
+        if name == 'stk_query':
+            return self._query(request.get('CheckoutRequestID'))
+
+        if self._fail_once('stk_failures'):
+            return self._reply(503, {'errorMessage': 'Service unavailable'})
+        if self.server.read_delay:
+            time.sleep(self.server.read_delay)
+
+        checkout_id = f'ws_CO_{uuid.uuid4().hex[:20]}'
+        with self.server.lock:
+            self.server.pushes[checkout_id] = request
+        self._reply(200, {
+            'MerchantRequestID': uuid.uuid4().hex[:12],
+            'CheckoutRequestID': checkout_id,
+            'ResponseCode': '0',
+            'ResponseDescription': 'Success. Request accepted for processing',
+            'CustomerMessage': 'Success. Request accepted for processing',
+        })
+
+    def _query(self, checkout_id):
+        with self.server.lock:
+            result, pushed = self.server.results.get(checkout_id), checkout_id in self.server.pushes
+        if result is not None:
+            return self._reply(200, {
+                'ResponseCode': '0', 'ResponseDescription': 'The service request has been accepted successsfully',
+                'MerchantRequestID': uuid.uuid4().hex[:12], 'CheckoutRequestID': checkout_id,
+                'ResultCode': str(result), 'ResultDesc': 'The service request is processed successfully.'
+                if result == 0 else 'Request cancelled by user',
+            })
+        if pushed:
+            return self._reply(500, {'errorCode': '500.001.1001', 'errorMessage': 'The transaction is being processed'})
+        self._reply(400, {'errorCode': '400.002.02', 'errorMessage': 'Bad Request - Invalid CheckoutRequestID'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--token-ttl', type=int, default=3599)
+    args = parser.parse_args()
+
+    stub = DarajaStub(args.port, args.latency, args.token_ttl)
+    print(f"Daraja stub listening on {stub.url}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        stub.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Concurrent reads and writes on the booking and order endpoints. Writer threads
+POST /bookings and /checkout, and reader threads GET /bookings and /buyers, all for
+--seconds. This runs once on SQLite with the old rollback journal
+(SQLITE_JOURNAL_MODE=DELETE, synchronous=FULL, no mmap) and once with the defaults
+(WAL, synchronous=NORMAL, mmap). With --uri it also runs on a server database
+using the pooled engine options. Reports requests/s and latency per endpoint, and
+5xx responses such as "database is locked". Exits non-zero when the default
+configuration returns a 5xx, or the bookings and orders do not match what the
+clients were told.
+
+    python -m benchmarks.db_concurrency --writers 8 --readers 8 --seconds 5
+    python -m benchmarks.db_concurrency --uri postgresql://localhost/konnect_bench
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import func, select, text
+
+from benchmarks.common import auth_headers, make_api_app
+from model import db, Booking, Bus, Order, Product, Route, Schedule, Seller, Stall, User
+
+SCHEDULES = 200
+SEATS = 60
+PRODUCTS = 50
+
+MODES = {
+    'rollback journal': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_MMAP_SIZE': 0},
+    'WAL': {},
+}
+
+
+def seed(writers, readers):
+    users = writers + readers
+    db.session.add_all([User(id=n, username=f'user{n}', email=f'user{n}@example.com', password_hash='x',
+                             role='buyer' if n % 2 else 'passenger') for n in range(1, users + 1)])
+    db.session.add(User(id=users + 1, username='seller', email='seller@example.com', password_hash='x', role='seller'))
+    db.session.flush()
+    db.session.add(Seller(id=1, user_id=users + 1, stall_name='Mama Mboga', location='Gikomba', contact_info='0722000000'))
+    db.session.add(Route(id=1, origin='Nairobi', destination='Nakuru'))
+    db.session.add(Bus(id=1, bus_number='KBZ-001', seat_capacity=SEATS))
+    db.session.flush()
+    db.session.add(Stall(id=1, seller_id=1, stall_name='Mama Mboga', location='Gikomba'))
+    db.session.add_all([Schedule(id=n, bus_id=1, route_id=1, date=db.func.current_date(),
+                                 departure_time=db.func.current_time(), arrival_time=db.func.current_time(),
+                                 available_seats=SEATS) for n in range(1, SCHEDULES + 1)])
+    db.session.flush()
+    db.session.bulk_insert_mappings(Product, [
+        {'id': n, 'name': f'Product {n}', 'price': 10.0 * n, 'available_quantity': 10 ** 6, 'sold_quantity': 0,
+         'stall_id': 1, 'stall_name': 'Mama Mboga'} for n in range(1, PRODUCTS + 1)
+    ])
+    db.session.commit()
+
+
+def client_loop(app, user_id, writer, stop, results):
+    client = app.test_client()
+    role = 'buyer' if user_id % 2 else 'passenger'
+    headers = auth_headers(app, user_id, role)
+    n = 0
+    while not stop.is_set():
+        n += 1
+        if writer and role == 'passenger':
+            name, call = 'POST /bookings', lambda: client.post(
+                '/bookings', json={'schedule_id': (user_id * 7 + n) % SCHEDULES + 1, 'passenger_id': user_id},
+                headers=headers)
+        elif writer:
+            name, call = 'POST /checkout', lambda: client.post(
+                '/checkout', json={'items': [{'product_id': (user_id + n) % PRODUCTS + 1, 'quantity': 1}]},
+                headers=headers)
+        elif role == 'passenger':
+            name, call = 'GET /bookings', lambda: client.get('/bookings', headers=headers)
+        else:
+            name, call = 'GET /buyers', lambda: client.get('/buyers?limit=20', headers=headers)
+        start = time.perf_counter()
+        status = call().status_code
+        results[name].append(((time.perf_counter() - start) * 1000, status))
+
+
+def run(label, uri, args, engine_options=None, **config):
+    app = make_api_app(uri, engine_options, **config)
+    with app.app_context():
+        seed(args.writers, args.readers)
+        journal = db.session.execute(text('PRAGMA journal_mode')).scalar() if uri.startswith('sqlite') else 'n/a'
+        db.session.remove()
+
+    results = defaultdict(list)
+    stop = threading.Event()
+    threads = [threading.Thread(target=client_loop, args=(app, n, n <= args.writers, stop, results))
+               for n in range(1, args.writers + args.readers + 1)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"  {label} (journal_mode={journal})")
+    errors = 0
+    for name, calls in sorted(results.items()):
+        latencies = sorted(ms for ms, _ in calls)
+        failed = sum(1 for _, status in calls if status >= 500)
+        errors += failed
+        print(f"    {name:<15} {len(calls) / args.seconds:7.0f} req/s  p50 {statistics.median(latencies):7.2f} ms  "
+              f"p99 {latencies[int(len(latencies) * 0.99)]:7.2f} ms  {failed} errors")
+
+    with app.app_context():
+        bookings = db.session.execute(select(func.count(Booking.id))).scalar()
+        seats_taken = db.session.execute(select(func.sum(SEATS - Schedule.available_seats))).scalar()
+        orders = db.session.execute(select(func.count(Order.id))).scalar()
+        sold = db.session.execute(select(func.sum(Product.sold_quantity))).scalar()
+    created = {name: sum(1 for _, status in results[name] if status == 201) for name in ('POST /bookings', 'POST /checkout')}
+    consistent = bookings == seats_taken == created['POST /bookings'] and orders == sold == created['POST /checkout']
+    if not consistent:
+        print(f"    {bookings} bookings for {seats_taken} seats taken and {created['POST /bookings']} created, "
+              f"{orders} orders for {sold} sold and {created['POST /checkout']} created")
+    return errors, consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--uri', help="server database to run against as well, e.g. postgresql://localhost/konnect_bench")
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    print(f"{args.writers} writers and {args.readers} readers for {args.seconds:.0f}s")
+    ok = True
+    for label, config in MODES.items():
+        path = os.path.join(tempfile.mkdtemp(), 'app.db')
+        errors, consistent = run(f'SQLite, {label}', f'sqlite:///{path}', args, **config)
+        ok &= consistent and (errors == 0 or bool(config))
+    if args.uri:
+        pool = args.writers + args.readers
+        errors, consistent = run('server database', args.uri, args, DB_POOL_SIZE=pool, DB_MAX_OVERFLOW=0)
+        ok &= consistent and errors == 0
+
+    print("database configuration checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
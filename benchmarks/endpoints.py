@@ -0,0 +1,477 @@
+"""
+End-to-end latency of every route registered from app.RESOURCES, on a database
+filled by seed.py. Each scenario below sends --requests requests to one method of
+one URL rule: reads first, then creates and updates, then deletes. For each one it
+reports p50/p95/p99 latency, throughput, SQL statements per request and the status
+codes seen.
+
+--server in-process (default) calls app.create_app() through Flask's test client.
+--server gunicorn starts `gunicorn --preload -w N` on a local port and sends real
+HTTP from --concurrency client threads. Login throttling is off in both, and
+M-Pesa calls go to benchmarks/daraja_stub.py.
+
+Results are saved as JSON with the commit they were measured on. --compare OLD.json
+flags endpoints whose p95 or SQL count got worse. Exits non-zero when something
+regressed, or when a registered route or method has no scenario here.
+
+    python -m benchmarks.endpoints --scale 0.02 --requests 100 --out before.json
+    python -m benchmarks.endpoints --server gunicorn --workers 4 --concurrency 8 --compare before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+from flask import g, has_request_context
+from sqlalchemy import event, select
+
+import seed
+from benchmarks.common import CALLBACK_TOKEN, auth_headers
+from benchmarks.daraja_stub import DarajaStub
+from benchmarks.mpesa_callbacks import callback_body
+from model import (
+    db, Booking, Bus, Driver, Order, OrderItem, Passenger, Payment, Product, Route, Schedule, Stall, Ticket, User
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECRET = 'benchmark-secret-key-that-is-long-enough'
+# Points to look for stalls and buses around: the CBD, Gikomba market and the suburbs
+NEAR = [(-1.2864, 36.8172), (-1.2833, 36.8394), (-1.3197, 36.7073), (-1.1460, 36.9610)]
+
+# `make(n, fixtures)` returns the URL and JSON body of request n. `who(n, fixtures)` returns
+# the (user id, role) to sign the token for, or None to send no token. `limit` caps the
+# requests for endpoints that hash passwords.
+Scenario = namedtuple('Scenario', ['method', 'rule', 'make', 'who', 'limit'], defaults=(None, None))
+
+
+def pick(seq, n):
+    return seq[n % len(seq)]
+
+
+def as_role(role):
+    return lambda n, fx: (fx['users'][role], role)
+
+
+PASSENGER, BUYER, SELLER, ADMIN = as_role('passenger'), as_role('buyer'), as_role('seller'), as_role('admin')
+
+SCENARIOS = [
+    # Reads
+    Scenario('GET', '/drivers', lambda n, fx: ('/drivers', None)),
+    Scenario('GET', '/drivers/<int:driver_id>', lambda n, fx: (f"/drivers/{pick(fx['drivers'], n)}", None)),
+    Scenario('GET', '/drivers/<int:driver_id>/tickets', lambda n, fx: (f"/drivers/{pick(fx['drivers'], n)}/tickets", None)),
+    Scenario('GET', '/tickets', lambda n, fx: ('/tickets', None)),
+    Scenario('GET', '/tickets/<int:ticket_id>', lambda n, fx: (f"/tickets/{pick(fx['tickets'], n)}", None)),
+    Scenario('GET', '/passengers', lambda n, fx: ('/passengers', None), PASSENGER),
+    Scenario('GET', '/sellers', lambda n, fx: ('/sellers', None), SELLER),
+    Scenario('GET', '/buyers', lambda n, fx: ('/buyers', None), BUYER),
+    Scenario('GET', '/profile', lambda n, fx: ('/profile', None), PASSENGER),
+    Scenario('GET', '/admin', lambda n, fx: ('/admin', None), ADMIN),
+    Scenario('GET', '/user', lambda n, fx: ('/user', None), PASSENGER),
+    Scenario('GET', '/orders', lambda n, fx: ('/orders', None)),
+    Scenario('GET', '/orders/<int:order_id>', lambda n, fx: (f"/orders/{pick(fx['orders'], n)}", None)),
+    Scenario('GET', '/order_items', lambda n, fx: ('/order_items', None)),
+    Scenario('GET', '/order_items/<int:order_item_id>', lambda n, fx: (f"/order_items/{pick(fx['order_items'], n)}", None)),
+    Scenario('GET', '/payment_status/<string:transaction_id>',
+             lambda n, fx: (f"/payment_status/{pick(fx['payments'], n)}", None), PASSENGER),
+    Scenario('GET', '/stalls', lambda n, fx: ('/stalls', None)),
+    Scenario('GET', '/stalls/<int:stall_id>', lambda n, fx: (f"/stalls/{pick(fx['stalls'], n)}", None)),
+    Scenario('GET', '/stalls/nearby', lambda n, fx: (
+        '/stalls/nearby?lat={}&lng={}&limit=10'.format(*pick(NEAR, n)), None)),
+    Scenario('GET', '/products', lambda n, fx: ('/products', None)),
+    Scenario('GET', '/products/<string:stall_name>', lambda n, fx: (f"/products/{pick(fx['stall_names'], n)}", None)),
+    Scenario('GET', '/products/search', lambda n, fx: (
+        f"/products/search?q={pick(['je', 'sukuma w', 'great value', 'kiondo 4'], n).replace(' ', '+')}", None)),
+    Scenario('GET', '/routes', lambda n, fx: ('/routes', None)),
+    Scenario('GET', '/routes/<int:route_id>', lambda n, fx: (f"/routes/{pick(fx['routes'], n)}", None)),
+    Scenario('GET', '/buses', lambda n, fx: ('/buses', None)),
+    Scenario('GET', '/buses/nearby', lambda n, fx: ('/buses/nearby?lat={}&lng={}&limit=10'.format(*pick(NEAR, n)), None)),
+    Scenario('GET', '/schedules', lambda n, fx: ('/schedules', None)),
+    Scenario('GET', '/schedules/<int:schedule_id>', lambda n, fx: (f"/schedules/{pick(fx['schedules'], n)}", None)),
+    Scenario('GET', '/bookings', lambda n, fx: ('/bookings', None), PASSENGER),
+    Scenario('GET', '/bookings/<int:booking_id>', lambda n, fx: (f"/bookings/{pick(fx['bookings'], n)}", None), PASSENGER),
+    Scenario('GET', '/trips/search', lambda n, fx: (
+        '/trips/search?origin={}&destination={}&date={}'.format(*pick(fx['trips'], n)), None)),
+
+    # Creates and updates
+    Scenario('POST', '/stk_push', lambda n, fx: (
+        '/stk_push', {'phone': '254700000000', 'amount': 1, 'booking_id': pick(fx['bookings'], n)}), PASSENGER),
+    Scenario('POST', '/mpesa/callback', lambda n, fx: (
+        f'/mpesa/callback?token={CALLBACK_TOKEN}', callback_body(pick(fx['payments'], n), 0))),
+    Scenario('POST', '/drivers', lambda n, fx: (
+        '/drivers', {'name': f'Bench Driver {n}', 'email': f'bench.driver{n}@example.com', 'contact_info': f'+25479{n:07d}'})),
+    Scenario('PUT', '/drivers/<int:driver_id>', lambda n, fx: (
+        f"/drivers/{pick(fx['drivers'], n)}", {'name': f'Renamed Driver {n}'})),
+    Scenario('POST', '/tickets', lambda n, fx: (
+        '/tickets', {'route_id': pick(fx['routes'], n), 'passenger_id': fx['passenger_id'], 'seat_number': str(n % 50 + 1)})),
+    Scenario('POST', '/passengers', lambda n, fx: (
+        '/passengers', {'route_id': pick(fx['routes'], n), 'number_of_tickets': 1}), PASSENGER),
+    Scenario('POST', '/sellers', lambda n, fx: ('/sellers', {
+        'name': f'Bench Product {n}', 'description': 'Benchmark', 'price': 100, 'available_quantity': 10,
+        'stall_name': fx['stall_names'][0], 'location': 'Gikomba'}), SELLER),
+    Scenario('POST', '/buyers', lambda n, fx: ('/buyers', {'product_id': pick(fx['products'], n), 'quantity': 1}), BUYER),
+    Scenario('POST', '/checkout', lambda n, fx: ('/checkout', {'items': [
+        {'product_id': pick(fx['products'], n), 'quantity': 1}, {'product_id': pick(fx['products'], n + 1), 'quantity': 2}]}), BUYER),
+    Scenario('POST', '/signup', lambda n, fx: ('/signup', {
+        'username': f'bench{n}', 'email': f'bench{n}@example.com', 'password': 'password123', 'role': 'buyer'}), limit=20),
+    Scenario('POST', '/login', lambda n, fx: ('/login', {'email': fx['emails']['passenger'], 'password': seed.DEFAULT_PASSWORD}),
+             limit=20),
+    Scenario('POST', '/forgot-password', lambda n, fx: ('/forgot-password', {'email': fx['emails']['buyer']})),
+    Scenario('POST', '/reset-password', lambda n, fx: (
+        '/reset-password', {'email': fx['emails']['seller'], 'new_password': seed.DEFAULT_PASSWORD}), limit=20),
+    Scenario('PUT', '/profile', lambda n, fx: ('/profile', {'username': f'passenger-renamed{n}'}), PASSENGER),
+    Scenario('POST', '/profile', lambda n, fx: (
+        '/profile', {'current_password': seed.DEFAULT_PASSWORD, 'new_password': seed.DEFAULT_PASSWORD}), BUYER, limit=20),
+    Scenario('POST', '/admin', lambda n, fx: ('/admin', {
+        'username': f'bench-admin{n}', 'email': f'bench.admin{n}@example.com', 'role': 'buyer', 'password': 'password123'}),
+        ADMIN, limit=20),
+    Scenario('PUT', '/user', lambda n, fx: ('/user', {'username': f'user-renamed{n}'}), PASSENGER),
+    Scenario('POST', '/orders', lambda n, fx: ('/orders', {'buyer_id': fx['users']['buyer'], 'total_price': 100})),
+    Scenario('PUT', '/orders/<int:order_id>', lambda n, fx: (f"/orders/{pick(fx['orders'], n)}", {'status': 'paid'})),
+    Scenario('POST', '/order_items', lambda n, fx: ('/order_items', {
+        'order_id': pick(fx['orders'], n), 'product_id': pick(fx['products'], n), 'quantity': 1, 'unit_price': 100})),
+    Scenario('PUT', '/order_items/<int:order_item_id>', lambda n, fx: (
+        f"/order_items/{pick(fx['order_items'], n)}", {'quantity': 2, 'unit_price': 100})),
+    Scenario('POST', '/stalls', lambda n, fx: ('/stalls', {
+        'seller_id': 1, 'stall_name': f'Bench Stall {n}', 'location': 'Gikomba', 'image_url': None})),
+    Scenario('PUT', '/stalls/<int:stall_id>', lambda n, fx: (f"/stalls/{pick(fx['stalls'], n)}", {
+        'stall_name': fx['stall_names'][n % len(fx['stall_names'])], 'location': 'Gikomba', 'image_url': None})),
+    Scenario('POST', '/products', lambda n, fx: ('/products', {
+        'shop_name': fx['stall_names'][0], 'name': f'Bench Product {n}', 'price': 100, 'available_quantity': 10})),
+    Scenario('PUT', '/products/<string:stall_name>', lambda n, fx: (f"/products/{pick(fx['stall_names'], n)}", {
+        'name': f'Bench Product {n}', 'price': 100, 'available_quantity': 10, 'stall_name': pick(fx['stall_names'], n)})),
+    Scenario('POST', '/routes', lambda n, fx: ('/routes', {'origin': 'CBD', 'destination': f'Bench Stop {n}'})),
+    Scenario('PUT', '/routes/<int:route_id>', lambda n, fx: (f"/routes/{pick(fx['routes'], n)}", {
+        'origin': 'CBD', 'destination': 'Westlands'})),
+    Scenario('POST', '/buses', lambda n, fx: ('/buses', {
+        'driver_id': pick(fx['drivers'], n), 'bus_number': f'BENCH{n:05d}', 'seat_capacity': 33, 'current_location': 'CBD'})),
+    Scenario('POST', '/schedules', lambda n, fx: ('/schedules', {
+        'bus_id': pick(fx['buses'], n), 'route_id': pick(fx['routes'], n), 'departure_time': '08:00:00',
+        'arrival_time': '09:00:00', 'date': '2024-08-01', 'available_seats': 33})),
+    Scenario('PUT', '/schedules/<int:schedule_id>', lambda n, fx: (f"/schedules/{pick(fx['schedules'], n)}", {
+        'bus_id': pick(fx['buses'], n), 'route_id': pick(fx['routes'], n), 'departure_time': '08:00:00',
+        'arrival_time': '09:00:00', 'date': '2024-08-01', 'available_seats': 33})),
+    Scenario('POST', '/bookings', lambda n, fx: (
+        '/bookings', {'schedule_id': pick(fx['schedules'], n), 'passenger_id': fx['passenger_id']}), PASSENGER),
+    Scenario('PUT', '/bookings/<int:booking_id>', lambda n, fx: (
+        f"/bookings/{pick(fx['bookings'], n)}", {'payment_status': True}), PASSENGER),
+
+    # Deletes, each of a different row
+    Scenario('DELETE', '/drivers/<int:driver_id>', lambda n, fx: (f"/drivers/{pick(fx['doomed_drivers'], n)}", None)),
+    Scenario('DELETE', '/tickets/<int:ticket_id>', lambda n, fx: (f"/tickets/{pick(fx['doomed_tickets'], n)}", None)),
+    Scenario('DELETE', '/passengers', lambda n, fx: ('/passengers', {'booking_id': pick(fx['bookings'], n)}), PASSENGER),
+    Scenario('DELETE', '/sellers', lambda n, fx: ('/sellers', {'product_id': pick(fx['products'], n)}), SELLER),
+    Scenario('DELETE', '/profile', lambda n, fx: ('/profile', None),
+             lambda n, fx: (pick(fx['doomed_users'], 2 * n), 'buyer')),
+    Scenario('DELETE', '/admin/<int:user_id>', lambda n, fx: (f"/admin/{pick(fx['doomed_users'], 2 * n + 1)}", None), ADMIN),
+    Scenario('DELETE', '/orders/<int:order_id>', lambda n, fx: (f"/orders/{pick(fx['doomed_orders'], n)}", None)),
+    Scenario('DELETE', '/order_items/<int:order_item_id>', lambda n, fx: (
+        f"/order_items/{pick(fx['doomed_order_items'], n)}", None)),
+    Scenario('DELETE', '/stalls/<int:stall_id>', lambda n, fx: (f"/stalls/{pick(fx['doomed_stalls'], n)}", None)),
+    Scenario('DELETE', '/products/<string:stall_name>', lambda n, fx: (
+        f"/products/{pick(fx['stall_names'], n)}", None)),
+    Scenario('DELETE', '/routes/<int:route_id>', lambda n, fx: (f"/routes/{pick(fx['doomed_routes'], n)}", None)),
+    Scenario('DELETE', '/buses/<int:bus_id>', lambda n, fx: (f"/buses/{pick(fx['doomed_buses'], n)}", None)),
+    Scenario('DELETE', '/schedules/<int:schedule_id>', lambda n, fx: (f"/schedules/{pick(fx['doomed_schedules'], n)}", None)),
+    Scenario('DELETE', '/bookings/<int:booking_id>', lambda n, fx: (f"/bookings/{pick(fx['doomed_bookings'], n)}", None),
+             PASSENGER),
+]
+
+
+def count_queries(app):
+    """Send the number of SQL statements each request ran in an X-SQL-Queries header"""
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        @event.listens_for(engine, 'before_cursor_execute')
+        def count(*args):
+            if has_request_context():
+                g.sql_queries = g.get('sql_queries', 0) + 1
+
+    @app.after_request
+    def add_header(response):
+        response.headers['X-SQL-Queries'] = str(g.get('sql_queries', 0))
+        return response
+
+
+def served_app():
+    """The app gunicorn serves: create_app() with the config in BENCHMARK_APP_CONFIG"""
+    from app import create_app
+
+    app = create_app(json.loads(os.environ['BENCHMARK_APP_CONFIG']))
+    count_queries(app)
+    return app
+
+
+def coverage_gaps(app):
+    """URL rules with no scenario, and resource methods no scenario calls"""
+    covered = {(scenario.rule, scenario.method) for scenario in SCENARIOS}
+    rules, methods = [], Counter()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        view_class = app.view_functions[rule.endpoint].view_class
+        used = {method for path, method in covered if path == rule.rule}
+        if not used:
+            rules.append(rule.rule)
+        for method in used:
+            methods[(view_class.__name__, method)] += 1
+        for method in view_class.methods:
+            methods.setdefault((view_class.__name__, method), 0)
+    return rules, sorted(f'{cls}.{method.lower()}' for (cls, method), hits in methods.items() if not hits)
+
+
+def fixtures(requests_per_scenario):
+    """Ids from the seeded database for the scenarios to use"""
+    def ids(model, *criteria, newest=False):
+        order = model.id.desc() if newest else model.id
+        return db.session.execute(select(model.id).where(*criteria).order_by(order).limit(requests_per_scenario)).scalars().all()
+
+    def active(role):
+        return db.session.execute(select(User.id, User.email).where(User.role == role, User.is_active.is_(True))
+                                  .order_by(User.id).limit(1)).one()
+
+    users = {role: active(role) for role in ('admin', 'passenger', 'buyer', 'seller')}
+    fx = {
+        'users': {role: user.id for role, user in users.items()},
+        'emails': {role: user.email for role, user in users.items()},
+        'passenger_id': db.session.execute(select(Passenger.id).where(Passenger.user_id == users['passenger'].id)).scalar(),
+        'payments': db.session.execute(select(Payment.transaction_id).where(Payment.status == 'pending')
+                                       .order_by(Payment.id).limit(requests_per_scenario)).scalars().all(),
+        'stall_names': db.session.execute(select(Stall.stall_name).order_by(Stall.id).limit(requests_per_scenario)).scalars().all(),
+        'trips': [(origin, destination, day.isoformat()) for origin, destination, day in db.session.execute(
+            select(Route.origin, Route.destination, Schedule.date).join(Schedule, Schedule.route_id == Route.id)
+            .order_by(Schedule.id).limit(requests_per_scenario))],
+        'doomed_users': ids(User, User.role == 'buyer', User.is_active.is_(True), newest=True) +
+                        ids(User, User.role == 'passenger', User.is_active.is_(True), newest=True),
+    }
+    for name, model in (('drivers', Driver), ('buses', Bus), ('routes', Route), ('schedules', Schedule),
+                        ('tickets', Ticket), ('stalls', Stall), ('products', Product), ('orders', Order),
+                        ('order_items', OrderItem), ('bookings', Booking)):
+        fx[name] = ids(model)
+        fx[f'doomed_{name}'] = ids(model, newest=True)
+    return fx
+
+
+def summarize(calls, wall):
+    latencies = sorted(ms for ms, _, _ in calls)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    queries = [count for _, _, count in calls if count is not None]
+    return {
+        'requests': len(calls),
+        'throughput': round(len(calls) / wall, 1),
+        'p50': round(quantiles[49], 3),
+        'p95': round(quantiles[94], 3),
+        'p99': round(quantiles[98], 3),
+        'queries': statistics.median(queries) if queries else None,
+        'statuses': dict(sorted(Counter(str(status) for _, status, _ in calls).items())),
+    }
+
+
+class InProcess:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def run(self, requests_to_send):
+        calls = []
+        start = time.perf_counter()
+        for method, url, body, headers in requests_to_send:
+            begin = time.perf_counter()
+            # Some resources print what they received
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = self.client.open(url, method=method, json=body, headers=headers)
+                response.get_data()
+            queries = response.headers.get('X-SQL-Queries')
+            calls.append(((time.perf_counter() - begin) * 1000, response.status_code, int(queries) if queries else None))
+        return calls, time.perf_counter() - start
+
+    def close(self):
+        pass
+
+
+class Gunicorn:
+    def __init__(self, config, workers, concurrency):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        self.url = f'http://127.0.0.1:{port}'
+        env = dict(os.environ, BENCHMARK_APP_CONFIG=json.dumps(config), LOG_LEVEL='ERROR')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--preload', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+             '--log-level', 'warning', 'benchmarks.endpoints:served_app()'], cwd=ROOT, env=env)
+        self.pool = ThreadPoolExecutor(concurrency)
+        self.local = threading.local()
+        deadline = time.time() + 60
+        while True:
+            try:
+                requests.get(f'{self.url}/routes', timeout=5)
+                break
+            except requests.ConnectionError:
+                if time.time() > deadline or self.process.poll() is not None:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.2)
+
+    def _send(self, method, url, body, headers):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        begin = time.perf_counter()
+        response = session.request(method, self.url + url, json=body, headers=headers, timeout=60)
+        queries = response.headers.get('X-SQL-Queries')
+        return (time.perf_counter() - begin) * 1000, response.status_code, int(queries) if queries else None
+
+    def run(self, requests_to_send):
+        start = time.perf_counter()
+        calls = list(self.pool.map(lambda request: self._send(*request), requests_to_send))
+        return calls, time.perf_counter() - start
+
+    def close(self):
+        self.pool.shutdown()
+        self.process.terminate()
+        self.process.wait(30)
+
+
+def compare(results, baseline, tolerance):
+    """Print what changed against a previous run; returns the endpoints that got worse"""
+    worse = []
+    print(f"\ncompared with {baseline['commit'][:10]} ({baseline['server']}, {baseline['created']})")
+    for label, new in results.items():
+        old = baseline['endpoints'].get(label)
+        if old is None:
+            continue
+        slower = new['p95'] > old['p95'] * (1 + tolerance) and new['p95'] - old['p95'] > 1
+        more_sql = None not in (new['queries'], old['queries']) and new['queries'] > old['queries']
+        if slower or more_sql:
+            worse.append(label)
+        if slower or more_sql or new['p95'] < old['p95'] / (1 + tolerance):
+            print(f"  {label:<45} p95 {old['p95']:8.2f} -> {new['p95']:8.2f} ms  "
+                  f"SQL {old['queries']} -> {new['queries']}  {'WORSE' if label in worse else 'better'}")
+    return worse
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=('in-process', 'gunicorn'), default='in-process')
+    parser.add_argument('--workers', type=int, default=4, help="gunicorn workers")
+    parser.add_argument('--concurrency', type=int, default=8, help="client threads against gunicorn")
+    parser.add_argument('--requests', type=int, default=100, help="requests per scenario")
+    parser.add_argument('--scale', type=float, default=0.02, help="seed.py scale for the database")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="seeded SQLite file to use instead (a copy is used, the file is not changed)")
+    parser.add_argument('--only', help="run the scenarios whose 'METHOD /rule' label contains this")
+    parser.add_argument('--out', help="JSON results file (default: benchmarks/results/endpoints-<server>-<commit>.json)")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="p95 increase that counts as a regression")
+    args = parser.parse_args()
+
+    from app import create_app
+
+    logging.disable(logging.CRITICAL)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'app.db')
+    stub = DarajaStub().start()
+    config = {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'JWT_SECRET_KEY': SECRET,
+        'RATE_LIMIT_ENABLED': False,
+        **stub.app_config(),
+        'MPESA_CALLBACK_TOKEN': CALLBACK_TOKEN,
+        # Shared by every gunicorn worker
+        'MPESA_CALLBACK_QUEUE_DB': os.path.join(directory, 'callbacks.db'),
+        'SEAT_HOLD_BACKEND': 'sqlite', 'SEAT_HOLD_DB': os.path.join(directory, 'holds.db'),
+    }
+    app = create_app(config)
+    count_queries(app)
+
+    rules, methods = coverage_gaps(app)
+    for gap in rules:
+        print(f"NO SCENARIO for {gap}")
+    for gap in methods:
+        print(f"NO SCENARIO calls {gap}")
+
+    start = time.perf_counter()
+    with app.app_context():
+        if args.db:
+            shutil.copy(args.db, path)
+        else:
+            db.create_all()
+            seed.seed_db(args.scale, args.seed)
+        fx = fixtures(args.requests)
+        db.session.remove()
+    # Daraja confirms every callback the scenarios post
+    stub.results.update(dict.fromkeys(fx['payments'], 0))
+    print(f"database ready in {time.perf_counter() - start:.1f}s; {args.server}, {args.requests} requests per scenario")
+
+    server = Gunicorn(config, args.workers, args.concurrency) if args.server == 'gunicorn' else InProcess(app)
+    tokens = {}
+    results = {}
+    try:
+        for scenario in SCENARIOS:
+            label = f'{scenario.method} {scenario.rule}'
+            if args.only and args.only not in label:
+                continue
+            batch = []
+            for n in range(min(args.requests, scenario.limit or args.requests)):
+                url, body = scenario.make(n, fx)
+                who = scenario.who(n, fx) if scenario.who else None
+                if who and who not in tokens:
+                    tokens[who] = auth_headers(app, *who)
+                batch.append((scenario.method, url, body, tokens.get(who, {})))
+            calls, wall = server.run(batch)
+            results[label] = summary = summarize(calls, wall)
+            statuses = ' '.join(f'{status}x{count}' for status, count in summary['statuses'].items())
+            print(f"  {label:<45} {summary['throughput']:8.1f} req/s  p50 {summary['p50']:7.2f}  p95 {summary['p95']:7.2f}  "
+                  f"p99 {summary['p99']:7.2f} ms  SQL {summary['queries']}  {statuses}")
+    finally:
+        server.close()
+        stub.shutdown()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'server': args.server,
+        'settings': {key: getattr(args, key) for key in ('workers', 'concurrency', 'requests', 'scale', 'seed', 'db')},
+        'endpoints': results,
+    }
+    out = args.out or os.path.join(ROOT, 'benchmarks', 'results', f'endpoints-{args.server}-{commit[:10]}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {out}")
+
+    worse = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if (baseline['server'], baseline['settings']) == (report['server'], report['settings']):
+            worse = compare(results, baseline, args.tolerance)
+        else:
+            print(f"\nnot compared: {args.compare} was measured on {baseline['server']} with {baseline['settings']}")
+    ok = not rules and not methods and not worse
+    print("endpoint benchmark passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
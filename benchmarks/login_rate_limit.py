@@ -0,0 +1,99 @@
+"""
+Brute-force load on POST /login against the token-bucket limiter. Measures how fast
+throttled attempts are turned away and checks they make no SQL statements. Also runs
+two app instances (standing in for two gunicorn workers) on one SQLite bucket file to
+check the limit holds across them. Exits non-zero when a check fails.
+
+    python -m benchmarks.login_rate_limit --attempts 2000
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import make_api_app
+from model import db, User
+from utils.passwords import hash_password
+from utils.rate_limit import DEFAULT_LIMITS
+
+LIMITS = DEFAULT_LIMITS['login']
+
+
+def login_app(**config):
+    """API app with one account, hashing cheaply on the request thread"""
+    app = make_api_app()
+    app.config.update(PASSWORD_HASH_WORKERS=0, PASSWORD_HASH_ROUNDS=4, **config)
+    with app.app_context():
+        db.session.add(User(id=1, username='victim', email='victim@example.com',
+                            password_hash=hash_password('correct horse', 4), role='buyer'))
+        db.session.commit()
+    return app
+
+
+def attack(client, attempts, email_for):
+    """Returns ({status: count}, latencies in ms of the 429 responses)"""
+    statuses, rejected = {}, []
+    for n in range(attempts):
+        begin = time.perf_counter()
+        response = client.post('/login', json={'email': email_for(n), 'password': f'guess{n}'})
+        elapsed = (time.perf_counter() - begin) * 1000
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 429:
+            rejected.append(elapsed)
+            if not response.headers.get('Retry-After'):
+                statuses['missing Retry-After'] = statuses.get('missing Retry-After', 0) + 1
+    return statuses, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--attempts', type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    ok = True
+
+    # One address guessing one account, then spraying many accounts
+    app = login_app()
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+    client = app.test_client()
+
+    start = time.perf_counter()
+    statuses, rejected = attack(client, args.attempts, lambda n: 'victim@example.com')
+    elapsed = time.perf_counter() - start
+    ok &= statuses.get(401, 0) == LIMITS['email'][0] and 'missing Retry-After' not in statuses
+    print(f"one account, one address: {statuses} in {elapsed:.2f}s, "
+          f"429 p50 {statistics.median(rejected):.3f} ms ({len(rejected) / elapsed:,.0f} rejects/s)")
+
+    statements.clear()
+    client.post('/login', json={'email': 'victim@example.com', 'password': 'guess'})
+    ok &= not statements
+    print(f"SQL statements while throttled: {len(statements)}")
+
+    statuses, _ = attack(login_app().test_client(), 200, lambda n: f'user{n}@example.com')
+    ok &= statuses.get(401, 0) == LIMITS['ip'][0]
+    print(f"many accounts, one address: {statuses}")
+
+    # Two workers sharing one bucket file must still allow only one burst in total
+    path = os.path.join(tempfile.mkdtemp(), 'rate_limit.db')
+    workers = [login_app(RATE_LIMIT_BACKEND='sqlite', RATE_LIMIT_DB=path).test_client() for _ in range(2)]
+    allowed = 0
+    for n in range(100):
+        response = workers[n % 2].post('/login', json={'email': 'victim@example.com', 'password': f'guess{n}'})
+        allowed += response.status_code != 429
+    ok &= allowed == LIMITS['email'][0]
+    print(f"two workers on one SQLite bucket file: {allowed} attempts let through (burst {LIMITS['email'][0]})")
+
+    print("limits hold" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
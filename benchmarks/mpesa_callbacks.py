@@ -0,0 +1,244 @@
+"""
+Month-end load on POST /mpesa/callback and the queue behind it. Posts a callback
+(plus Daraja-style duplicates) for every pending payment: a third pay for orders, a
+third for existing bookings, and a third for seats held during the STK push. Then
+drains the queue in batches and one callback per transaction, for comparison.
+Results are confirmed with benchmarks/daraja_stub.py's STK push query. Checks every
+payment, order, booking and seat hold ends up right, and that replayed, unknown,
+malformed, forged and unauthenticated callbacks are handled. Exits non-zero when a
+check fails.
+
+    python -m benchmarks.mpesa_callbacks --payments 3000 --batch 100
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from benchmarks.common import CALLBACK_TOKEN, make_api_app
+from benchmarks.daraja_stub import DarajaStub
+from model import db, Booking, Bus, Order, Payment, Schedule, User
+from utils.payment_callbacks import CallbackQueue, RESULT_STATUSES, drain, get_callback_queue
+from utils.seat_holds import get_hold_store, hold_seat
+
+SEATS_PER_BUS = 60
+
+
+def callback_body(transaction_id, result_code, amount=100):
+    body = {'MerchantRequestID': 'bench', 'CheckoutRequestID': transaction_id, 'ResultCode': result_code,
+            'ResultDesc': 'The service request is processed successfully.' if result_code == 0 else 'Request cancelled by user'}
+    if result_code == 0:
+        body['CallbackMetadata'] = {'Item': [
+            {'Name': 'Amount', 'Value': amount},
+            {'Name': 'MpesaReceiptNumber', 'Value': f'R{transaction_id[-8:].upper()}'},
+            {'Name': 'PhoneNumber', 'Value': 254700000000},
+        ]}
+    return {'Body': {'stkCallback': body}}
+
+
+def callback_app(payments, stub, **config):
+    """
+    API app on its own SQLite files with `payments` pending payments, checking results
+    with `stub`; returns (app, {transaction id: kind})
+    """
+    directory = tempfile.mkdtemp()
+    app = make_api_app(f'sqlite:///{os.path.join(directory, "app.db")}', **stub.app_config())
+    app.config.update({'MPESA_CALLBACK_QUEUE_DB': os.path.join(directory, 'callbacks.db'),
+                       'MPESA_CALLBACK_WORKER': False, 'SEAT_HOLD_TTL': 3600, **config})
+    kinds = {}
+    with app.app_context():
+        db.session.add(User(id=1, username='payer', email='payer@example.com', password_hash='x', role='passenger'))
+        schedules = payments // 3 // SEATS_PER_BUS + 1
+        db.session.add(Bus(id=1, bus_number='KBZ-001', seat_capacity=SEATS_PER_BUS))
+        for schedule_id in range(1, schedules + 2):
+            db.session.add(Schedule(id=schedule_id, bus_id=1, route_id=1, date=db.func.current_date(),
+                                    departure_time=db.func.current_time(), arrival_time=db.func.current_time(),
+                                    available_seats=SEATS_PER_BUS))
+        db.session.flush()
+
+        held = 0
+        for n in range(payments):
+            transaction_id = f'ws_CO_{n:012d}'
+            kind = ('order', 'booking', 'hold')[n % 3]
+            payment = Payment(transaction_id=transaction_id, amount=100, status='pending')
+            if kind == 'order':
+                payment.order = Order(user_id=1, total_price=100, status='pending')
+            elif kind == 'booking':
+                # Bookings made before paying sit on the spare last schedule
+                payment.booking = Booking(user_id=1, schedule_id=schedules + 1, seat_number=n // 3 + 1,
+                                          ticket_number=f'T{n}', payment_status=False)
+            else:
+                hold = hold_seat(held // SEATS_PER_BUS + 1, 1)
+                get_hold_store().bind(hold.hold_id, transaction_id)
+                payment.schedule_id = hold.schedule_id
+                held += 1
+            db.session.add(payment)
+            kinds[transaction_id] = kind
+        db.session.commit()
+    return app, kinds
+
+
+def receive(app, outcomes, duplicates, rng):
+    """POST every callback (some twice); returns (seconds, 200 responses, latencies in ms)"""
+    client = app.test_client()
+    bodies = [json.dumps(callback_body(tid, code)) for tid, code in outcomes.items()]
+    bodies += rng.sample(bodies, int(len(bodies) * duplicates))
+    rng.shuffle(bodies)
+    latencies, accepted = [], 0
+    start = time.perf_counter()
+    for body in bodies:
+        begin = time.perf_counter()
+        response = client.post('/mpesa/callback', data=body, content_type='application/json',
+                               query_string={'token': CALLBACK_TOKEN})
+        latencies.append((time.perf_counter() - begin) * 1000)
+        accepted += response.status_code == 200 and response.get_json()['ResultCode'] == 0
+    return time.perf_counter() - start, accepted, len(bodies), latencies
+
+
+def snapshot():
+    return (
+        dict(db.session.execute(select(Payment.transaction_id, Payment.status)).all()),
+        db.session.execute(select(Order.status, func.count()).group_by(Order.status)).all(),
+        db.session.execute(select(Booking.payment_status, func.count()).group_by(Booking.payment_status)).all(),
+        db.session.execute(select(func.sum(Schedule.available_seats))).scalar(),
+    )
+
+
+def verify(app, kinds, outcomes):
+    ok = True
+    with app.app_context():
+        rows = {row.transaction_id: row for row in db.session.execute(
+            select(Payment.transaction_id, Payment.status, Payment.booking_id, Payment.order_id))}
+        orders = dict(db.session.execute(select(Order.id, Order.status)).all())
+        bookings = dict(db.session.execute(select(Booking.id, Booking.payment_status)).all())
+        store = get_hold_store()
+        for transaction_id, kind in kinds.items():
+            row, code = rows[transaction_id], outcomes[transaction_id]
+            paid = code == 0
+            ok &= row.status == RESULT_STATUSES.get(code, 'failed')
+            if kind == 'order':
+                ok &= orders[row.order_id] == ('paid' if paid else 'pending')
+            elif kind == 'booking':
+                ok &= bookings[row.booking_id] == paid
+            else:
+                ok &= (row.booking_id is not None and bookings[row.booking_id]) if paid else row.booking_id is None
+                ok &= store.get_by_transaction(transaction_id) is None
+        ok &= tuple(get_callback_queue().counts()) == (0, 0)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--payments', type=int, default=3000)
+    parser.add_argument('--duplicates', type=float, default=0.1, help="share of callbacks Daraja delivers twice")
+    parser.add_argument('--batch', type=int, default=100)
+    args = parser.parse_args()
+
+    # The malformed callback below is logged with its traceback on purpose
+    logging.disable(logging.ERROR)
+    rng = random.Random(42)
+    stub = DarajaStub().start()
+    ok = True
+    print(f"{args.payments} pending payments, {args.duplicates:.0%} of callbacks delivered twice")
+    for label, batch in ((f'batches of {args.batch}', args.batch), ('one per transaction', 1)):
+        app, kinds = callback_app(args.payments, stub)
+        outcomes = {tid: rng.choice((0, 0, 0, 0, 0, 0, 0, 0, 1032, 2001)) for tid in kinds}
+        stub.results.update(outcomes)
+        elapsed, accepted, posted, latencies = receive(app, outcomes, args.duplicates, rng)
+        ok &= accepted == posted
+        if batch != 1:
+            print(f"  POST /mpesa/callback  {posted / elapsed:7.0f} callbacks/s  p50 {statistics.median(latencies):.2f} ms  "
+                  f"p99 {sorted(latencies)[int(len(latencies) * 0.99)]:.2f} ms  {posted - accepted} rejected")
+
+        with app.app_context():
+            start = time.perf_counter()
+            drain(batch_size=batch)
+            elapsed = time.perf_counter() - start
+        checked = verify(app, kinds, outcomes)
+        ok &= checked
+        print(f"  apply, {label:<20} {posted / elapsed:7.0f} callbacks/s ({posted / elapsed * 60:,.0f}/min)  "
+              f"{'state ok' if checked else 'FAILED'}")
+
+    with app.app_context():
+        # Replaying every callback changes nothing
+        before = snapshot()
+        client = app.test_client()
+        for tid, code in outcomes.items():
+            client.post('/mpesa/callback', json=callback_body(tid, code), query_string={'token': CALLBACK_TOKEN})
+        drain()
+        replayed = snapshot() == before
+        print(f"  replay of all callbacks: {'no changes' if replayed else 'FAILED'}")
+        ok &= replayed
+
+        # An unknown transaction is recorded once the grace period for its StkPush has passed,
+        # and a malformed row is set aside without blocking the batch it arrived in
+        queue = get_callback_queue()
+        stub.results['ws_CO_unknown'] = 0
+        queue.put(json.dumps(callback_body('ws_CO_unknown', 0, amount=55)))
+        queue.put('{"Body": {}}')
+        app.config['MPESA_CALLBACK_ORPHAN_GRACE'] = 10
+        drain()
+        deferred = tuple(queue.counts()) == (1, 1)
+        app.config['MPESA_CALLBACK_ORPHAN_GRACE'] = 0
+        queue.defer([row[0] for row in queue._connect().execute('SELECT id FROM mpesa_callbacks WHERE available_at IS NOT NULL')], 0)
+        drain()
+        orphan = db.session.execute(select(Payment.status, Payment.amount).where(Payment.transaction_id == 'ws_CO_unknown')).one_or_none()
+        handled = deferred and tuple(orphan or ()) == ('completed', 55) and tuple(queue.counts()) == (0, 1)
+        print(f"  unknown and malformed callbacks: {'handled' if handled else 'FAILED'}")
+        ok &= handled
+
+        # Queued callbacks outlive the process that received them
+        queue.put(json.dumps(callback_body('ws_CO_restart', 1032)))
+        survived = CallbackQueue(queue.path).counts()[0] == 1
+        print(f"  queue survives a restart: {'yes' if survived else 'FAILED'}")
+        ok &= survived
+
+    # Callbacks without the token are refused, and a forged success is settled as what
+    # Daraja says happened; one for a transaction Daraja never issued is set aside
+    app, kinds = callback_app(3, stub)
+    client = app.test_client()
+    forged = list(kinds)
+    stub.results[forged[0]] = 1032
+    refused = client.post('/mpesa/callback', json=callback_body(forged[0], 0)).status_code == 403
+    refused &= client.post('/mpesa/callback', json=callback_body(forged[0], 0),
+                           query_string={'token': 'guess'}).status_code == 403
+    for tid in (forged[0], 'ws_CO_never_issued'):
+        client.post('/mpesa/callback', json=callback_body(tid, 0), query_string={'token': CALLBACK_TOKEN})
+    with app.app_context():
+        app.config['MPESA_CALLBACK_ORPHAN_GRACE'] = 0
+        drain()
+        statuses = dict(db.session.execute(select(Payment.transaction_id, Payment.status)).all())
+        order = db.session.execute(select(Order.status).join(Payment).where(Payment.transaction_id == forged[0])).scalar()
+        rejected = (refused and statuses[forged[0]] == 'cancelled' and order == 'pending'
+                    and 'ws_CO_never_issued' not in statuses and tuple(get_callback_queue().counts()) == (0, 1))
+    print(f"  forged callbacks: {'rejected' if rejected else 'FAILED'}")
+    ok &= rejected
+
+    # The background worker applies callbacks without anyone calling drain()
+    app, kinds = callback_app(30, stub, MPESA_CALLBACK_WORKER=True)
+    stub.results.update(dict.fromkeys(kinds, 0))
+    client = app.test_client()
+    for tid in kinds:
+        client.post('/mpesa/callback', json=callback_body(tid, 0), query_string={'token': CALLBACK_TOKEN})
+    deadline = time.time() + 10
+    with app.app_context():
+        while time.time() < deadline and get_callback_queue().counts()[0]:
+            time.sleep(0.05)
+    applied = verify(app, kinds, dict.fromkeys(kinds, 0))
+    print(f"  background worker: {'applied' if applied else 'FAILED'}")
+    ok &= applied
+
+    stub.stop()
+    print("callbacks applied correctly" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
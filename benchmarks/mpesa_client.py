@@ -0,0 +1,174 @@
+"""
+utils.mpesa.MpesaClient against the local Daraja stub, next to the old per-call
+requests.get/requests.post code. Many threads push through short-lived tokens; the
+script counts OAuth calls, TCP connections and pushes per second. It then checks
+retries, timeouts, recovery from a revoked token and POST /stk_push end to end. Exits non-zero when a check
+fails.
+
+    python -m benchmarks.mpesa_client --threads 32 --pushes 1000 --token-ttl 2
+"""
+import argparse
+import base64
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from benchmarks.common import auth_headers, make_api_app
+from benchmarks.daraja_stub import DarajaStub
+from utils.mpesa import MpesaClient, MpesaError
+
+
+class OldClient:
+    """What resources/mpesa.py did before: a global token, no session, no timeout"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.token_info = {'token': None, 'expires_at': None}
+
+    def get_token(self):
+        if self.token_info['token'] is None or datetime.utcnow() >= self.token_info['expires_at']:
+            auth = base64.b64encode(b"key:secret").decode()
+            response = requests.get(f'{self.base_url}/oauth/v1/generate?grant_type=client_credentials',
+                                    headers={'Authorization': f'Basic {auth}'})
+            data = response.json()
+            self.token_info['token'] = data.get('access_token')
+            self.token_info['expires_at'] = datetime.utcnow() + timedelta(seconds=int(data.get('expires_in')))
+        return self.token_info['token']
+
+    def stk_push(self, phone, amount, callback_url):
+        response = requests.post(f'{self.base_url}/mpesa/stkpush/v1/processrequest',
+                                 json={'PhoneNumber': phone, 'Amount': amount, 'CallBackURL': callback_url},
+                                 headers={'Authorization': f'Bearer {self.get_token()}'})
+        if response.status_code != 200:
+            raise MpesaError("M-Pesa request failed", response.status_code, response.text)
+        return response.json()
+
+
+def new_client(stub, **options):
+    return MpesaClient(stub.url, 'key', 'secret', '174379', 'passkey', **options)
+
+
+def load(stub, client, threads, pushes):
+    failures = []
+    remaining = iter(range(pushes))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                n = next(remaining, None)
+            if n is None:
+                return
+            try:
+                client.stk_push('254700000000', 1, 'https://example.com/callback')
+            except (MpesaError, requests.RequestException) as e:
+                failures.append(e)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start, failures
+
+
+def check_endpoint():
+    """POST /stk_push through the API app, with MPESA_BASE_URL pointed at the stub"""
+    stub = DarajaStub().start()
+    app = make_api_app()
+    app.config.update(MPESA_BASE_URL=stub.url, MPESA_CONSUMER_KEY='key', MPESA_CONSUMER_SECRET='secret',
+                      MPESA_PASSKEY='passkey', MPESA_CALLBACK_URL='https://example.com/callback')
+    client = app.test_client()
+    headers = auth_headers(app, 1, 'passenger')
+    responses = [client.post('/stk_push', json={'phone': '0700000000', 'amount': 10}, headers=headers) for _ in range(20)]
+    stub.stop()
+
+    ok = all(r.status_code == 200 and r.get_json()['transaction_id'] in stub.pushes for r in responses)
+    ok &= stub.calls['oauth'] == 1 and len(stub.connections) == 1
+    ok &= all(push['PhoneNumber'] == '254700000000' for push in stub.pushes.values())
+    print(f"  POST /stk_push x20: {'ok' if ok else 'FAILED'}, {stub.calls['oauth']} OAuth call, "
+          f"{len(stub.connections)} connection")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--pushes', type=int, default=1000)
+    parser.add_argument('--token-ttl', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.005, help="stub response time in seconds")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    ok = True
+    print(f"{args.pushes} STK pushes from {args.threads} threads, tokens live {args.token_ttl}s, stub latency {args.latency * 1000:.0f} ms")
+    for label, make in (('old requests.* code', OldClient), ('MpesaClient', None)):
+        stub = DarajaStub(latency=args.latency, token_ttl=args.token_ttl).start()
+        client = make(stub.url) if make else new_client(stub, refresh_margin=args.token_ttl / 4, pool_size=args.threads)
+        elapsed, failures = load(stub, client, args.threads, args.pushes)
+        stub.stop()
+        # Each token must cover at least (ttl - margin) seconds of pushes
+        refreshes_needed = int(elapsed / (args.token_ttl * 0.75)) + 1
+        print(f"  {label:<20} {args.pushes / elapsed:7.0f} pushes/s  {stub.calls['oauth']:4} OAuth calls "
+              f"({refreshes_needed} needed)  {len(stub.connections):5} connections  {len(failures)} failed")
+        if not make:
+            ok &= not failures and stub.calls['oauth'] <= refreshes_needed + 1
+            ok &= len(stub.connections) <= args.threads
+
+    # Two 503s from the OAuth endpoint are retried away
+    stub = DarajaStub(oauth_failures=2).start()
+    client = new_client(stub, backoff=0.01)
+    try:
+        client.stk_push('254700000000', 1, 'https://example.com/callback')
+        retried = stub.calls['oauth'] == 3
+    except MpesaError:
+        retried = False
+    print(f"  OAuth 503 twice, then 200: {'recovered' if retried else 'FAILED'} after {stub.calls['oauth']} calls")
+    ok &= retried
+
+    # A failed STK push is not replayed: the customer would be prompted twice
+    stub.stk_failures = 1
+    try:
+        client.stk_push('254700000000', 1, 'https://example.com/callback')
+        not_replayed = False
+    except MpesaError as e:
+        not_replayed = e.status_code == 503 and stub.calls['stk_push'] == 2
+    print(f"  STK push 503: {'surfaced without a retry' if not_replayed else 'FAILED'}")
+    ok &= not_replayed
+
+    # Tokens revoked on Daraja's side are refetched once
+    stub.tokens.clear()
+    try:
+        client.stk_push('254700000000', 1, 'https://example.com/callback')
+        refetched = True
+    except MpesaError:
+        refetched = False
+    print(f"  revoked token: {'refetched' if refetched else 'FAILED'}")
+    ok &= refetched
+
+    # A hung STK push gives up at the read timeout instead of holding the request thread
+    stub.read_delay = 2
+    client = new_client(stub, timeout=(1, 0.3))
+    start = time.perf_counter()
+    try:
+        client.stk_push('254700000000', 1, 'https://example.com/callback')
+        timed_out = False
+    except MpesaError:
+        timed_out = True
+    waited = time.perf_counter() - start
+    print(f"  hung STK push: {'timed out' if timed_out else 'FAILED'} after {waited:.2f}s")
+    ok &= timed_out and waited < 1.5
+    stub.stop()
+
+    ok &= check_endpoint()
+    print("client checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Latency of GET /stalls/nearby and /buses/nearby as the tables grow, with the
+response cache off. Seeds --sizes stalls and as many buses with seed.py (stalls
+crowd around eight markets, buses spread over the city), asks for the 10 nearest
+to --queries points, and compares the time with reading every row and sorting
+in Python, which is what the free-text locations left callers to do. Checks that:
+- results are the same rows, in the same order, as that full scan;
+- moving and deleting a stall shows up in the next lookup;
+- the R-tree holds exactly the rows with coordinates.
+Exits non-zero when a check fails or the largest size's p95 is over --target ms.
+
+    python -m benchmarks.nearby --sizes 10000,100000,1000000
+"""
+import argparse
+import logging
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from benchmarks.common import make_api_app
+from model import db, Bus, Stall
+from seed import COORDINATES, MARKETS, PLACES
+import seed
+from utils.geo import METERS_PER_DEGREE
+
+K = 10
+
+
+def points(count, rng):
+    """Points near the markets, near the other places and anywhere in between"""
+    found = []
+    for n in range(count):
+        lat, lng = COORDINATES[rng.choice(MARKETS if n % 3 == 0 else PLACES)]
+        spread = 0.3 if n % 3 == 2 else 0.01
+        found.append((lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread)))
+    return found
+
+
+def scan(rows, lat, lng, radius):
+    """The ids of the K nearest rows within `radius`, by reading all of them"""
+    scale = math.cos(math.radians(lat))
+    reach = (radius / METERS_PER_DEGREE) ** 2
+    near = []
+    for id, row_lat, row_lng in rows:
+        distance = (row_lat - lat) ** 2 + ((row_lng - lng) * scale) ** 2
+        if distance <= reach:
+            near.append((distance, id))
+    return [id for _, id in sorted(near)[:K]]
+
+
+def lookup(client, path, lat, lng, radius):
+    response = client.get(path, query_string={'lat': lat, 'lng': lng, 'radius': radius, 'limit': K})
+    assert response.status_code == 200, (path, response.status_code)
+    return [row['id'] for row in response.get_json()]
+
+
+def measure(app, client, queries, rng):
+    ok = True
+    p95s = []
+    for path, model in (('/stalls/nearby', Stall), ('/buses/nearby', Bus)):
+        latencies, answers = [], []
+        for lat, lng in queries:
+            radius = rng.choice((1000, 5000, 50000))
+            start = time.perf_counter()
+            answers.append((lat, lng, radius, lookup(client, path, lat, lng, radius)))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        # Read afterwards: a million rows held in memory would slow the lookups' garbage collection
+        with app.app_context():
+            start = time.perf_counter()
+            rows = db.session.execute(db.select(model.id, model.latitude, model.longitude)).all()
+            read = time.perf_counter() - start
+        scans, mismatched = [], 0
+        # Scanning every row per query is slow; check a sample
+        for lat, lng, radius, ids in answers[::10]:
+            start = time.perf_counter()
+            expected = scan(rows, lat, lng, radius)
+            scans.append((read + time.perf_counter() - start) * 1000)
+            mismatched += ids != expected
+        del rows
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95)]
+        p95s.append(p95)
+        print(f"    {path:<15} p50 {statistics.median(latencies):6.2f} ms  p95 {p95:6.2f} ms   "
+              f"full scan p50 {statistics.median(scans):8.1f} ms   "
+              f"{'same results' if not mismatched else f'{mismatched} DIFFERENT'}")
+        ok &= not mismatched
+    return ok, max(p95s)
+
+
+def checks(app, client):
+    results = []
+    lat, lng = -1.4, 36.6
+    with app.app_context():
+        db.session.execute(db.update(Stall).where(Stall.id == 1).values(latitude=lat, longitude=lng))
+        db.session.commit()
+    results.append(('move', lookup(client, '/stalls/nearby', lat, lng, 100)[:1] == [1]))
+
+    with app.app_context():
+        stall_2 = db.session.execute(db.select(Stall.latitude, Stall.longitude).where(Stall.id == 2)).one()
+        db.session.execute(db.update(Stall).where(Stall.id == 1).values(latitude=None, longitude=None))
+        db.session.execute(db.delete(Stall).where(Stall.id == 2))
+        db.session.commit()
+        in_index = {table: db.session.execute(text(f"SELECT count(*) FROM {table}_rtree")).scalar()
+                    for table in ('stalls', 'buses')}
+        with_coordinates = {model.__tablename__: db.session.execute(
+            db.select(db.func.count()).where(model.latitude.is_not(None), model.longitude.is_not(None))).scalar()
+            for model in (Stall, Bus)}
+    results.append(('delete', 1 not in lookup(client, '/stalls/nearby', lat, lng, 100)
+                    and 2 not in lookup(client, '/stalls/nearby', *stall_2, 100)))
+    results.append(('index matches', in_index == with_coordinates))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--target', type=float, default=10.0, help="p95 in ms at the largest size")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rng = random.Random(7)
+    queries = points(args.queries, rng)
+    ok = True
+    for size in map(int, args.sizes.split(',')):
+        app = make_api_app(f'sqlite:///{os.path.join(tempfile.mkdtemp(), "app.db")}', RESPONSE_CACHE_BACKEND='none')
+        start = time.perf_counter()
+        with app.app_context():
+            seed.seed_db(tables=('stalls', 'buses'), stalls=size, buses=size)
+        print(f"  {size:,} stalls and buses, seeded and indexed in {time.perf_counter() - start:.1f}s")
+        client = app.test_client()
+        passed, p95 = measure(app, client, queries, rng)
+        ok &= passed
+
+    ok &= p95 <= args.target
+    for name, passed in checks(app, client):
+        print(f"  {name:<14} {'ok' if passed else 'FAILED'}")
+        ok &= passed
+
+    print("nearby checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Logins per second through POST /login, with bcrypt on the request thread (how every
+login ran before utils.passwords) and with the hashing process pool. Also reports
+how long a cheap GET /routes takes while the logins are running, and checks that
+legacy werkzeug hashes and old bcrypt costs are upgraded on login. Exits non-zero
+when a check fails.
+
+    python -m benchmarks.password_hashing --logins 64 --threads 8 --rounds 12
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks.common import make_api_app
+from model import db, User
+from utils.passwords import hash_password
+
+
+def seed(users, rounds):
+    password_hash = hash_password('password123', rounds)
+    db.session.bulk_insert_mappings(User, [
+        {'id': n, 'username': f'user{n}', 'email': f'user{n}@example.com', 'password_hash': password_hash, 'role': 'buyer'}
+        for n in range(1, users + 1)
+    ])
+    db.session.add(User(id=users + 1, username='legacy', email='legacy@example.com',
+                        password_hash=generate_password_hash('legacypass'), role='buyer'))
+    db.session.commit()
+
+
+def storm(app, logins, threads, users):
+    """Run `logins` logins from `threads` threads; returns (seconds, failures, /routes latencies in ms)"""
+    client = app.test_client()
+    failures = []
+    next_login = iter(range(logins))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                n = next(next_login, None)
+            if n is None:
+                return
+            response = client.post('/login', json={'email': f'user{n % users + 1}@example.com', 'password': 'password123'})
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    latencies = []
+    while any(thread.is_alive() for thread in pool):
+        begin = time.perf_counter()
+        client.get('/routes')
+        latencies.append((time.perf_counter() - begin) * 1000)
+        time.sleep(0.01)
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start, failures, latencies
+
+
+def check_upgrades(app, users, rounds):
+    client = app.test_client()
+    ok = client.post('/login', json={'email': 'legacy@example.com', 'password': 'wrong'}).status_code == 401
+    ok &= client.post('/login', json={'email': 'legacy@example.com', 'password': 'legacypass'}).status_code == 200
+    with app.app_context():
+        upgraded = db.session.get(User, users + 1).password_hash
+    ok &= upgraded.startswith(f'$2b${rounds:02d}$')
+
+    # Raising the cost upgrades bcrypt hashes made at the old one
+    app.extensions.pop('password_hasher').shutdown()
+    app.config['PASSWORD_HASH_ROUNDS'] = rounds + 1
+    ok &= client.post('/login', json={'email': 'legacy@example.com', 'password': 'legacypass'}).status_code == 200
+    with app.app_context():
+        ok &= db.session.get(User, users + 1).password_hash.startswith(f'$2b${rounds + 1:02d}$')
+    print(f"legacy pbkdf2 hash upgraded to bcrypt cost {rounds}, then to cost {rounds + 1}: {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="hashing processes for the pooled run")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    app = make_api_app()
+    app.config['PASSWORD_HASH_ROUNDS'] = args.rounds
+    # Every login comes from the test client's one address
+    app.config['RATE_LIMIT_ENABLED'] = False
+    with app.app_context():
+        seed(args.users, args.rounds)
+
+    cores = os.cpu_count() or 1
+    ok = True
+    print(f"{args.logins} logins from {args.threads} threads, bcrypt cost {args.rounds}, {cores} cores")
+    for label, workers in (('request thread', 0), (f'pool of {args.workers}', args.workers)):
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        hasher = app.extensions.pop('password_hasher', None)
+        if hasher:
+            hasher.shutdown()
+        if workers:
+            # Start the pool's processes before timing
+            app.test_client().post('/login', json={'email': 'user1@example.com', 'password': 'password123'})
+
+        elapsed, failures, latencies = storm(app, args.logins, args.threads, args.users)
+        ok &= not failures
+        rate = args.logins / elapsed
+        p50 = statistics.median(latencies) if latencies else float('nan')
+        print(f"  {label:<16} {rate:7.1f} logins/s  {rate / cores:7.1f} per core   "
+              f"GET /routes p50 {p50:6.2f} ms during the storm   {len(failures)} failed")
+
+    ok &= check_upgrades(app, args.users, args.rounds)
+    app.extensions.pop('password_hasher').shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
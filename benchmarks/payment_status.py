@@ -0,0 +1,150 @@
+"""
+Clients waiting on STK pushes through GET /payment_status/<id>: polling every
+--poll-every seconds (what the apps did), long-polling with ?wait=, and reading the
+server-sent event stream. Payments settle at random times over --settle seconds.
+Half go through the callback queue in this process, which wakes waiters directly.
+The other half are updated straight in the database, standing in for another
+worker, so only the shared poller can see them. Reports HTTP requests and SQL
+statements per waiting client, and how long clients take to see the result.
+Exits non-zero when a client sees the wrong status or long-polling does not cut
+the statements.
+
+    python -m benchmarks.payment_status --clients 200 --settle 5
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import auth_headers, make_api_app
+from benchmarks.daraja_stub import DarajaStub
+from benchmarks.mpesa_callbacks import callback_body
+from model import db, Payment, User
+from utils.payment_callbacks import drain, get_callback_queue
+
+
+def status_app(clients, interval, stub):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'app.db')
+    app = make_api_app(f'sqlite:///{path}', **stub.app_config())
+    app.config.update(MPESA_CALLBACK_QUEUE_DB=os.path.join(directory, 'callbacks.db'), MPESA_CALLBACK_WORKER=False,
+                      PAYMENT_STATUS_POLL_INTERVAL=interval)
+    with app.app_context():
+        db.session.add(User(id=1, username='payer', email='payer@example.com', password_hash='x', role='passenger'))
+        db.session.bulk_insert_mappings(Payment, [
+            {'transaction_id': f'ws_CO_{n:012d}', 'amount': 100, 'status': 'pending'} for n in range(clients)
+        ])
+        db.session.commit()
+    return app, path
+
+
+def settle(app, path, outcomes, settle_for, settled_at):
+    """Settle every payment at a random time within `settle_for` seconds"""
+    rng = random.Random(7)
+    schedule = sorted((rng.uniform(0.2, settle_for), tid) for tid in outcomes)
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    start = time.perf_counter()
+    with app.app_context():
+        for n, (at, tid) in enumerate(schedule):
+            time.sleep(max(0, start + at - time.perf_counter()))
+            status = 'completed' if outcomes[tid] == 0 else 'cancelled'
+            if n % 2:
+                other_worker.execute('UPDATE payments SET status = ? WHERE transaction_id = ?', (status, tid))
+            else:
+                get_callback_queue().put(json.dumps(callback_body(tid, outcomes[tid])))
+                drain()
+            settled_at[tid] = time.perf_counter()
+
+
+def wait_for(client, headers, tid, mode, poll_every):
+    """Returns (final status, HTTP requests made)"""
+    url = f'/payment_status/{tid}'
+    requests_made = 0
+    while True:
+        requests_made += 1
+        if mode == 'poll':
+            status = client.get(url, headers=headers).get_json()['status']
+            if status == 'pending':
+                time.sleep(poll_every)
+                continue
+        elif mode == 'long-poll':
+            status = client.get(f'{url}?wait=30', headers=headers).get_json()['status']
+            if status == 'pending':
+                continue
+        else:
+            body = client.get(url, headers={**headers, 'Accept': 'text/event-stream'}).get_data(as_text=True)
+            status = json.loads([line for line in body.splitlines() if line.startswith('data: ')][-1][6:])['status']
+            if status == 'pending':
+                continue
+        return status, requests_made
+
+
+def run(mode, args, stub):
+    app, path = status_app(args.clients, args.interval, stub)
+    outcomes = {f'ws_CO_{n:012d}': 0 if n % 5 else 1032 for n in range(args.clients)}
+    stub.results.update(outcomes)
+    headers = auth_headers(app, 1, 'passenger')
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *a: statements.append(threading.current_thread().name))
+
+    settled_at, seen, results = {}, {}, {}
+
+    def client_thread(tid):
+        status, requests_made = wait_for(app.test_client(), headers, tid, mode, args.poll_every)
+        seen[tid] = time.perf_counter()
+        results[tid] = (status, requests_made)
+
+    threads = [threading.Thread(target=client_thread, args=(tid,)) for tid in outcomes]
+    for thread in threads:
+        thread.start()
+    settler = threading.Thread(target=settle, args=(app, path, outcomes, args.settle, settled_at), name='settler')
+    settler.start()
+    for thread in threads + [settler]:
+        thread.join()
+
+    ok = all(results[tid][0] == ('completed' if code == 0 else 'cancelled') for tid, code in outcomes.items())
+    requests_made = sum(made for _, made in results.values())
+    queries = sum(1 for name in statements if name != 'settler')
+    delays = sorted(max(0, seen[tid] - settled_at[tid]) * 1000 for tid in outcomes)
+    print(f"  {mode:<10} {requests_made / args.clients:6.1f} requests/client  {queries / args.clients:6.2f} SQL/client  "
+          f"seen after p50 {statistics.median(delays):6.0f} ms  p95 {delays[int(len(delays) * 0.95)]:6.0f} ms  "
+          f"{'ok' if ok else 'WRONG STATUS'}")
+    return ok, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--settle', type=float, default=5.0, help="payments settle within this many seconds")
+    parser.add_argument('--poll-every', type=float, default=0.25, help="client polling interval in the old mode")
+    parser.add_argument('--interval', type=float, default=1.0, help="PAYMENT_STATUS_POLL_INTERVAL")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(f"{args.clients} clients waiting, payments settle within {args.settle}s")
+    stub = DarajaStub().start()
+    ok, polled = run('poll', args, stub)
+    for mode in ('long-poll', 'sse'):
+        mode_ok, queries = run(mode, args, stub)
+        # One lookup per client plus the shared poller's sweeps
+        ok &= mode_ok and queries <= args.clients + 2 * (args.settle / args.interval + 2)
+        ok &= queries * 5 <= polled
+
+    stub.stop()
+    print("payment status checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
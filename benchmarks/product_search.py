@@ -0,0 +1,131 @@
+"""
+Latency of GET /products/search over --products products from seed.py, for queries
+typed a letter at a time as type-ahead sends them, with the response cache off. Every
+16th product gets some sales so ranking has something to weigh. Checks that:
+- every result has a word starting with each word typed;
+- a bestseller ranks above an otherwise equal match, however many newer ones there are;
+- inserts, renames and deletes show up in the next search;
+- the FTS index agrees with the table.
+Exits non-zero when a check fails or the p95 is over --target ms.
+
+    python -m benchmarks.product_search --products 500000
+"""
+import argparse
+import logging
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from benchmarks.common import make_api_app
+from model import db, Product
+from utils.product_search import SEARCH_CANDIDATES
+import seed
+
+TYPED = ('jeans', 'sukuma wiki', 'otieno stall', 'great value', 'kiondo 42', 'sufuria 9', 'phone cover',
+         'wanjiku stall 7')
+
+
+def queries():
+    """Every prefix of each phrase from two characters on, as a search box sends them"""
+    return [phrase[:n] for phrase in TYPED for n in range(2, len(phrase) + 1) if phrase[n - 1] != ' ']
+
+
+def names(client, q, limit=10):
+    return [product['name'] for product in client.get('/products/search', query_string={'q': q, 'limit': limit}).get_json()]
+
+
+def matches(product, q):
+    words = re.findall(r'\w+', ' '.join(product[field] for field in ('name', 'description', 'stall_name')).lower())
+    return all(any(word.startswith(term) for word in words) for term in re.findall(r'\w+', q.lower()))
+
+
+def checks(app, client):
+    results = []
+    with app.app_context():
+        db.session.add_all([Product(name=f'Mkeka {n}', description='Handwoven mat', price=300, available_quantity=5,
+                                    sold_quantity=sold, stall_id=1, stall_name='Zawadi Stall 1')
+                            for n, sold in ((1, 0), (2, 400))])
+        db.session.commit()
+    results.append(('bestseller first', names(client, 'mkeka') == ['Mkeka 2', 'Mkeka 1']))
+
+    # More newer matches than SEARCH_CANDIDATES don't push an older bestseller out
+    with app.app_context():
+        db.session.add(Product(name='Leso Classic', description='Printed cotton', price=450, available_quantity=5,
+                               sold_quantity=250, stall_id=1, stall_name='Zawadi Stall 2'))
+        db.session.flush()
+        db.session.add_all([Product(name=f'Leso {n}', description='Printed cotton', price=450, available_quantity=5,
+                                    sold_quantity=0, stall_id=1, stall_name='Zawadi Stall 2')
+                            for n in range(SEARCH_CANDIDATES + 50)])
+        db.session.commit()
+    results.append(('old bestseller', names(client, 'leso', 1) == ['Leso Classic']))
+    with app.app_context():
+        db.session.execute(db.delete(Product).where(Product.stall_name == 'Zawadi Stall 2'))
+        db.session.commit()
+
+    with app.app_context():
+        db.session.execute(db.update(Product).where(Product.name == 'Mkeka 1').values(name='Kikapu Basket'))
+        db.session.commit()
+    results.append(('rename', names(client, 'kikapu') == ['Kikapu Basket'] and names(client, 'mkeka') == ['Mkeka 2']))
+
+    with app.app_context():
+        db.session.execute(db.delete(Product).where(Product.name.in_(['Kikapu Basket', 'Mkeka 2'])))
+        db.session.commit()
+        # Raises when the index and the products table disagree
+        db.session.execute(text("INSERT INTO products_fts (products_fts, rank) VALUES ('integrity-check', 1)"))
+    results.append(('delete', not names(client, 'kikapu') and not names(client, 'mkeka')))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--products', type=int, default=500000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target', type=float, default=50.0, help="p95 in ms")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    app = make_api_app(f'sqlite:///{os.path.join(tempfile.mkdtemp(), "app.db")}', RESPONSE_CACHE_BACKEND='none')
+    start = time.perf_counter()
+    with app.app_context():
+        seed.seed_db(tables=('stalls', 'products'), stalls=1000, products=args.products)
+        # sold_quantity isn't indexed, so this leaves the FTS index alone
+        db.session.execute(text("UPDATE products SET sold_quantity = id * 7919 % 500 WHERE id % 16 = 0"))
+        db.session.commit()
+    print(f"seeded and indexed {args.products:,} products in {time.perf_counter() - start:.1f}s")
+
+    client = app.test_client()
+    latencies, worst, mismatched = [], (0, ''), set()
+    for q in queries():
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get('/products/search', query_string={'q': q, 'limit': 10})
+            elapsed = (time.perf_counter() - start) * 1000
+            latencies.append(elapsed)
+            worst = max(worst, (elapsed, q))
+            assert response.status_code == 200, (q, response.status_code)
+            if not all(matches(product, q) for product in response.get_json()):
+                mismatched.add(q)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"  {len(queries())} type-ahead queries x {args.repeat}: p50 {statistics.median(latencies):.2f} ms  "
+          f"p95 {p95:.2f} ms  max {latencies[-1]:.2f} ms ('{worst[1]}')")
+    for q in ('je', 'jeans', 'great value', 'kiondo 42'):
+        print(f"    {q!r:<14} -> {', '.join(names(client, q, 3))}")
+
+    ok = p95 <= args.target and not mismatched
+    print(f"  {'results match':<17} {'FAILED: ' + ', '.join(sorted(mismatched)) if mismatched else 'ok'}")
+    for name, passed in checks(app, client):
+        print(f"  {name:<17} {'ok' if passed else 'FAILED'}")
+        ok &= passed
+
+    print("product search checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
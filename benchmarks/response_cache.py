@@ -0,0 +1,158 @@
+"""
+GET latency of the cached catalog endpoints on data from seed.py: with the response
+cache off, on a cache hit, and on a conditional request answered with 304. Hits and
+304s must not run any SQL. Then writes go through the API (PUT /routes, PUT /stalls,
+POST /checkout, POST /bookings, POST /buses) and every cached response they affect
+must be fresh on the next GET, while unrelated ones stay cached. With the sqlite
+backend a second app plays another worker sharing the cache file and must see the
+same changes. Exits non-zero when a check fails.
+
+    python -m benchmarks.response_cache --scale 0.02 --requests 200
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import auth_headers, make_api_app
+from model import db, Stall, User
+import seed
+
+BACKENDS = ('none', 'memory', 'sqlite')
+
+
+def endpoints(stall_name):
+    return ['/routes?limit=100', '/stalls?limit=100', '/products?limit=100', f'/products/{stall_name}',
+            '/buses?limit=100', '/schedules?limit=100']
+
+
+def build(uri, backend, directory):
+    return make_api_app(uri, RESPONSE_CACHE_BACKEND=backend, RESPONSE_CACHE_DB=os.path.join(directory, 'cache.db'))
+
+
+def count_sql(app):
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+    return statements
+
+
+def median_ms(client, url, requests, headers=None):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get(url, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def latency(app, urls, requests, cached):
+    statements = count_sql(app)
+    client = app.test_client()
+    ok = True
+    for url in urls:
+        first = client.get(url)
+        miss = median_ms(client, url, requests) if not cached else None
+        line = f"    {url:<32} {first.status_code}"
+        if cached:
+            statements.clear()
+            hit = median_ms(client, url, requests)
+            conditional = median_ms(client, url, requests, {'If-None-Match': first.headers['ETag']})
+            not_modified = client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code
+            ok &= first.status_code == 200 and not_modified == 304 and not statements
+            line += f"  hit {hit:6.3f} ms  304 {conditional:6.3f} ms  {len(statements)} SQL statements"
+        else:
+            ok &= first.status_code == 200
+            line += f"  uncached {miss:6.3f} ms"
+        print(line)
+    return ok
+
+
+def writes(app, reader, stall_name):
+    """Write through `app` and check what `reader` serves next: True when nothing stale or lost"""
+    client, reads = app.test_client(), reader.test_client()
+    statements = count_sql(reader)
+    with app.app_context():
+        buyer_id = db.session.execute(db.select(User.id).where(User.role == 'buyer')).scalar()
+        passenger_id = db.session.execute(db.select(User.id).where(User.role == 'passenger')).scalar()
+    buyer, rider = auth_headers(app, buyer_id, 'buyer'), auth_headers(app, passenger_id, 'passenger')
+
+    def body(url):
+        return reads.get(url).get_json()
+
+    def product(url):
+        return next(p for p in body(url) if p['id'] == 1)
+
+    ok = True
+    for url in endpoints(stall_name):
+        body(url)
+
+    checks = []
+    client.put('/routes/1', json={'origin': 'Cache', 'destination': 'Busted'})
+    checks.append(('PUT /routes/1', body('/routes?limit=100')[0]['destination'] == 'Busted'))
+
+    before = product('/products?limit=100')['available_quantity']
+    client.post('/checkout', json={'items': [{'product_id': 1, 'quantity': 1}]}, headers=buyer)
+    checks.append(('POST /checkout', product('/products?limit=100')['available_quantity'] == before - 1))
+
+    statements.clear()
+    body('/routes?limit=100')
+    checks.append(('/routes still cached after checkout', not statements))
+
+    seats = body('/schedules?limit=100')[0]['available_seats']
+    client.post('/bookings', json={'schedule_id': 1, 'passenger_id': passenger_id}, headers=rider)
+    checks.append(('POST /bookings', body('/schedules?limit=100')[0]['available_seats'] == seats - 1))
+
+    buses = len(body('/buses?limit=100'))
+    client.post('/buses', json={'driver_id': 1, 'bus_number': 'KCA-999', 'seat_capacity': 14})
+    checks.append(('POST /buses', len(body('/buses?limit=100')) == buses + 1))
+
+    with app.app_context():
+        stall = db.session.get(Stall, 1)
+        client.put('/stalls/1', json={'stall_name': 'Renamed Stall', 'location': stall.location, 'image_url': stall.image_url})
+    checks.append(('PUT /stalls/1', reads.get(f'/products/{stall_name}').status_code == 404
+                   and reads.get('/products/Renamed Stall').status_code == 200
+                   and body('/stalls?limit=100')[0]['stall_name'] == 'Renamed Stall'))
+
+    for name, fresh in checks:
+        print(f"    {name:<38} {'ok' if fresh else 'STALE'}")
+        ok &= fresh
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=float, default=0.02, help="seed.py scale")
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    # PUT /routes and /stalls commit and then fail to serialize the row; only the commit matters here
+    logging.disable(logging.ERROR)
+    ok = True
+    for backend in BACKENDS:
+        directory = tempfile.mkdtemp()
+        uri = f'sqlite:///{os.path.join(directory, "app.db")}'
+        app = build(uri, backend, directory)
+        with app.app_context():
+            seed.seed_db(scale=args.scale, tables=('users', 'drivers', 'buses', 'routes', 'schedules', 'stalls', 'products'))
+            stall_name = db.session.get(Stall, 1).stall_name
+
+        print(f"  RESPONSE_CACHE_BACKEND={backend}")
+        ok &= latency(app, endpoints(stall_name), args.requests, backend != 'none')
+        if backend == 'none':
+            continue
+        # With the sqlite backend another worker process shares the cache file
+        reader = build(uri, backend, directory) if backend == 'sqlite' else app
+        ok &= writes(app, reader, stall_name)
+
+    print("response cache checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Multi-threaded load test for utils.seats.allocate_seat. Many threads book the same
+few schedules at once, half asking for a specific seat and half taking any free one.
+Exits non-zero if a seat is booked twice or a schedule is oversold.
+
+    python -m benchmarks.seat_contention --threads 32 --attempts 2000
+    python -m benchmarks.seat_contention --uri postgresql://localhost/konnect_bench
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from benchmarks.common import make_app
+from model import db, Booking, Bus, Schedule
+from utils.seats import allocate_seat, SeatUnavailable
+
+
+def seed(schedules, capacity):
+    db.session.add(Bus(id=1, bus_number='KBZ-001', seat_capacity=capacity))
+    for schedule_id in range(1, schedules + 1):
+        db.session.add(Schedule(
+            id=schedule_id, bus_id=1, route_id=1, date=db.func.current_date(),
+            departure_time=db.func.current_time(), arrival_time=db.func.current_time(),
+            available_seats=capacity,
+        ))
+    db.session.commit()
+
+
+def worker(app, attempts, schedules, capacity, outcomes):
+    rng = random.Random()
+    counts = Counter()
+    with app.app_context():
+        for _ in range(attempts):
+            schedule_id = rng.randint(1, schedules)
+            seat = rng.randint(1, capacity) if rng.random() < 0.5 else None
+            try:
+                seat = allocate_seat(schedule_id, seat)
+                db.session.add(Booking(schedule_id=schedule_id, seat_number=seat, ticket_number=str(uuid.uuid4())))
+                db.session.commit()
+                counts['booked'] += 1
+            except SeatUnavailable:
+                db.session.rollback()
+                counts['rejected'] += 1
+            except IntegrityError:
+                # Only reachable if allocate_seat let a duplicate through
+                db.session.rollback()
+                counts['constraint_violation'] += 1
+            except OperationalError:
+                db.session.rollback()
+                counts['lock_timeout'] += 1
+    outcomes.append(counts)
+
+
+def verify(schedules, capacity):
+    ok = True
+    for schedule_id in range(1, schedules + 1):
+        seats = [b.seat_number for b in Booking.query.filter_by(schedule_id=schedule_id)]
+        duplicates = [seat for seat, count in Counter(seats).items() if count > 1]
+        available = db.session.get(Schedule, schedule_id).available_seats
+        if duplicates or len(seats) > capacity or available != capacity - len(seats):
+            ok = False
+            print(f"schedule {schedule_id}: {len(seats)} booked, {available} available, duplicates {duplicates}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--attempts', type=int, default=2000, help="total booking attempts across all threads")
+    parser.add_argument('--schedules', type=int, default=4)
+    parser.add_argument('--capacity', type=int, default=60)
+    parser.add_argument('--uri', help="database to run against (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    if args.uri:
+        app = make_app(args.uri, {'pool_size': args.threads, 'max_overflow': 0})
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'seats.db')
+        app = make_app(f'sqlite:///{path}', {'connect_args': {'timeout': 30, 'check_same_thread': False}})
+
+    with app.app_context():
+        seed(args.schedules, args.capacity)
+
+    outcomes = []
+    per_thread = args.attempts // args.threads
+    threads = [threading.Thread(target=worker, args=(app, per_thread, args.schedules, args.capacity, outcomes))
+               for _ in range(args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    outcomes = sum(outcomes, Counter())
+    total = per_thread * args.threads
+    print(f"{total} attempts from {args.threads} threads in {elapsed:.2f}s ({total / elapsed:,.0f} req/s)")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"  {outcome:<22} {count}")
+
+    with app.app_context():
+        ok = verify(args.schedules, args.capacity) and not outcomes['constraint_violation']
+    print("no double bookings, no oversold schedules" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
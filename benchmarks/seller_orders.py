@@ -0,0 +1,99 @@
+"""
+GET /sellers with --items order items spread over --orders orders, compared with the
+previous approach of loading every item and order and summing items per order in
+Python. Exits non-zero when the two disagree on any order total.
+
+    python -m benchmarks.seller_orders --items 50000
+"""
+import argparse
+import logging
+import random
+import sys
+from datetime import datetime, timedelta
+
+from benchmarks.common import auth_headers, make_api_app, timed
+from model import db, Order, OrderItem, Product, Seller, Stall, User
+
+SELLER_USER_ID = 1
+
+
+def build(items, orders, rng):
+    db.session.add(User(id=SELLER_USER_ID, username='seller', email='seller@example.com', password_hash='x', role='seller'))
+    db.session.add(User(id=2, username='other', email='other@example.com', password_hash='x', role='seller'))
+    db.session.add(Seller(id=1, user_id=SELLER_USER_ID, stall_name='Mama Mboga', location='Gikomba', contact_info='0722000000'))
+    db.session.add(Seller(id=2, user_id=2, stall_name='Duka', location='Toi', contact_info='0733000000'))
+    db.session.add(Stall(id=1, seller_id=1, stall_name='Mama Mboga', location='Gikomba'))
+    db.session.add(Stall(id=2, seller_id=1, stall_name='Mama Mboga Annex', location='Gikomba'))
+    db.session.add(Stall(id=3, seller_id=2, stall_name='Duka', location='Toi'))
+    db.session.bulk_insert_mappings(Product, [
+        {'id': i, 'name': f'Product {i}', 'price': 10 * i, 'available_quantity': 100, 'stall_id': 1 + i % 3, 'stall_name': 'x'}
+        for i in range(1, 31)
+    ])
+    start = datetime(2024, 1, 1)
+    db.session.bulk_insert_mappings(Order, [
+        {'id': i, 'user_id': 2, 'total_price': 0, 'status': 'pending', 'created_at': start + timedelta(minutes=7 * i)}
+        for i in range(1, orders + 1)
+    ])
+    db.session.bulk_insert_mappings(OrderItem, [
+        {'order_id': rng.randint(1, orders), 'product_id': rng.randint(1, 30),
+         'quantity': rng.randint(1, 5), 'unit_price': rng.choice([20.0, 50.0, 120.0])}
+        for _ in range(items)
+    ])
+    db.session.commit()
+
+
+def python_totals():
+    """The old resource's algorithm, with the seller's products found through their stalls"""
+    stall_ids = [s.id for s in Stall.query.join(Seller).filter(Seller.user_id == SELLER_USER_ID).all()]
+    product_ids = [p.id for p in Product.query.filter(Product.stall_id.in_(stall_ids)).all()]
+    order_items = OrderItem.query.filter(OrderItem.product_id.in_(product_ids)).all()
+    order_ids = [item.order_id for item in order_items]
+    orders = Order.query.filter(Order.id.in_(order_ids)).all()
+    return {
+        order.id: sum(item.unit_price * item.quantity for item in order_items if item.order_id == order.id)
+        for order in orders
+    }
+
+
+def endpoint_totals(client, headers, limit):
+    totals = {}
+    url = f'/sellers?limit={limit}'
+    while url:
+        body = client.get(url, headers=headers).get_json()
+        totals.update((order['order_id'], order['total_amount']) for order in body['orders'])
+        url = f"/sellers?limit={limit}&after={body['next_cursor']}" if body['next_cursor'] else None
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    app = make_api_app()
+    with app.app_context():
+        build(args.items, args.orders, random.Random(42))
+        expected, loop_seconds = timed(python_totals)
+
+    client = app.test_client()
+    headers = auth_headers(app, SELLER_USER_ID, 'seller')
+    client.get('/sellers?limit=1', headers=headers)
+    first_page, page_seconds = timed(client.get, f'/sellers?limit={args.limit}', headers=headers)
+    actual, all_seconds = timed(endpoint_totals, client, headers, args.limit)
+
+    print(f"{args.items} order items over {args.orders} orders, {len(expected)} orders include the seller's products")
+    print(f"  python loop (all orders)      {loop_seconds * 1000:9.1f} ms")
+    print(f"  GROUP BY, first page of {args.limit:<4} {page_seconds * 1000:9.1f} ms")
+    print(f"  GROUP BY, every page          {all_seconds * 1000:9.1f} ms")
+
+    mismatched = [order_id for order_id in expected if abs(expected[order_id] - actual.get(order_id, -1)) > 1e-6]
+    if mismatched or len(actual) != len(expected) or first_page.status_code != 200:
+        print(f"MISMATCH: {len(mismatched)} order totals differ, {len(actual)} vs {len(expected)} orders")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Rows/sec of the compiled serializers against SerializerMixin.to_dict on the
+/products and /schedules list shapes.
+
+    python -m benchmarks.serializers --rows 20000
+"""
+import argparse
+import json
+from datetime import date, time
+
+from sqlalchemy import select
+
+from benchmarks.common import make_app, timed
+from model import db, Product, Schedule, Stall
+from utils.serializers import serializer_for
+
+PRODUCT_ONLY = ('id', 'name', 'description', 'price', 'available_quantity', 'sold_quantity', 'image_url', 'stall_id', 'created_at', 'location')
+SCHEDULE_ONLY = ('id', 'bus_id', 'route_id', 'departure_time', 'arrival_time', 'date', 'available_seats', 'created_at', 'updated_at')
+
+
+def seed(rows):
+    db.session.add(Stall(id=1, seller_id=1, stall_name='Bench Stall', location='Gikomba'))
+    db.session.bulk_insert_mappings(Product, [{
+        'name': f'Product {i}',
+        'description': 'A product used to benchmark serialization',
+        'price': 100.0 + i,
+        'available_quantity': 10,
+        'sold_quantity': i % 7,
+        'image_url': f'https://example.com/{i}.jpg',
+        'stall_id': 1,
+        'location': 'Gikomba',
+        'stall_name': 'Bench Stall',
+    } for i in range(rows)])
+    db.session.bulk_insert_mappings(Schedule, [{
+        'bus_id': i % 50,
+        'route_id': i % 20,
+        'departure_time': time(6 + i % 12, 0),
+        'arrival_time': time(7 + i % 12, 30),
+        'date': date(2024, 8, 1 + i % 28),
+        'available_seats': 40,
+    } for i in range(rows)])
+    db.session.commit()
+
+
+def report(label, rows, elapsed):
+    print(f"  {label:<38} {rows / elapsed:>12,.0f} rows/sec")
+
+
+def bench(model, only, rounds):
+    objects = model.query.all()
+    rows = db.session.execute(select(*[getattr(model, f) for f in only])).all()
+    serializer = serializer_for(model, only)
+
+    # Sanity check: compiled output must match what SerializerMixin returns
+    assert serializer.to_dict(objects[0]) == objects[0].to_dict(only=only)
+    assert json.loads(serializer.to_json(objects[:1]))[0] == objects[0].to_dict(only=only)
+
+    print(f"{model.__name__} ({len(objects)} rows, best of {rounds})")
+    cases = [
+        ('SerializerMixin.to_dict(only=...)', lambda: [o.to_dict(only=only) for o in objects]),
+        ('SerializerMixin + json.dumps', lambda: json.dumps([o.to_dict(only=only) for o in objects]).encode()),
+        ('compiled to_dict', lambda: [serializer.to_dict(o) for o in objects]),
+        ('compiled row_to_dict', lambda: [serializer.row_to_dict(r) for r in rows]),
+        ('compiled to_json (bytes)', lambda: serializer.to_json(objects)),
+        ('compiled rows_to_json (bytes)', lambda: serializer.rows_to_json(rows)),
+    ]
+    for label, fn in cases:
+        best = min(timed(fn)[1] for _ in range(rounds))
+        report(label, len(objects), best)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed(args.rows)
+        bench(Product, PRODUCT_ONLY, args.rounds)
+        bench(Schedule, SCHEDULE_ONLY, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
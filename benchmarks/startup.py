@@ -0,0 +1,102 @@
+"""
+Worker startup. Each measurement runs in a fresh interpreter: the time to
+`import app`, then to build it with create_app(), and what that left behind.
+Importing must not pull in the resources or alembic. Building must not open a
+database connection or start a thread, so a `gunicorn --preload` master is safe to
+fork. Then forks --workers children from a built app, as the gunicorn master does,
+and times each one's first request. Exits non-zero when a check fails.
+
+    python -m benchmarks.startup --runs 5 --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROBE = r'''
+import json, sys, threading, time
+start = time.perf_counter()
+import app as konnect
+imported = time.perf_counter()
+heavy = sorted(m for m in sys.modules if m.startswith(('resources.', 'alembic', 'flask_migrate')))
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+connects = []
+event.listen(Engine, 'connect', lambda *a: connects.append(1))
+built = time.perf_counter()
+konnect.create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1], 'MPESA_CALLBACK_TOKEN': 'startup'})
+done = time.perf_counter()
+print(json.dumps({
+    'import': imported - start, 'create_app': done - built, 'import_heavy': heavy,
+    'connects': len(connects), 'threads': threading.active_count(),
+    'migrate': 'flask_migrate' in sys.modules,
+}))
+'''
+
+
+def probe(uri):
+    out = subprocess.run([sys.executable, '-c', PROBE, uri], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def forked_first_requests(uri, workers):
+    """Build the app once, fork `workers` children and time each child's first request in ms"""
+    from benchmarks.common import make_api_app
+
+    app = make_api_app(uri)
+    timings = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            status = app.test_client().get('/routes').status_code
+            os.write(write, json.dumps([status, (time.perf_counter() - forked) * 1000]).encode())
+            os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as pipe:
+            timings.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    uri = f'sqlite:///{os.path.join(tempfile.mkdtemp(), "app.db")}'
+    results = [probe(uri) for _ in range(args.runs)]
+    ok = True
+    for key in ('import', 'create_app'):
+        times = [r[key] * 1000 for r in results]
+        print(f"  {key:<11} median {statistics.median(times):7.1f} ms  min {min(times):7.1f} ms")
+
+    last = results[-1]
+    clean_import = not last['import_heavy']
+    side_effects = last['connects'] == 0 and last['threads'] == 1 and not last['migrate']
+    print(f"  import app loads resources or alembic: {'no' if clean_import else ', '.join(last['import_heavy'])}")
+    print(f"  create_app(): {last['connects']} DB connections, {last['threads'] - 1} extra threads, "
+          f"flask_migrate {'loaded' if last['migrate'] else 'not loaded'}")
+    ok &= clean_import and side_effects
+
+    timings = forked_first_requests(uri, args.workers)
+    served = all(status == 200 for status, _ in timings)
+    print(f"  first request in {args.workers} forked workers: "
+          f"{', '.join(f'{ms:.1f}' for _, ms in timings)} ms  {'ok' if served else 'FAILED'}")
+    ok &= served
+
+    print("startup checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Peak memory of streamed product lists. Seeds --rows products with seed.py, then each
+measurement runs in a fresh interpreter: GET /products?stream=json and ?stream=ndjson
+over the last 10k, 100k and all of the rows, reading the body chunk by chunk as a
+client would. It reports how far the worker's peak RSS rose above where it was
+after a warm-up request, plus time and bytes. SQLite's mmap is off in the probes so
+database pages read through it do not count as the worker's memory. For comparison, the old approach
+(every row as a dict, then one json.dumps) runs up to --baseline-rows. Exits non-zero
+when the streamed rows do not all arrive, or when streaming all rows peaks more than
+--tolerance MB above streaming 10k.
+
+    python -m benchmarks.streaming --rows 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import make_api_app
+import seed
+
+PROBE = r'''
+import json, logging, resource, sys, time
+from app import create_app
+from utils.pagination import encode_cursor
+
+logging.disable(logging.WARNING)
+uri, mode, after = sys.argv[1], sys.argv[2], int(sys.argv[3])
+# SQLite's mmap would count the database pages read into RSS; this measures the worker itself
+app = create_app({'SQLALCHEMY_DATABASE_URI': uri, 'RESPONSE_CACHE_BACKEND': 'none', 'SQLITE_MMAP_SIZE': 0,
+                  'MPESA_CALLBACK_TOKEN': 'streaming'})
+client = app.test_client()
+
+
+def peak_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def stream(fmt, after):
+    rows = size = 0
+    for chunk in client.get(f'/products?stream={fmt}&after={encode_cursor(after)}').iter_encoded():
+        rows += chunk.count(b'\n' if fmt == 'ndjson' else b'{"id":')
+        size += len(chunk)
+    return rows, size
+
+
+def built(after):
+    # What the endpoint used to do: every row as a dict, then one string
+    from model import db, Product
+    from resources.products import ProductResource
+    from utils.serializers import serializer_for
+    with app.app_context():
+        serializer = serializer_for(Product, ProductResource.only)
+        rows = db.session.execute(db.select(*[getattr(Product, f) for f in ProductResource.only])
+                                  .where(Product.id > after).order_by(Product.id)).all()
+        body = json.dumps([serializer.row_to_dict(row) for row in rows]).encode()
+    return len(rows), len(body)
+
+
+run = built if mode == 'built' else lambda after: stream(mode, after)
+run(10 ** 9)
+warm = peak_mb()
+start = time.perf_counter()
+rows, size = run(after)
+print(json.dumps({'rows': rows, 'bytes': size, 'seconds': time.perf_counter() - start,
+                  'warm_mb': warm, 'rise_mb': peak_mb() - warm}))
+'''
+
+
+def measure(uri, mode, after):
+    out = subprocess.run([sys.executable, '-c', PROBE, uri, mode, str(after)], capture_output=True, text=True,
+                         check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--baseline-rows', type=int, default=100000)
+    parser.add_argument('--tolerance', type=float, default=16.0, help="MB")
+    args = parser.parse_args()
+
+    uri = f'sqlite:///{os.path.join(tempfile.mkdtemp(), "app.db")}'
+    app = make_api_app(uri)
+    start = time.perf_counter()
+    with app.app_context():
+        seed.seed_db(tables=('stalls', 'products'), stalls=1000, products=args.rows)
+    print(f"seeded {args.rows:,} products in {time.perf_counter() - start:.1f}s")
+
+    ok = True
+    counts = sorted({min(10000, args.rows), min(100000, args.rows), args.rows})
+    for mode in ('json', 'ndjson', 'built'):
+        rises = {}
+        for count in counts:
+            if mode == 'built' and count > args.baseline_rows:
+                continue
+            result = measure(uri, mode, args.rows - count)
+            rises[count] = result['rise_mb']
+            label = 'dicts + json.dumps' if mode == 'built' else f'stream={mode}'
+            print(f"  {label:<19} {count:>9,} rows  peak RSS +{result['rise_mb']:7.1f} MB "
+                  f"(warm {result['warm_mb']:5.1f} MB)  {result['seconds']:6.2f}s  {result['bytes'] / 2 ** 20:7.1f} MB sent")
+            ok &= result['rows'] == count
+        if mode != 'built':
+            ok &= rises[args.rows] - rises[counts[0]] <= args.tolerance
+
+    print("streaming memory checks passed" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
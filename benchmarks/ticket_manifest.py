@@ -0,0 +1,66 @@
+"""
+SQL statement count and latency of GET /drivers/<id>/tickets as the driver's route
+count grows. Exits non-zero if the number of statements depends on the number of
+routes or goes above two.
+
+    python -m benchmarks.ticket_manifest
+"""
+import argparse
+import sys
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import make_api_app
+from model import db, Driver, Route, Ticket
+
+ROUTE_COUNTS = (1, 10, 100, 1000)
+
+
+def seed(tickets_per_route):
+    route_id = 0
+    for driver_id, routes in enumerate(ROUTE_COUNTS, start=1):
+        db.session.add(Driver(id=driver_id, name=f'Driver {driver_id}', email=f'd{driver_id}@example.com', contact_info=f'07000000{driver_id:02d}'))
+        route_rows, ticket_rows = [], []
+        for _ in range(routes):
+            route_id += 1
+            route_rows.append({'id': route_id, 'driver_id': driver_id, 'origin': 'CBD', 'destination': f'Stop {route_id}'})
+            ticket_rows.extend({'route_id': route_id, 'passenger_id': n, 'seat_number': f'A{n}'} for n in range(tickets_per_route))
+        db.session.bulk_insert_mappings(Route, route_rows)
+        db.session.bulk_insert_mappings(Ticket, ticket_rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tickets-per-route', type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_api_app()
+    statements = []
+    with app.app_context():
+        seed(args.tickets_per_route)
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+    client = app.test_client()
+    counts = set()
+    for driver_id, routes in enumerate(ROUTE_COUNTS, start=1):
+        statements.clear()
+        start = time.perf_counter()
+        response = client.get(f'/drivers/{driver_id}/tickets')
+        body = response.get_json()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        assert response.status_code == 200, response.status_code
+        assert len(body['routes']) == routes
+        assert all(route['booked_seats'] == args.tickets_per_route for route in body['routes'])
+        counts.add(len(statements))
+        print(f"{routes:>5} routes  {len(statements)} statements  {elapsed:8.2f} ms  {len(response.data):>9,} bytes")
+
+    ok = len(counts) == 1 and max(counts) <= 2
+    print("statement count is constant" if ok else "FAILED: statement count grows with routes")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
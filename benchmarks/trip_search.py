@@ -0,0 +1,59 @@
+"""
+Latency of GET /trips/search over --schedules departures from seed.py, on 40 routes
+(both directions of 20 pairs of places), spread over --days days.
+
+    python -m benchmarks.trip_search --schedules 100000
+"""
+import argparse
+import logging
+import random
+import statistics
+import time as clock
+from datetime import timedelta
+
+from benchmarks.common import make_api_app
+from model import Route
+import seed
+
+
+def scale_up(schedules, days):
+    # 20 pairs of places served in both directions, as the old hand-written seed had
+    seed.seed_db(tables=('drivers', 'buses', 'routes', 'schedules'), drivers=10, buses=10, routes=40,
+                 schedules=schedules, days=days)
+    return [(r.origin, r.destination) for r in Route.query.all()], seed.START
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--schedules', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rng = random.Random(42)
+    app = make_api_app()
+    with app.app_context():
+        pairs, start = scale_up(args.schedules, args.days)
+
+    client = app.test_client()
+    latencies = []
+    found = 0
+    for _ in range(args.requests):
+        origin, destination = rng.choice(pairs)
+        day = start + timedelta(days=rng.randrange(args.days))
+        url = f'/trips/search?origin={origin}&destination={destination}&date={day.isoformat()}'
+        begin = clock.perf_counter()
+        response = client.get(url)
+        latencies.append((clock.perf_counter() - begin) * 1000)
+        found += len(response.get_json()['trips'])
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{args.schedules} schedules, {len(pairs)} routes, {args.requests} searches "
+          f"({found / args.requests:.1f} departures per result)")
+    print(f"  p50 {quantiles[49]:.2f} ms   p95 {quantiles[94]:.2f} ms   p99 {quantiles[98]:.2f} ms   (full HTTP round trip in-process)")
+
+
+if __name__ == '__main__':
+    main()
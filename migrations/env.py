@@ -45,6 +45,25 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Search and spatial indexes the migrations build with raw SQL and the models don't describe;
+# autogenerate would emit drops for them. On SQLite these are virtual tables with their
+# shadow tables (<name>_data, _node, ...); on Postgres, a generated column and indexes.
+UNMODELED_TABLES = ('products_fts', 'stalls_rtree', 'buses_rtree')
+UNMODELED_COLUMNS = (('products', 'search_vector'),)
+UNMODELED_INDEXES = ('ix_products_search_vector', 'ix_products_bestsellers', 'ix_stalls_location_gist',
+                     'ix_buses_location_gist')
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return not any(name == table or name.startswith(f'{table}_') for table in UNMODELED_TABLES)
+    if type_ == 'column':
+        return (parent_names['table_name'], name) not in UNMODELED_COLUMNS
+    if type_ == 'index':
+        return name not in UNMODELED_INDEXES
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +84,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -93,6 +113,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_name", include_name)
 
     connectable = get_engine()
 
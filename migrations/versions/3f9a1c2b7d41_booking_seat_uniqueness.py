@@ -0,0 +1,225 @@
+"""booking seat uniqueness
+
+Revision ID: 3f9a1c2b7d41
+Revises: 
+Create Date: 2026-10-18 09:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2b7d41'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def original_tables():
+    """The schema db.create_all() built on startup before there were migrations, in foreign key order"""
+    return {
+        'drivers': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('contact_info', sa.Text(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('contact_info'),
+            sa.UniqueConstraint('email')
+        ),
+        'users': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(), nullable=False),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('password_hash', sa.String(), nullable=False),
+            sa.Column('role', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('is_verified', sa.Boolean(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('verification_token', sa.String(), nullable=True),
+            sa.Column('profile_picture', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username')
+        ),
+        'buses': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('driver_id', sa.Integer(), nullable=True),
+            sa.Column('bus_number', sa.String(), nullable=False),
+            sa.Column('seat_capacity', sa.Integer(), nullable=False),
+            sa.Column('current_location', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['driver_id'], ['drivers.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('bus_number')
+        ),
+        'comments': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('entity_id', sa.Integer(), nullable=True),
+            sa.Column('entity_type', sa.String(), nullable=False),
+            sa.Column('rating', sa.Integer(), nullable=False),
+            sa.Column('comment', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'orders': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('total_price', sa.Float(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('status', sa.String(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'passengers': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('contact_info', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'routes': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('driver_id', sa.Integer(), nullable=True),
+            sa.Column('origin', sa.String(), nullable=False),
+            sa.Column('destination', sa.String(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['driver_id'], ['drivers.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'sellers': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('stall_name', sa.String(), nullable=False),
+            sa.Column('location', sa.String(), nullable=False),
+            sa.Column('contact_info', sa.Text(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'schedules': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('bus_id', sa.Integer(), nullable=True),
+            sa.Column('route_id', sa.Integer(), nullable=True),
+            sa.Column('departure_time', sa.Time(), nullable=False),
+            sa.Column('arrival_time', sa.Time(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('available_seats', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['bus_id'], ['buses.id'], ),
+            sa.ForeignKeyConstraint(['route_id'], ['routes.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'stalls': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('seller_id', sa.Integer(), nullable=True),
+            sa.Column('stall_name', sa.String(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('location', sa.String(), nullable=False),
+            sa.Column('image_url', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['seller_id'], ['sellers.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'tickets': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('route_id', sa.Integer(), nullable=True),
+            sa.Column('passenger_id', sa.Integer(), nullable=True),
+            sa.Column('seat_number', sa.String(length=10), nullable=True),
+            sa.ForeignKeyConstraint(['route_id'], ['routes.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'bookings': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('schedule_id', sa.Integer(), nullable=True),
+            sa.Column('passenger_id', sa.Integer(), nullable=True),
+            sa.Column('seat_number', sa.Integer(), nullable=False),
+            sa.Column('payment_status', sa.Boolean(), nullable=True),
+            sa.Column('ticket_number', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['passenger_id'], ['passengers.id'], ),
+            sa.ForeignKeyConstraint(['schedule_id'], ['schedules.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('ticket_number')
+        ),
+        'products': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('available_quantity', sa.Integer(), nullable=False),
+            sa.Column('sold_quantity', sa.Integer(), nullable=True),
+            sa.Column('image_url', sa.String(), nullable=True),
+            sa.Column('stall_id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('location', sa.String(), nullable=True),
+            sa.Column('stall_name', sa.String(), nullable=False),
+            sa.ForeignKeyConstraint(['stall_id'], ['stalls.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'reviews': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('bus_id', sa.Integer(), nullable=True),
+            sa.Column('shop_id', sa.Integer(), nullable=True),
+            sa.Column('product_id', sa.Integer(), nullable=True),
+            sa.Column('rating', sa.Integer(), nullable=False),
+            sa.Column('review', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['shop_id'], ['stalls.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'order_items': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('product_id', sa.Integer(), nullable=True),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('unit_price', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        ),
+        'payments': (
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('booking_id', sa.Integer(), nullable=True),
+            sa.Column('order_id', sa.Integer(), nullable=True),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('status', sa.String(length=50), nullable=False),
+            sa.Column('transaction_id', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ),
+            sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('transaction_id')
+        ),
+    }
+
+
+def upgrade():
+    # A database from before migrations already has these tables; a new one gets them here
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for name, elements in original_tables().items():
+        if name not in existing:
+            op.create_table(name, *elements)
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_bookings_schedule_seat', ['schedule_id', 'seat_number'])
+
+
+def downgrade():
+    # The original tables may predate this revision, so they are left in place
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_bookings_schedule_seat', type_='unique')
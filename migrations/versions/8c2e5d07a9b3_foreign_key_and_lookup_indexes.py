@@ -0,0 +1,51 @@
+"""foreign key and lookup indexes
+
+Revision ID: 8c2e5d07a9b3
+Revises: 3f9a1c2b7d41
+Create Date: 2026-10-18 11:40:02.871150
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e5d07a9b3'
+down_revision = '3f9a1c2b7d41'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_buses_driver_id', 'buses', ['driver_id']),
+    ('ix_routes_driver_id', 'routes', ['driver_id']),
+    ('ix_schedules_bus_id', 'schedules', ['bus_id']),
+    ('ix_schedules_route_date_departure', 'schedules', ['route_id', 'date', 'departure_time']),
+    ('ix_bookings_user_id', 'bookings', ['user_id']),
+    ('ix_bookings_passenger_id', 'bookings', ['passenger_id']),
+    ('ix_tickets_route_id', 'tickets', ['route_id']),
+    ('ix_products_stall_id', 'products', ['stall_id']),
+    ('ix_products_stall_name', 'products', ['stall_name']),
+    ('ix_orders_user_id', 'orders', ['user_id']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_order_items_product_id', 'order_items', ['product_id']),
+    ('ix_comments_user_id', 'comments', ['user_id']),
+    ('ix_reviews_user_id', 'reviews', ['user_id']),
+    ('ix_reviews_shop_id', 'reviews', ['shop_id']),
+    ('ix_payments_booking_id', 'payments', ['booking_id']),
+    ('ix_payments_order_id', 'payments', ['order_id']),
+    ('ix_sellers_user_id', 'sellers', ['user_id']),
+    ('ix_stalls_seller_id', 'stalls', ['seller_id']),
+    ('ix_stalls_stall_name', 'stalls', ['stall_name']),
+    ('ix_passengers_user_id', 'passengers', ['user_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
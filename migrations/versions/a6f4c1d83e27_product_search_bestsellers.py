@@ -0,0 +1,27 @@
+"""product search bestsellers
+
+Revision ID: a6f4c1d83e27
+Revises: e3b8f61d2c97
+Create Date: 2026-10-18 21:12:36.418920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6f4c1d83e27'
+down_revision = 'e3b8f61d2c97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Postgres finds the best-selling matches through the search_vector index as it is
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("CREATE INDEX ix_products_bestsellers ON products (id, sold_quantity) WHERE sold_quantity > 0")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.drop_index('ix_products_bestsellers', table_name='products')
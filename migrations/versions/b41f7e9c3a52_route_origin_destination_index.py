@@ -0,0 +1,24 @@
+"""route origin destination index
+
+Revision ID: b41f7e9c3a52
+Revises: 8c2e5d07a9b3
+Create Date: 2026-10-18 13:05:37.402981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41f7e9c3a52'
+down_revision = '8c2e5d07a9b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_routes_origin_destination', 'routes', ['origin', 'destination'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_routes_origin_destination', table_name='routes')
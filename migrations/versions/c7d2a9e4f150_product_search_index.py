@@ -0,0 +1,71 @@
+"""product search index
+
+Revision ID: c7d2a9e4f150
+Revises: b41f7e9c3a52
+Create Date: 2026-10-18 17:20:14.602318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2a9e4f150'
+down_revision = 'b41f7e9c3a52'
+branch_labels = None
+depends_on = None
+
+
+# An FTS5 table over the products, kept current by triggers
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, description, stall_name,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description, stall_name)
+        VALUES (new.id, new.name, new.description, new.stall_name);
+    END""",
+    """CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, stall_name)
+        VALUES ('delete', old.id, old.name, old.description, old.stall_name);
+    END""",
+    """CREATE TRIGGER products_fts_update AFTER UPDATE OF name, description, stall_name ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, stall_name)
+        VALUES ('delete', old.id, old.name, old.description, old.stall_name);
+        INSERT INTO products_fts (rowid, name, description, stall_name)
+        VALUES (new.id, new.name, new.description, new.stall_name);
+    END""",
+)
+
+# A generated tsvector column under a GIN index
+POSTGRES_DDL = (
+    """ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(stall_name, '') || ' ' || coalesce(description, ''))
+    ) STORED""",
+    "CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)",
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        # Index the products that are already there
+        op.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('products_fts_insert', 'products_fts_delete', 'products_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS products_fts')
+    elif dialect == 'postgresql':
+        op.drop_index('ix_products_search_vector', table_name='products')
+        op.drop_column('products', 'search_vector')
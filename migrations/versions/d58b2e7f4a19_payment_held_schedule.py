@@ -0,0 +1,30 @@
+"""payment held schedule
+
+Revision ID: d58b2e7f4a19
+Revises: a6f4c1d83e27
+Create Date: 2026-10-18 23:02:14.608315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd58b2e7f4a19'
+down_revision = 'a6f4c1d83e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('schedule_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_payments_schedule_id', ['schedule_id'], unique=False)
+        batch_op.create_foreign_key('fk_payments_schedule_id', 'schedules', ['schedule_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_payments_schedule_id', type_='foreignkey')
+        batch_op.drop_index('ix_payments_schedule_id')
+        batch_op.drop_column('schedule_id')
@@ -0,0 +1,71 @@
+"""stall and bus coordinates
+
+Revision ID: e3b8f61d2c97
+Revises: c7d2a9e4f150
+Create Date: 2026-10-18 19:05:41.227390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8f61d2c97'
+down_revision = 'c7d2a9e4f150'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('stalls', 'buses')
+
+
+def sqlite_ddl(table):
+    """An R-tree of the rows' points, kept in step by triggers; rows without both coordinates stay out"""
+    return (
+        f"CREATE VIRTUAL TABLE {table}_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+        f"""CREATE TRIGGER {table}_rtree_insert AFTER INSERT ON {table}
+            WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+            INSERT INTO {table}_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+        END""",
+        f"""CREATE TRIGGER {table}_rtree_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM {table}_rtree WHERE id = old.id;
+        END""",
+        f"""CREATE TRIGGER {table}_rtree_update AFTER UPDATE OF latitude, longitude ON {table} BEGIN
+            DELETE FROM {table}_rtree WHERE id = old.id;
+            INSERT INTO {table}_rtree SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+            WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+        END""",
+    )
+
+
+def postgres_ddl(table):
+    """A GiST index over the rows' points"""
+    return (f"CREATE INDEX ix_{table}_location_gist ON {table} USING gist (point(longitude, latitude))",)
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+
+    ddl = {'sqlite': sqlite_ddl, 'postgresql': postgres_ddl}.get(op.get_bind().dialect.name)
+    for table in TABLES:
+        for statement in ddl(table) if ddl else ():
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_rtree_{trigger}')
+            op.execute(f'DROP TABLE IF EXISTS {table}_rtree')
+        elif dialect == 'postgresql':
+            op.drop_index(f'ix_{table}_location_gist', table_name=table)
+
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('longitude')
+            batch_op.drop_column('latitude')
@@ -1,7 +1,7 @@
 from sqlalchemy import MetaData, Time, Date, ForeignKey, Integer, String, Text, Float, Boolean, DateTime
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy_serializer import SerializerMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password
 
 # Initialize metadata
 metadata = MetaData()
@@ -29,10 +29,10 @@ class User(db.Model, SerializerMixin):
     passenger = db.relationship('Passenger', back_populates='user', uselist=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)[0]
 
     def to_dict(self):
         return {
@@ -56,10 +56,12 @@ class Driver(db.Model, SerializerMixin):
 class Bus(db.Model, SerializerMixin):
     __tablename__ = 'buses'
     id = db.Column(Integer, primary_key=True)
-    driver_id = db.Column(Integer, ForeignKey('drivers.id'))
+    driver_id = db.Column(Integer, ForeignKey('drivers.id'), index=True)
     bus_number = db.Column(String, nullable=False, unique=True)
     seat_capacity = db.Column(Integer, nullable=False)
     current_location = db.Column(String)  # Updated to String for consistency
+    latitude = db.Column(Float)
+    longitude = db.Column(Float)
     created_at = db.Column(DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
@@ -69,13 +71,16 @@ class Bus(db.Model, SerializerMixin):
 class Route(db.Model, SerializerMixin):
     __tablename__ = 'routes'
     id = db.Column(Integer, primary_key=True)
-    driver_id = db.Column(Integer, ForeignKey('drivers.id'))  # Added driver_id ForeignKey
+    driver_id = db.Column(Integer, ForeignKey('drivers.id'), index=True)  # Added driver_id ForeignKey
     origin = db.Column(String, nullable=False)
     destination = db.Column(String, nullable=False)
     description = db.Column(Text)
     created_at = db.Column(DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+    # Trip search looks routes up by both ends
+    __table_args__ = (db.Index('ix_routes_origin_destination', 'origin', 'destination'),)
+
     # Relationships
     driver = db.relationship('Driver', back_populates='routes')
     schedules = db.relationship('Schedule', back_populates='route')
@@ -84,7 +89,7 @@ class Route(db.Model, SerializerMixin):
 class Schedule(db.Model, SerializerMixin):
     __tablename__ = 'schedules'
     id = db.Column(Integer, primary_key=True)
-    bus_id = db.Column(Integer, ForeignKey('buses.id'))
+    bus_id = db.Column(Integer, ForeignKey('buses.id'), index=True)
     route_id = db.Column(Integer, ForeignKey('routes.id'))
     departure_time = db.Column(Time, nullable=False)
     arrival_time = db.Column(Time, nullable=False)
@@ -93,6 +98,9 @@ class Schedule(db.Model, SerializerMixin):
     created_at = db.Column(DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
 
+    # Departures are looked up by route and day, then listed in departure order
+    __table_args__ = (db.Index('ix_schedules_route_date_departure', 'route_id', 'date', 'departure_time'),)
+
     bus = db.relationship('Bus', back_populates='schedules')
     route = db.relationship('Route', back_populates='schedules')
     bookings = db.relationship('Booking', back_populates='schedule')
@@ -100,14 +108,18 @@ class Schedule(db.Model, SerializerMixin):
 class Booking(db.Model, SerializerMixin):
     __tablename__ = 'bookings'
     id = db.Column(Integer, primary_key=True)
-    user_id = db.Column(Integer, ForeignKey('users.id'))
+    user_id = db.Column(Integer, ForeignKey('users.id'), index=True)
+    # schedule_id lookups use the leading column of uq_bookings_schedule_seat
     schedule_id = db.Column(Integer, ForeignKey('schedules.id'))
-    passenger_id = db.Column(Integer, ForeignKey('passengers.id'))
+    passenger_id = db.Column(Integer, ForeignKey('passengers.id'), index=True)
     seat_number = db.Column(Integer, nullable=False)
     payment_status = db.Column(Boolean, default=False)
     ticket_number = db.Column(String, nullable=False, unique=True)
     created_at = db.Column(DateTime, default=db.func.current_timestamp())
 
+    # Last line of defence against double booking; allocate_seat() keeps requests from reaching it
+    __table_args__ = (db.UniqueConstraint('schedule_id', 'seat_number', name='uq_bookings_schedule_seat'),)
+
     user = db.relationship('User', back_populates='bookings')
     schedule = db.relationship('Schedule', back_populates='bookings')
     payments = db.relationship('Payment', back_populates='booking')
@@ -116,7 +128,7 @@ class Booking(db.Model, SerializerMixin):
 class Ticket(db.Model, SerializerMixin):
     __tablename__ = 'tickets'
     id = db.Column(Integer, primary_key=True)
-    route_id = db.Column(Integer, ForeignKey('routes.id'))
+    route_id = db.Column(Integer, ForeignKey('routes.id'), index=True)
     passenger_id = db.Column(Integer)
     seat_number = db.Column(String(10))
     
@@ -132,10 +144,10 @@ class Product(db.Model, SerializerMixin):
     available_quantity = db.Column(Integer, nullable=False)
     sold_quantity = db.Column(Integer, default=0)
     image_url = db.Column(String, nullable=True)
-    stall_id = db.Column(Integer, ForeignKey('stalls.id'), nullable=False)
+    stall_id = db.Column(Integer, ForeignKey('stalls.id'), nullable=False, index=True)
     created_at = db.Column(DateTime, default=db.func.current_timestamp())
     location = db.Column(String)  # Updated to String
-    stall_name = db.Column(String, nullable=False)
+    stall_name = db.Column(String, nullable=False, index=True)
 
     stall = db.relationship('Stall', back_populates='products')
     order_items = db.relationship('OrderItem', back_populates='product')
@@ -143,7 +155,7 @@ class Product(db.Model, SerializerMixin):
 class Order(db.Model, SerializerMixin):
     __tablename__ = 'orders'
     id = db.Column(Integer, primary_key=True)
-    user_id = db.Column(Integer, ForeignKey('users.id'))
+    user_id = db.Column(Integer, ForeignKey('users.id'), index=True)
     total_price = db.Column(Float, nullable=False)
     created_at = db.Column(DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
@@ -156,8 +168,8 @@ class Order(db.Model, SerializerMixin):
 class OrderItem(db.Model, SerializerMixin):
     __tablename__ = 'order_items'
     id = db.Column(Integer, primary_key=True)
-    order_id = db.Column(Integer, ForeignKey('orders.id'))
-    product_id = db.Column(Integer, ForeignKey('products.id'))
+    order_id = db.Column(Integer, ForeignKey('orders.id'), index=True)
+    product_id = db.Column(Integer, ForeignKey('products.id'), index=True)
     quantity = db.Column(Integer, nullable=False)
     unit_price = db.Column(Float, nullable=False)
 
@@ -167,7 +179,7 @@ class OrderItem(db.Model, SerializerMixin):
 class Comment(db.Model, SerializerMixin):
     __tablename__ = 'comments'
     id = db.Column(Integer, primary_key=True)
-    user_id = db.Column(Integer, ForeignKey('users.id'))
+    user_id = db.Column(Integer, ForeignKey('users.id'), index=True)
     entity_id = db.Column(Integer)  
     entity_type = db.Column(String, nullable=False)  
     rating = db.Column(Integer, nullable=False)
@@ -179,9 +191,9 @@ class Comment(db.Model, SerializerMixin):
 class Review(db.Model, SerializerMixin):
     __tablename__ = 'reviews'
     id = db.Column(Integer, primary_key=True)
-    user_id = db.Column(Integer, ForeignKey('users.id'))
+    user_id = db.Column(Integer, ForeignKey('users.id'), index=True)
     bus_id = db.Column(Integer, nullable=True)
-    shop_id = db.Column(Integer, ForeignKey('stalls.id'), nullable=True)  # Corrected to be nullable
+    shop_id = db.Column(Integer, ForeignKey('stalls.id'), nullable=True, index=True)  # Corrected to be nullable
     product_id = db.Column(Integer, nullable=True)
     rating = db.Column(Integer, nullable=False)
     review = db.Column(Text)
@@ -193,8 +205,10 @@ class Review(db.Model, SerializerMixin):
 class Payment(db.Model, SerializerMixin):
     __tablename__ = 'payments'
     id = db.Column(Integer, primary_key=True)
-    booking_id = db.Column(Integer, ForeignKey('bookings.id'))
-    order_id = db.Column(Integer, ForeignKey('orders.id'))
+    booking_id = db.Column(Integer, ForeignKey('bookings.id'), index=True)
+    order_id = db.Column(Integer, ForeignKey('orders.id'), index=True)
+    # The schedule of the seat held while it is paid, so a payment whose hold is gone can be told apart
+    schedule_id = db.Column(Integer, ForeignKey('schedules.id'), index=True)
     amount = db.Column(Float, nullable=False)
     status = db.Column(String(50), nullable=False)
     transaction_id = db.Column(String, unique=True)
@@ -207,7 +221,7 @@ class Payment(db.Model, SerializerMixin):
 class Seller(db.Model, SerializerMixin):
     __tablename__ = 'sellers'
     id = db.Column(Integer, primary_key=True)
-    user_id = db.Column(Integer, ForeignKey('users.id'))
+    user_id = db.Column(Integer, ForeignKey('users.id'), index=True)
     stall_name = db.Column(String, nullable=False)
     location = db.Column(String, nullable=False)
     contact_info = db.Column(Text, nullable=False)
@@ -219,10 +233,12 @@ class Seller(db.Model, SerializerMixin):
 class Stall(db.Model, SerializerMixin):
     __tablename__ = 'stalls'
     id = db.Column(Integer, primary_key=True)
-    seller_id = db.Column(Integer, ForeignKey('sellers.id'))
-    stall_name = db.Column(String, nullable=False)
+    seller_id = db.Column(Integer, ForeignKey('sellers.id'), index=True)
+    stall_name = db.Column(String, nullable=False, index=True)
     description = db.Column(Text)
     location = db.Column(String, nullable=False)
+    latitude = db.Column(Float)
+    longitude = db.Column(Float)
     image_url = db.Column(String, nullable=True)
     created_at = db.Column(DateTime, default=db.func.current_timestamp())
 
@@ -233,7 +249,7 @@ class Stall(db.Model, SerializerMixin):
 class Passenger(db.Model, SerializerMixin):
     __tablename__ = 'passengers'
     id = db.Column(Integer, primary_key=True)
-    user_id = db.Column(Integer, ForeignKey('users.id'))
+    user_id = db.Column(Integer, ForeignKey('users.id'), index=True)
     contact_info = db.Column(Text, nullable=False)
     created_at = db.Column(DateTime, default=db.func.current_timestamp())
 
@@ -1,12 +1,12 @@
 from flask import request
 from flask_restful import Resource, reqparse
 from flask_jwt_extended import create_access_token
-from flask_bcrypt import generate_password_hash, check_password_hash
 from model import db, User
+from utils.passwords import PasswordHasherBusy, get_password_hasher
+from utils.rate_limit import rate_limited
 import logging
 
 # Setup logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 SECRET_KEY = 'JWT_SECRET_KEY'
@@ -31,12 +31,14 @@ class SignupResource(Resource):
                 else:
                     return {"message": "Email address already taken", "status": "fail"}, 422
 
-            password_hash = generate_password_hash(data['password']).decode('utf-8')
+            password_hash = get_password_hasher().hash(data['password'])
             new_user = User(username=data['username'], email=data['email'], password_hash=password_hash, role=data['role'])
             db.session.add(new_user)
             db.session.commit()
 
             return {"message": "User registered successfully.", "status": "success", "user": {"id": new_user.id, "username": new_user.username, "role": new_user.role}}
+        except PasswordHasherBusy as e:
+            return {"message": str(e), "status": "fail"}, 503
         except Exception as e:
             logger.error(f"Error during signup: {e}")
             return {"message": "Error creating user", "status": "fail", "error": str(e)}, 500
@@ -46,16 +48,24 @@ class LoginResource(Resource):
     parser.add_argument('email', required=True, help="Email address is required")
     parser.add_argument('password', required=True, help="Password is required")
 
+    @rate_limited('login')
     def post(self):
         data = self.parser.parse_args()
         try:
             user = User.query.filter_by(email=data['email']).first()
-            if user and check_password_hash(user.password_hash, data['password']):
+            valid, new_hash = get_password_hasher().verify(user.password_hash, data['password']) if user else (False, None)
+            if valid:
+                if new_hash:
+                    # Upgrade legacy werkzeug hashes and old bcrypt costs while we have the password
+                    user.password_hash = new_hash
+                    db.session.commit()
                 access_token = create_access_token(identity={'id': user.id, 'role': user.role})
                 logger.debug(f"Generated Token: {access_token}")
                 return {"message": "Login successful", "status": "success", "access_token": access_token, "user": {"id": user.id, "role": user.role}}
             else:
                 return {"message": "Invalid credentials", "status": "fail"}, 401
+        except PasswordHasherBusy as e:
+            return {"message": str(e), "status": "fail"}, 503
         except Exception as e:
             logger.error(f"Error during login: {e}")
             return {"message": "Error during login", "status": "fail", "error": str(e)}, 500
@@ -66,6 +76,7 @@ class ForgotPasswordResource(Resource):
         self.parser.add_argument('email', type=str, required=True, help="Email address is required")
         super(ForgotPasswordResource, self).__init__()
 
+    @rate_limited('forgot-password')
     def post(self):
         data = self.parser.parse_args()
         try:
@@ -87,6 +98,7 @@ class ResetPasswordResource(Resource):
         self.parser.add_argument('new_password', type=str, required=True, help="New password is required")
         super(ResetPasswordResource, self).__init__()
 
+    @rate_limited('reset-password')
     def post(self):
         data = self.parser.parse_args()
         try:
@@ -94,10 +106,12 @@ class ResetPasswordResource(Resource):
             if not user:
                 return {"message": "No account associated with this email address.", "status": "fail"}, 404
 
-            password_hash = generate_password_hash(data['new_password']).decode('utf-8')
+            password_hash = get_password_hasher().hash(data['new_password'])
             user.password_hash = password_hash
             db.session.commit()
             return {"message": "Password reset successfully."}, 200
+        except PasswordHasherBusy as e:
+            return {"message": str(e), "status": "fail"}, 503
         except Exception as e:
             logger.error(f"Error during password reset: {e}")
             return {"message": "Error during password reset", "status": "fail", "error": str(e)}, 500
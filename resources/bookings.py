@@ -1,6 +1,6 @@
 from flask import request, jsonify, make_response
 from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import logging
@@ -8,18 +8,20 @@ import uuid
 import json
 import logging
 
-from model import db, Booking, User
+from model import db, Booking
+from utils.auth import role_required
+from utils.seats import allocate_seat, move_seat, release_seat, SeatUnavailable
+from utils.seat_holds import get_hold_store
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class BookingResource(Resource):
     
-    # only = ('id', 'user_id', 'schedule_id', 'passenger_id', 'seat_number', 'payment_status', 'ticket_number', 'created_at' )
+    only = ('id', 'user_id', 'schedule_id', 'passenger_id', 'seat_number', 'payment_status', 'ticket_number', 'created_at' )
 
 
 
-    @jwt_required()
+    @role_required()
     def get(self, booking_id=None):
         """
         Retrieve a specific booking or all bookings for the authenticated passenger.
@@ -33,45 +35,42 @@ class BookingResource(Resource):
 
             logger.debug(f"get_jwt_identity() returned: {identity}")
 
-            user = User.query.get(user_id)  # Correct usage of user_id
-
-            if not user:
-                return make_response(json.dumps({"message": "User not found", "status": "fail"}), 404, {'Content-Type': 'application/json'})
-
             if booking_id:
                 booking = Booking.query.filter_by(id=booking_id, passenger_id=user_id).first()
                 if not booking:
                     return make_response(json.dumps({"message": "Booking not found", "status": "fail"}), 404, {'Content-Type': 'application/json'})
-                return make_response(json.dumps(booking.to_dict()), 200, {'Content-Type': 'application/json'})
+                return make_response(json.dumps(booking.to_dict(only=self.only)), 200, {'Content-Type': 'application/json'})
 
             # If no booking_id is provided, return all bookings for the user
             bookings = Booking.query.filter_by(passenger_id=user_id).all()
-            bookings_list = [booking.to_dict() for booking in bookings]
+            bookings_list = [booking.to_dict(only=self.only) for booking in bookings]
             return make_response(json.dumps(bookings_list), 200, {'Content-Type': 'application/json'})
 
         except Exception as e:
             logger.error(f"Error retrieving bookings: {e}")
             return make_response(json.dumps({"message": "Error retrieving bookings", "status": "fail", "error": str(e)}), 500, {'Content-Type': 'application/json'})
 
-    @jwt_required()
+    @role_required()
     def post(self):
         """
         Create a new booking.
-        Requires the following data: schedule_id, passenger_id, seat_number, payment_status.
+        Requires the following data: schedule_id, passenger_id, payment_status.
+        `seat_number` is optional; when omitted the lowest free seat is assigned.
         """
         try:
             data = request.get_json()
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
-            
-            if not user:
-                return {"message": "User not found", "status": "fail"}, 404
+            user_id = get_jwt_identity()['id']
+
+            # Atomically claims the seat, skipping seats held for pending M-Pesa payments;
+            # the schedule row stays locked until commit
+            held = get_hold_store().held_bitmap(data.get('schedule_id'))
+            seat_number = allocate_seat(data.get('schedule_id'), data.get('seat_number'), held)
 
             new_booking = Booking(
                 user_id=user_id,  # Automatically link to the authenticated user
                 schedule_id=data.get('schedule_id'),
                 passenger_id=data.get('passenger_id'),
-                seat_number=data.get('seat_number'),
+                seat_number=seat_number,
                 ticket_number=str(uuid.uuid4()),  # Generate a unique ticket number
                 payment_status=data.get('payment_status', False),
                 created_at=datetime.now(),
@@ -79,7 +78,15 @@ class BookingResource(Resource):
             
             db.session.add(new_booking)
             db.session.commit()
-            return make_response(jsonify(new_booking.to_dict()), 201)
+            return make_response(jsonify(new_booking.to_dict(only=self.only)), 201)
+
+        except SeatUnavailable as e:
+            db.session.rollback()
+            return make_response(jsonify({"message": str(e), "status": "fail"}), 409)
+
+        except ValueError:
+            db.session.rollback()
+            return make_response(jsonify({"message": "Seat number must be an integer", "status": "fail"}), 400)
 
         except IntegrityError as e:
             db.session.rollback()
@@ -89,54 +96,64 @@ class BookingResource(Resource):
         except Exception as e:
             logger.error(f"Error creating booking: {e}")
             db.session.rollback()
-            return make_response(jsonify({"message": "Error creating booking", "status": "fail", "error": str(e)})), 500
+            return make_response(jsonify({"message": "Error creating booking", "status": "fail", "error": str(e)}), 500)
 
-    @jwt_required()
+    @role_required()
     def put(self, booking_id):
         """
         Update an existing booking.
         """
         try:
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
-            
-            if not user:
-                return {"message": "User not found", "status": "fail"}, 404
+            user_id = get_jwt_identity()['id']
 
             booking = Booking.query.filter_by(id=booking_id, passenger_id=user_id).first()
             if not booking:
                 return {"message": "Booking not found", "status": "fail"}, 404
 
             data = request.get_json()
-            booking.schedule_id = data.get('schedule_id', booking.schedule_id)
-            booking.seat_number = data.get('seat_number', booking.seat_number)
+            schedule_id = data.get('schedule_id', booking.schedule_id)
+            seat_number = data.get('seat_number', booking.seat_number)
+            if schedule_id != booking.schedule_id:
+                # Claim the new seat before giving the old one back
+                seat_number = allocate_seat(schedule_id, seat_number, get_hold_store().held_bitmap(schedule_id))
+                release_seat(booking.schedule_id)
+            elif seat_number is None or int(seat_number) != booking.seat_number:
+                # Same schedule: the booking trades seats without touching the seat count
+                seat_number = move_seat(schedule_id, seat_number, get_hold_store().held_bitmap(schedule_id))
+            booking.schedule_id = schedule_id
+            booking.seat_number = seat_number
             booking.payment_status = data.get('payment_status', booking.payment_status)
             booking.ticket_number = data.get('ticket_number', booking.ticket_number)  # Optional
             
             db.session.commit()
-            return jsonify(booking.to_dict()), 200
+            return make_response(jsonify(booking.to_dict(only=self.only)), 200)
+
+        except SeatUnavailable as e:
+            db.session.rollback()
+            return {"message": str(e), "status": "fail"}, 409
+
+        except ValueError:
+            db.session.rollback()
+            return {"message": "Seat number must be an integer", "status": "fail"}, 400
 
         except Exception as e:
             logger.error(f"Error updating booking: {e}")
             db.session.rollback()
             return {"message": "Error updating booking", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required()
     def delete(self, booking_id):
         """
         Delete a booking.
         """
         try:
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
-            
-            if not user:
-                return {"message": "User not found", "status": "fail"}, 404
+            user_id = get_jwt_identity()['id']
 
             booking = Booking.query.filter_by(id=booking_id, passenger_id=user_id).first()
             if not booking:
                 return {"message": "Booking not found", "status": "fail"}, 404
 
+            release_seat(booking.schedule_id)
             db.session.delete(booking)
             db.session.commit()
             return make_response(jsonify({"message": "Booking deleted successfully", "status": "success"}), 200)
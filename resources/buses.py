@@ -2,12 +2,18 @@ from flask import request
 from flask_restful import Resource, reqparse
 from model import db, Bus, Booking, Route, Schedule
 from datetime import datetime, time
+from utils.geo import distance_m, nearest, parse_point
+from utils.pagination import paginate, parse_limit, cursor_headers
+from utils.response_cache import cached_response
+from utils.serializers import serializer_for
 
 class BusResource(Resource):
-    only = ('id', 'driver_id', 'bus_number', 'seat_capacity', 'current_location', 'created_at', 'updated_at')
+    only = ('id', 'driver_id', 'bus_number', 'seat_capacity', 'current_location', 'latitude', 'longitude',
+            'created_at', 'updated_at')
+    @cached_response('buses')
     def get(self):
-        buses = Bus.query.all()
-        return [bus.to_dict(only=self.only) for bus in buses], 200
+        page = paginate(Bus, self.only)
+        return page.items, 200, cursor_headers(page)
     
     def post(self):
         data = request.get_json()
@@ -23,7 +29,9 @@ class BusResource(Resource):
             driver_id = driver_id,
             bus_number = bus_number,
             seat_capacity = seat_capacity,
-            current_location = current_location
+            current_location = current_location,
+            latitude = data.get('latitude'),
+            longitude = data.get('longitude')
         )
         db.session.add(new_bus)
         db.session.commit()
@@ -36,6 +44,19 @@ class BusResource(Resource):
         return {"message": "Bus deleted successfully"}, 200
     
 
+class BusNearbyResource(Resource):
+    @cached_response('buses')
+    def get(self):
+        """
+        The `limit` buses nearest `lat`,`lng` within `radius` meters, nearest first,
+        each with its `distance_m`. Found through the buses' spatial index.
+        """
+        lat, lng, radius = parse_point()
+        serializer = serializer_for(Bus, BusResource.only)
+        return [dict(serializer.row_to_dict(row), distance_m=distance_m(row))
+                for row in nearest(Bus, BusResource.only, lat, lng, radius, parse_limit())], 200
+
+
 class BookingResource(Resource):
     def get(self):
         bookings = Booking.query.all()
@@ -1,71 +1,151 @@
 from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from model import db, User, Product, Order, OrderItem
+from utils.auth import role_required
+from utils.checkout import OutOfStock, ProductNotFound, checkout, parse_cart
+from utils.pagination import parse_limit, decode_cursor, encode_cursor
+from utils.serializers import DATETIME_FORMAT
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class BuyerResource(Resource):
-    @jwt_required()
+    @role_required('buyer')
     def post(self):
         """Place an order for products"""
         data = request.get_json()
         user_id = get_jwt_identity()['id']
 
         try:
-            user = User.query.get(user_id)
-            if user.role != 'buyer':
-                return {"message": "Unauthorized access", "status": "fail"}, 403
-
-            product = Product.query.get(data['product_id'])
-            if not product or product.available_quantity < data['quantity']:
-                return {"message": "Product not available or insufficient quantity", "status": "fail"}, 400
-
-            order = Order(user_id=user_id, total_price=product.price * data['quantity'])
-            db.session.add(order)
-            db.session.commit()
-
-            order_item = OrderItem(order_id=order.id, product_id=product.id, quantity=data['quantity'], unit_price=product.price)
-            db.session.add(order_item)
-            product.available_quantity -= data['quantity']
+            cart = parse_cart([{'product_id': data.get('product_id'), 'quantity': data.get('quantity')}])
+            checkout(user_id, cart)
             db.session.commit()
 
             return {"message": "Order placed successfully", "status": "success"}, 200
+        except (ValueError, OutOfStock, ProductNotFound):
+            db.session.rollback()
+            return {"message": "Product not available or insufficient quantity", "status": "fail"}, 400
         except Exception as e:
+            db.session.rollback()
             logger.error(f"Error placing order: {e}")
             return {"message": "Error placing order", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required('buyer')
     def get(self):
-        """View the buyer's orders"""
+        """
+        View the buyer's orders, one page at a time, with their items.
+        Query params: `limit`, `after` (cursor) and `since` (YYYY-MM-DD HH:MM:SS) to only
+        return orders created or updated since then. For incremental sync, keep the
+        `synced_at` of the first page and send it as `since` next time. It lags a second
+        behind, so orders updated around then can come back twice.
+        """
         user_id = get_jwt_identity()['id']
 
+        since = request.args.get('since')
+        if since:
+            try:
+                since = datetime.strptime(since, DATETIME_FORMAT)
+            except ValueError:
+                return {"message": "Invalid 'since'. Use YYYY-MM-DD HH:MM:SS.", "status": "fail"}, 400
+        # Parsed outside the try below, whose `except Exception` would turn their 400s into 500s
+        limit = parse_limit()
+        after = decode_cursor(request.args['after']) if request.args.get('after') else None
+
         try:
-            user = User.query.get(user_id)
-            if user.role != 'buyer':
-                return {"message": "Unauthorized access", "status": "fail"}, 403
+            # Timestamps are written by the database's CURRENT_TIMESTAMP, which is UTC
+            synced_at = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=1)
+
+            # One query for the page of orders and one for all of their items,
+            # however many orders the buyer has
+            query = (
+                select(Order.id, Order.total_price, Order.status, Order.created_at, Order.updated_at)
+                .where(Order.user_id == user_id)
+                .order_by(Order.id)
+                .limit(limit + 1)
+            )
+            if after is not None:
+                query = query.where(Order.id > after)
+            if since:
+                query = query.where(Order.updated_at >= since)
+
+            orders = db.session.execute(query).all()
+            next_cursor = encode_cursor(orders[limit - 1].id) if len(orders) > limit else None
+            orders = orders[:limit]
+
+            items = defaultdict(list)
+            if orders:
+                item_rows = db.session.execute(
+                    select(OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.unit_price)
+                    .where(OrderItem.order_id.in_([order.id for order in orders]))
+                    .order_by(OrderItem.id)
+                )
+                for item in item_rows:
+                    items[item.order_id].append({"product_id": item.product_id, "quantity": item.quantity, "unit_price": item.unit_price})
 
-            orders = Order.query.filter_by(user_id=user_id).all()
             order_data = []
             for order in orders:
-                items = OrderItem.query.filter_by(order_id=order.id).all()
-                item_data = [{"product_id": item.product_id, "quantity": item.quantity, "unit_price": item.unit_price} for item in items]
                 order_data.append({
                     "order_id": order.id,
                     "total_price": order.total_price,
-                    "items": item_data,
+                    "items": items[order.id],
                     "status": order.status,
-                    "created_at": order.created_at
+                    "created_at": order.created_at.strftime(DATETIME_FORMAT) if order.created_at else None,
+                    "updated_at": order.updated_at.strftime(DATETIME_FORMAT) if order.updated_at else None
                 })
 
-            return {"orders": order_data}, 200
+            return {
+                "orders": order_data,
+                "next_cursor": next_cursor,
+                "synced_at": synced_at.strftime(DATETIME_FORMAT)
+            }, 200
         except Exception as e:
             logger.error(f"Error retrieving orders: {e}")
             return {"message": "Error retrieving orders", "status": "fail", "error": str(e)}, 500
 
 
+class CheckoutResource(Resource):
+    @role_required('buyer')
+    def post(self):
+        """
+        Check out a cart: {"items": [{"product_id": 1, "quantity": 2}, ...]}.
+        Either every item is ordered and its stock taken, or nothing is.
+        """
+        data = request.get_json(silent=True) or {}
+        user_id = get_jwt_identity()['id']
+
+        try:
+            cart = parse_cart(data.get('items'))
+            order, items = checkout(user_id, cart)
+            db.session.commit()
+
+            return {
+                "message": "Order placed successfully",
+                "status": "success",
+                "order": {
+                    "order_id": order.id,
+                    "total_price": order.total_price,
+                    "status": order.status,
+                    "items": [{key: item[key] for key in ('product_id', 'quantity', 'unit_price')} for item in items]
+                }
+            }, 201
+        except ValueError as e:
+            return {"message": str(e), "status": "fail"}, 400
+        except ProductNotFound as e:
+            db.session.rollback()
+            return {"message": str(e), "status": "fail", "product_ids": e.product_ids}, 404
+        except OutOfStock as e:
+            db.session.rollback()
+            return {"message": str(e), "status": "fail", "product_id": e.product_id}, 409
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error checking out: {e}")
+            return {"message": "Error checking out", "status": "fail", "error": str(e)}, 500
+
+
 @jwt_required()
 def delete(self):
     """Cancel an order"""
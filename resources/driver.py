@@ -2,10 +2,10 @@ from flask import request, make_response
 from flask_restful import Resource
 from sqlalchemy.exc import IntegrityError
 from model import db, Driver
+from utils.pagination import paginate, cursor_headers
 import json
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class DriverResource(Resource):
@@ -48,12 +48,12 @@ class DriverResource(Resource):
             db.session.commit()
 
             # Log successful creation
-            logger.info(f"New driver created: {new_driver.to_dict()}")
+            logger.info(f"New driver created: {new_driver.to_dict(only=self.only)}")
 
             return make_response(json.dumps({
                 "message": "Driver created successfully",
                 "status": "success",
-                "driver": new_driver.to_dict()
+                "driver": new_driver.to_dict(only=self.only)
             }), 201, {'Content-Type': 'application/json'})
 
         except IntegrityError as e:
@@ -80,20 +80,20 @@ class DriverResource(Resource):
         """
         Retrieve a specific driver by ID or all drivers if no ID is provided.
         """
+        if not driver_id:
+            # A page of drivers, fetched outside the try below, whose `except Exception` would
+            # turn its 400s for bad paging params into 500s
+            page = paginate(Driver, self.only)
+            return make_response(json.dumps(page.items), 200, {'Content-Type': 'application/json', **cursor_headers(page)})
         try:
-            if driver_id:
-                driver = Driver.query.get(driver_id)
-                if not driver:
-                    return make_response(json.dumps({
-                        "message": "Driver not found",
-                        "status": "fail"
-                    }), 404, {'Content-Type': 'application/json'})
-
-                return make_response(json.dumps(driver.to_dict(only=self.only)), 200, {'Content-Type': 'application/json'})
-            
-            # Retrieve all drivers
-            drivers = Driver.query.all()
-            return make_response(json.dumps([driver.to_dict(only=self.only) for driver in drivers]), 200, {'Content-Type': 'application/json'})
+            driver = Driver.query.get(driver_id)
+            if not driver:
+                return make_response(json.dumps({
+                    "message": "Driver not found",
+                    "status": "fail"
+                }), 404, {'Content-Type': 'application/json'})
+
+            return make_response(json.dumps(driver.to_dict(only=self.only)), 200, {'Content-Type': 'application/json'})
 
         except Exception as e:
             logger.error(f"Error retrieving driver(s): {e}")
@@ -124,12 +124,12 @@ class DriverResource(Resource):
 
             db.session.commit()
 
-            logger.info(f"Driver updated: {driver.to_dict()}")
+            logger.info(f"Driver updated: {driver.to_dict(only=self.only)}")
 
             return make_response(json.dumps({
                 "message": "Driver updated successfully",
                 "status": "success",
-                "driver": driver.to_dict()
+                "driver": driver.to_dict(only=self.only)
             }), 200, {'Content-Type': 'application/json'})
 
         except IntegrityError as e:
@@ -165,7 +165,7 @@ class DriverResource(Resource):
             db.session.delete(driver)
             db.session.commit()
 
-            logger.info(f"Driver deleted: {driver.to_dict()}")
+            logger.info(f"Driver deleted: {driver.to_dict(only=self.only)}")
 
             return make_response(json.dumps({
                 "message": "Driver deleted successfully",
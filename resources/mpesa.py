@@ -1,55 +1,24 @@
-import os
-from dotenv import load_dotenv
-from flask import request, make_response, jsonify
+import hmac
+from flask import current_app, request, make_response, jsonify
 from flask_restful import Resource
-import base64
-import requests
-from datetime import datetime, timedelta
-from model import db, Payment
+from datetime import datetime
+from sqlalchemy import select
+from model import db, Booking, Order, Payment
+from utils.mpesa import MpesaError, get_mpesa_client
+from utils.payment_callbacks import enqueue_callback, parse_callback
+from utils.seats import SeatUnavailable
+from utils.seat_holds import get_hold_store, hold_seat
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import json
 
-# Global variable to store the token and its expiration
-token_info = {
-    'token': None,
-    'expires_at': None
-}
-
-load_dotenv()
-
-def create_token():
-    consumer = os.getenv('CONSUMER_KEY')
-    secret = os.getenv('SECRET_KEY')
-    auth = base64.b64encode(f"{consumer}:{secret}".encode()).decode()
-
-    headers = {
-        'Authorization': f'Basic {auth}'
-    }
-
-    response = requests.get('https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials', headers=headers)
-
-    if response.status_code == 200:
-        data = response.json()
-        token_info['token'] = data.get('access_token')
-        token_info['expires_at'] = datetime.utcnow() + timedelta(seconds=int(data.get('expires_in')))
-        return True, None
-    else:
-        print(f"Failed to create token: {response.text}")
-        return False, response.text
-
-def get_token():
-    if token_info['token'] is None or datetime.utcnow() >= token_info['expires_at']:
-        success, error = create_token()
-        if not success:
-            print(f"Error obtaining token: {error}")
-            return None
-    return token_info['token']
-
 class StkPush(Resource):
     @jwt_required()
     def post(self):
-        token = get_token()
-        if token is None:
+        client = get_mpesa_client()
+        try:
+            client.access_token()
+        except MpesaError as e:
+            print(f"Error obtaining token: {e} {e.body or ''}")
             return make_response(jsonify({'error': 'Failed to get token'}), 500)
 
         request_data = request.get_json()
@@ -73,66 +42,84 @@ class StkPush(Resource):
             print(f"Amount validation error: {e}")
             return make_response(jsonify({'error': 'Invalid amount provided. Amount must be a positive integer.'}), 400)
 
+        # The payment settles an existing booking or order when it names one
+        booking_id, order_id = request_data.get('booking_id'), request_data.get('order_id')
+        if booking_id and db.session.execute(
+                select(Booking.id).where(Booking.id == booking_id, Booking.user_id == user_id['id'])).scalar() is None:
+            return make_response(jsonify({'error': 'Booking not found'}), 404)
+        if order_id and db.session.execute(
+                select(Order.id).where(Order.id == order_id, Order.user_id == user_id['id'])).scalar() is None:
+            return make_response(jsonify({'error': 'Order not found'}), 404)
+
+        # Hold the passenger's seat while they confirm the payment on their phone
+        hold = None
+        if request_data.get('schedule_id'):
+            try:
+                hold = hold_seat(request_data['schedule_id'], user_id['id'], request_data.get('passenger_id'), request_data.get('seat_number'))
+            except SeatUnavailable as e:
+                return make_response(jsonify({'error': str(e)}), 409)
+            except ValueError:
+                return make_response(jsonify({'error': 'Seat number must be an integer'}), 400)
+
         # Format phone number correctly
         phone = phone.lstrip('0')
         phone = f"254{phone}"
 
-        short_code = '174379'
-        passkey = os.getenv('PASSKEY')
-        url = 'https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest'
-
-        now = datetime.now()
-        timestamp = now.strftime('%Y%m%d%H%M%S')
-        password = base64.b64encode(f"{short_code}{passkey}{timestamp}".encode()).decode()
-
-        data = {
-            'BusinessShortCode': short_code,
-            'Password': password,
-            'Timestamp': timestamp,
-            'TransactionType': 'CustomerPayBillOnline',
-            'Amount': amount,
-            'PartyA': phone,
-            'PartyB': short_code,
-            'PhoneNumber': phone,
-            'CallBackURL': 'https://mydomain.com/path',
-            'AccountReference': 'NairobiKonnect',
-            'TransactionDesc': 'Payment for NairobiKonnect services'
-        }
-
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-
         try:
-            response = requests.post(url, json=data, headers=headers)
-            if response.status_code != 200:
-                print(f"STK Push request failed with status code {response.status_code}")
-                print(f"Response content: {response.text}")
+            response_data = client.stk_push(phone, amount, current_app.config['MPESA_CALLBACK_URL'])
+        except MpesaError as e:
+            if hold:
+                get_hold_store().release(hold.hold_id)
+            if e.status_code is not None:
+                print(f"STK Push request failed with status code {e.status_code}")
+                print(f"Response content: {e.body}")
                 return make_response(jsonify({'error': 'Failed to process payment request. Please try again later.'}), 500)
-
-            response_data = response.json()
-            transaction_id = response_data.get('CheckoutRequestID')
-
-            # Save payment to the database
-            try:
-                # Uncomment and modify this block when integrating with your database
-                # new_payment = Payment(
-                #     user_id=user_id,
-                #     amount=amount,
-                #     transaction_id=transaction_id,
-                #     status='pending'  # Assuming status is pending until callback confirms
-                # )
-                # db.session.add(new_payment)
-                # db.session.commit()
-
-                return make_response(jsonify({'message': 'Payment initiated successfully', 'transaction_id': transaction_id}), 200)
-
-            except Exception as e:
-                db.session.rollback()
-                print(f"Database Error: {str(e)}")
-                return make_response(jsonify({'error': f'Failed to save payment or subscription to database: {str(e)}'}), 500)
-
-        except requests.RequestException as e:
             print(f"RequestException: {str(e)}")
             return make_response(jsonify({'error': f'Error with STK Push request: {str(e)}'}), 500)
+
+        transaction_id = response_data.get('CheckoutRequestID')
+        if hold:
+            get_hold_store().bind(hold.hold_id, transaction_id)
+
+        # Save the payment as pending; the M-Pesa callback settles it
+        try:
+            new_payment = Payment(
+                booking_id=booking_id,
+                order_id=order_id,
+                schedule_id=hold.schedule_id if hold else None,
+                amount=amount,
+                transaction_id=transaction_id,
+                status='pending'
+            )
+            db.session.add(new_payment)
+            db.session.commit()
+
+            response_body = {'message': 'Payment initiated successfully', 'transaction_id': transaction_id}
+            if hold:
+                response_body['seat_number'] = hold.seat_number
+                response_body['hold_expires_at'] = datetime.utcfromtimestamp(hold.expires_at).isoformat()
+            return make_response(jsonify(response_body), 200)
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"Database Error: {str(e)}")
+            return make_response(jsonify({'error': f'Failed to save payment or subscription to database: {str(e)}'}), 500)
+
+
+class MpesaCallback(Resource):
+    """
+    Daraja posts STK push results here, with MPESA_CALLBACK_TOKEN as ?token=. They are
+    queued durably and acknowledged at once; utils.payment_callbacks checks each result
+    with Daraja and applies them in batches in the background.
+    """
+    def post(self):
+        token = current_app.config.get('MPESA_CALLBACK_TOKEN')
+        if not token or not hmac.compare_digest(request.args.get('token', ''), token):
+            return make_response(jsonify({'ResultCode': 1, 'ResultDesc': 'Rejected'}), 403)
+        try:
+            parse_callback(request.get_json(silent=True))
+        except ValueError:
+            return make_response(jsonify({'ResultCode': 1, 'ResultDesc': 'Rejected'}), 400)
+
+        enqueue_callback(request.get_data(as_text=True))
+        return make_response(jsonify({'ResultCode': 0, 'ResultDesc': 'Accepted'}), 200)
@@ -1,14 +1,17 @@
 from flask import request
 from flask_restful import Resource, reqparse
 from model import db, Order, OrderItem
+from utils.pagination import paginate, cursor_headers
 
 class OrderResource(Resource):
-    def get(selfc, order_id = None):
+    only = ('id', 'user_id', 'total_price', 'created_at', 'updated_at', 'status')
+
+    def get(self, order_id = None):
         if order_id:
             order = Order.query.get_or_404(order_id)
-            return order.to_dict(), 200
-        orders = Order.query.all()
-        return [order.to_dict() for order in orders], 200
+            return order.to_dict(only=self.only), 200
+        page = paginate(Order, self.only)
+        return page.items, 200, cursor_headers(page)
 
     def post(self):
         parser = reqparse.RequestParser()
@@ -24,7 +27,7 @@ class OrderResource(Resource):
         )
         db.session.add(new_order)
         db.session.commit()
-        return new_order.to_dict(), 201
+        return new_order.to_dict(only=self.only), 201
 
     def put(self, order_id):
         order = Order.query.get_or_404(order_id)
@@ -39,7 +42,7 @@ class OrderResource(Resource):
             order.status = args['status']
 
         db.session.commit()
-        return order.to_dict(), 200
+        return order.to_dict(only=self.only), 200
 
     def delete(self, order_id):
         order = Order.query.get_or_404(order_id)
@@ -49,12 +52,14 @@ class OrderResource(Resource):
     
 
 class OrderItemsResource(Resource):
+    only = ('id', 'order_id', 'product_id', 'quantity', 'unit_price')
+
     def get(self, order_item_id=None):
         if order_item_id:
             order_item = OrderItem.query.get_or_404(order_item_id)
-            return order_item.to_dict(), 200
-        order_items = OrderItem.query.all()
-        return [item.to_dict() for item in order_items], 200
+            return order_item.to_dict(only=self.only), 200
+        page = paginate(OrderItem, self.only)
+        return page.items, 200, cursor_headers(page)
 
     def post(self):
         parser = reqparse.RequestParser()
@@ -72,7 +77,7 @@ class OrderItemsResource(Resource):
         )
         db.session.add(order_item)
         db.session.commit()
-        return order_item.to_dict(), 201
+        return order_item.to_dict(only=self.only), 201
 
     def put(self, order_item_id):
         order_item = OrderItem.query.get_or_404(order_item_id)
@@ -87,7 +92,7 @@ class OrderItemsResource(Resource):
             order_item.unit_price = data['unit_price']
 
         db.session.commit()
-        return order_item.to_dict(), 200
+        return order_item.to_dict(only=self.only), 200
 
     def delete(self, order_item_id):
         order_item = OrderItem.query.get_or_404(order_item_id)
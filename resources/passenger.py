@@ -1,24 +1,20 @@
 from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from flask import request
-from model import db, User, Route, Booking
+from model import db, Route, Booking
+from utils.auth import role_required
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class PassengerResource(Resource):
     
-    @jwt_required()
+    @role_required('passenger')
     def get(self):
         """View available buses and book tickets"""
         user_id = get_jwt_identity()['id']
 
         try:
-            user = User.query.get(user_id)
-            if user.role != 'passenger':
-                return {"message": "Unauthorized access", "status": "fail"}, 403
-
             routes = Route.query.all()
             route_data = []
 
@@ -36,17 +32,13 @@ class PassengerResource(Resource):
             logger.error(f"Error retrieving routes: {e}")
             return {"message": "Error retrieving routes", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required('passenger')
     def post(self):
         """Book a ticket for a route"""
         data = request.get_json()
         user_id = get_jwt_identity()['id']
 
         try:
-            user = User.query.get(user_id)
-            if user.role != 'passenger':
-                return {"message": "Unauthorized access", "status": "fail"}, 403
-
             route = Route.query.get(data['route_id'])
             if not route:
                 return {"message": "Route not found", "status": "fail"}, 404
@@ -73,17 +65,13 @@ class PassengerResource(Resource):
             logger.error(f"Error booking ticket: {e}")
             return {"message": "Error booking ticket", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required('passenger')
     def delete(self):
         """Cancel a booking"""
         data = request.get_json()
         user_id = get_jwt_identity()['id']
 
         try:
-            user = User.query.get(user_id)
-            if user.role != 'passenger':
-                return {"message": "Unauthorized access", "status": "fail"}, 403
-
             booking = Booking.query.filter_by(id=data['booking_id'], passenger_id=user_id).first()
 
             if not booking:
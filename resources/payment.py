@@ -1,43 +1,61 @@
-from flask import jsonify, make_response, request
+import json
+import time
+from flask import Response, current_app, jsonify, make_response, request
 from flask_restful import Resource
+from sqlalchemy import select
 from model import Payment, db  # Ensure db is imported from your model or elsewhere
 from flask_jwt_extended import jwt_required
+from utils.payment_waiters import get_payment_watcher
 
 class PaymentStatusResource(Resource):
+    """
+    Read-only: payments are created by StkPush and settled only by the M-Pesa callback
+    worker once Daraja confirms them, never from a status the client sends.
+    """
     @jwt_required()
     def get(self, transaction_id):
-        # Fetch the payment record by transaction_id
-        payment = Payment.query.filter_by(transaction_id=transaction_id).first()
-        if payment:
-            # If payment is found, return its status
-            return make_response(jsonify({'status': payment.status}), 200)
-        else:
+        status = db.session.execute(select(Payment.status).where(Payment.transaction_id == transaction_id)).scalar()
+        if status is None:
             # If payment is not found, return a 404 error
             return make_response(jsonify({'error': 'Payment not found'}), 404)
-        
-    @jwt_required()
-    def post(self):
-        # Parse the JSON request data
-        data = request.get_json()
-
-        if not data or not all(key in data for key in ('transaction_id', 'amount', 'status')):
-            # Validate that all required fields are present
-            return make_response(jsonify({'error': 'Invalid data'}), 400)
-
-        # Create a new Payment record
-        new_payment = Payment(
-            transaction_id=data['transaction_id'],
-            amount=data['amount'],
-            status=data['status']  # Initially could be 'pending' or similar
-        )
-        
-        try:
-            # Add the new payment record to the session and commit it to the database
-            db.session.add(new_payment)
-            db.session.commit()
-            return make_response(jsonify({'message': 'Payment created successfully'}), 201)
-        except Exception as e:
-            # If there's an error, rollback the session
-            db.session.rollback()
-            return make_response(jsonify({'error': str(e)}), 500)
+        # Give the connection back to the pool before parking the request
+        db.session.close()
+
+        if request.accept_mimetypes.best == 'text/event-stream':
+            return payment_events(transaction_id, status)
+
+        # ?wait=N holds the request for up to N seconds until the payment settles
+        wait = request.args.get('wait', type=float)
+        if status == 'pending' and wait:
+            wait = min(wait, current_app.config.get('PAYMENT_STATUS_MAX_WAIT', 30))
+            status = get_payment_watcher().wait(transaction_id, wait) or status
+        return make_response(jsonify({'status': status}), 200)
+
+
+def payment_events(transaction_id, status):
+    """
+    Server-sent events for one payment: its current status, then its final one when it
+    settles. Comments keep idle proxies from dropping the stream, and it ends after
+    PAYMENT_STATUS_STREAM_TIMEOUT seconds so a browser's EventSource reconnects.
+    """
+    watcher = get_payment_watcher()
+    heartbeat = current_app.config.get('PAYMENT_STATUS_HEARTBEAT', 15)
+    deadline = time.monotonic() + current_app.config.get('PAYMENT_STATUS_STREAM_TIMEOUT', 300)
+
+    def event(status):
+        return f"event: status\ndata: {json.dumps({'status': status})}\n\n"
+
+    def stream(status):
+        yield "retry: 3000\n\n"
+        yield event(status)
+        while status == 'pending' and time.monotonic() < deadline:
+            settled = watcher.wait(transaction_id, min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if settled:
+                status = settled
+                yield event(status)
+            else:
+                yield ": keepalive\n\n"
+
+    return Response(stream(status), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
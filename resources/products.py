@@ -2,10 +2,15 @@ from flask import request, Response
 from flask_restful import Resource
 import json
 from model import Product, Stall, db
+from utils.pagination import paginate, parse_limit, cursor_headers, stream, stream_format
+from utils.product_search import SEARCH_FIELDS, search_products, search_terms
+from utils.response_cache import cached_response
+from utils.serializers import serializer_for
 
 class ProductResource(Resource):
     only = ('id', 'name', 'description', 'price', 'available_quantity', 'sold_quantity', 'image_url', 'stall_id', 'created_at', 'location')
 
+    @cached_response('products', 'stalls')
     def get(self, stall_name=None):
         if stall_name:
             # Fetch the stall by its name
@@ -13,19 +18,19 @@ class ProductResource(Resource):
             if not stall:
                 return Response(json.dumps({'message': f"No stall found with the name '{stall_name}'."}), status=404, mimetype='application/json')
             
-            # Fetch products by stall_id
-            products = Product.query.filter_by(stall_id=stall.id).all()
-            products_list = [product.to_dict(only=self.only) for product in products]
-            
-            # Convert to JSON and return response
-            return Response(json.dumps(products_list), status=200, mimetype='application/json')
+            criteria = (Product.stall_id == stall.id,)
         else:
-            # Fetch all products if no stall_name is provided
-            products = Product.query.all()
-            products_list = [product.to_dict(only=self.only) for product in products]
-            
-            # Convert to JSON and return response
-            return Response(json.dumps(products_list), status=200, mimetype='application/json')
+            # All products if no stall_name is provided
+            criteria = ()
+
+        fmt = stream_format()
+        if fmt:
+            # Every product, streamed instead of paged
+            return stream(Product, self.only, *criteria, fmt=fmt)
+        # A page of products, encoded straight to JSON bytes
+        page = paginate(Product, self.only, *criteria, as_json=True)
+        return Response(page.items, status=200, mimetype='application/json', headers=cursor_headers(page))
+
     def post(self):
         data = request.get_json()
         stall = Stall.query.filter_by(stall_name=data['shop_name']).first()
@@ -42,7 +47,7 @@ class ProductResource(Resource):
         )
         db.session.add(new_product)
         db.session.commit()
-        return Response(json.dumps(new_product.to_dict()), status=201, mimetype='application/json')
+        return Response(json.dumps(new_product.to_dict(only=self.only)), status=201, mimetype='application/json')
 
     def put(self, product_id):
         product = Product.query.get_or_404(product_id)
@@ -58,10 +63,30 @@ class ProductResource(Resource):
             product.stall_id = stall.id
         
         db.session.commit()
-        return Response(json.dumps(product.to_dict()), status=200, mimetype='application/json')
+        return Response(json.dumps(product.to_dict(only=self.only)), status=200, mimetype='application/json')
 
     def delete(self, product_id):
         product = Product.query.get_or_404(product_id)
         db.session.delete(product)
         db.session.commit()
         return Response(json.dumps({'message': 'Product deleted'}), status=200, mimetype='application/json')
+
+
+class ProductSearchResource(Resource):
+    @cached_response('products')
+    def get(self):
+        """
+        Products matching every word in `q`, the last one as a prefix so results follow
+        type-ahead, in name, description or stall name. Ranked by relevance and then
+        sales, up to `limit` of them.
+        """
+        q = request.args.get('q', '')
+        if not search_terms(q):
+            return {"message": "'q' must contain a word to search for", "status": "fail"}, 400
+        rows = search_products(q, parse_limit())
+        return Response(serializer_for(Product, SEARCH_FIELDS).rows_to_json(rows), status=200, mimetype='application/json')
+
+
+# Compile the list serializer at import so the first request doesn't pay for it
+serializer_for(Product, ProductResource.only)
+serializer_for(Product, SEARCH_FIELDS)
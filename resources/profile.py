@@ -1,19 +1,19 @@
 from flask import request, jsonify
 from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from model import db, User
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.auth import invalidate_user, role_required
+from utils.passwords import PasswordHasherBusy, get_password_hasher
 import logging
 import os
 from werkzeug.utils import secure_filename
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 UPLOADS_DEFAULT_DEST = 'uploads'
 
 class ProfileResource(Resource):
-    @jwt_required()
+    @role_required()
     def get(self):
         """View user profile"""
         user_id = get_jwt_identity()['id']
@@ -28,7 +28,7 @@ class ProfileResource(Resource):
             logger.error(f"Error retrieving profile: {e}")
             return {"message": "Error retrieving profile", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required()
     def put(self):
         """Update user profile"""
         user_id = get_jwt_identity()['id']
@@ -43,12 +43,13 @@ class ProfileResource(Resource):
             user.email = data.get('email', user.email)
             
             db.session.commit()
+            invalidate_user(user_id)
             return {"message": "Profile updated successfully", "status": "success"}, 200
         except Exception as e:
             logger.error(f"Error updating profile: {e}")
             return {"message": "Error updating profile", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required()
     def post(self):
         """Change password"""
         user_id = get_jwt_identity()['id']
@@ -59,17 +60,21 @@ class ProfileResource(Resource):
             if not user:
                 return {"message": "User not found", "status": "fail"}, 404
 
-            if not check_password_hash(user.password_hash, data.get('current_password')):
+            hasher = get_password_hasher()
+            valid, _ = hasher.verify(user.password_hash, data.get('current_password'))
+            if not valid:
                 return {"message": "Current password is incorrect", "status": "fail"}, 400
 
-            user.password_hash = generate_password_hash(data.get('new_password'))
+            user.password_hash = hasher.hash(data.get('new_password'))
             db.session.commit()
             return {"message": "Password changed successfully", "status": "success"}, 200
+        except PasswordHasherBusy as e:
+            return {"message": str(e), "status": "fail"}, 503
         except Exception as e:
             logger.error(f"Error changing password: {e}")
             return {"message": "Error changing password", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required()
     def post(self, file=None):
         """Upload profile picture"""
         user_id = get_jwt_identity()['id']
@@ -97,7 +102,7 @@ class ProfileResource(Resource):
             logger.error(f"Error uploading profile picture: {e}")
             return {"message": "Error uploading profile picture", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required()
     def delete(self):
         """Delete user profile"""
         user_id = get_jwt_identity()['id']
@@ -113,6 +118,7 @@ class ProfileResource(Resource):
 
             db.session.delete(user)
             db.session.commit()
+            invalidate_user(user_id)
             
             return {"message": "Profile deleted successfully", "status": "success"}, 200
         except Exception as e:
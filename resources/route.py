@@ -1,16 +1,19 @@
 from flask import request, jsonify
 from flask_restful import Resource
 from model import Route, db
+from utils.pagination import paginate, cursor_headers
+from utils.response_cache import cached_response
 
 class RouteResource(Resource):
     only = ('id', 'origin', 'destination','description', 'created_at', 'updated_at',)
+    @cached_response('routes')
     def get(self, route_id=None):
         if route_id:
             route = Route.query.get_or_404(route_id)
-            return route.to_dict(), 200
+            return route.to_dict(only=self.only), 200
         else:
-            routes = Route.query.all()
-            return [route.to_dict(only=self.only) for route in routes], 200
+            page = paginate(Route, self.only)
+            return page.items, 200, cursor_headers(page)
 
     def post(self):
         data = request.get_json()
@@ -34,7 +37,7 @@ class RouteResource(Resource):
         db.session.add(new_route)
         db.session.commit()
         
-        return jsonify(new_route.to_dict()), 201
+        return jsonify(new_route.to_dict(only=self.only)), 201
 
 
     def put(self, route_id):
@@ -44,7 +47,7 @@ class RouteResource(Resource):
         route.destination = data['destination']
         route.description = data.get('description')
         db.session.commit()
-        return route.to_dict(), 200
+        return route.to_dict(only=self.only), 200
 
     def delete(self, route_id):
         route = Route.query.get_or_404(route_id)
@@ -1,16 +1,20 @@
-from flask import request
+from flask import request, Response
 from flask_restful import Resource
 from model import Schedule, db
+from utils.pagination import paginate, cursor_headers
+from utils.response_cache import cached_response
+from utils.serializers import serializer_for
 
 class ScheduleResource(Resource):
     only = ('id', 'bus_id', 'route_id', 'departure_time', 'arrival_time', 'date', 'available_seats', 'created_at', 'updated_at')
+    @cached_response('schedules')
     def get(self, schedule_id=None):
         if schedule_id:
             schedule = Schedule.query.get_or_404(schedule_id)
-            return schedule.to_dict(), 200
+            return schedule.to_dict(only=self.only), 200
         else:
-            schedules = Schedule.query.all()
-            return [schedule.to_dict(only=self.only) for schedule in schedules], 200
+            page = paginate(Schedule, self.only, as_json=True)
+            return Response(page.items, status=200, mimetype='application/json', headers=cursor_headers(page))
 
     def post(self):
         data = request.get_json()
@@ -24,7 +28,7 @@ class ScheduleResource(Resource):
         )
         db.session.add(new_schedule)
         db.session.commit()
-        return new_schedule.to_dict(), 201
+        return new_schedule.to_dict(only=self.only), 201
 
     def put(self, schedule_id):
         schedule = Schedule.query.get_or_404(schedule_id)
@@ -36,10 +40,14 @@ class ScheduleResource(Resource):
         schedule.date = data['date']
         schedule.available_seats = data['available_seats']
         db.session.commit()
-        return schedule.to_dict(), 200
+        return schedule.to_dict(only=self.only), 200
 
     def delete(self, schedule_id):
         schedule = Schedule.query.get_or_404(schedule_id)
         db.session.delete(schedule)
         db.session.commit()
         return {'message': 'Schedule deleted'}, 200
+
+
+# Compile the list serializer at import so the first request doesn't pay for it
+serializer_for(Schedule, ScheduleResource.only)
@@ -1,24 +1,24 @@
 from flask import request
 from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from model import db, User, Product, OrderItem, Order
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import func, select
+from datetime import datetime, timedelta
+from model import db, Product, OrderItem, Order, Seller, Stall
+from utils.auth import role_required
+from utils.pagination import parse_limit, decode_cursor, encode_cursor
+from utils.serializers import DATETIME_FORMAT
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class SellerResource(Resource):
-    @jwt_required()
+    @role_required('seller')
     def post(self):
         """Add or update product stock"""
         data = request.get_json()
         user_id = get_jwt_identity()['id']
 
         try:
-            user = User.query.get(user_id)
-            if user.role != 'seller':
-                return {"message": "Unauthorized access", "status": "fail"}, 403
-
             product = Product.query.filter_by(name=data['name'], artisan_id=user_id).first()
 
             if product:
@@ -45,48 +45,75 @@ class SellerResource(Resource):
             logger.error(f"Error adding/updating stock: {e}")
             return {"message": "Error adding/updating stock", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required('seller')
     def get(self):
-        """View orders for the seller's products"""
+        """
+        View orders for the seller's products, one page at a time.
+        Query params: `limit`, `after` (cursor), `start_date` and `end_date` (YYYY-MM-DD, inclusive).
+        `total_amount` only counts the items sold from this seller's stalls.
+        """
         user_id = get_jwt_identity()['id']
 
         try:
-            user = User.query.get(user_id)
-            if user.role != 'seller':
-                return {"message": "Unauthorized access", "status": "fail"}, 403
-
-            products = Product.query.filter_by(artisan_id=user_id).all()
-            product_ids = [product.id for product in products]
-            order_items = OrderItem.query.filter(OrderItem.product_id.in_(product_ids)).all()
-            order_ids = [item.order_id for item in order_items]
-            orders = Order.query.filter(Order.id.in_(order_ids)).all()
-
-            order_data = []
-            for order in orders:
-                total_amount = sum(item.unit_price * item.quantity for item in order_items if item.order_id == order.id)
-                order_data.append({
-                    "order_id": order.id,
-                    "total_amount": total_amount,
-                    "status": order.status,
-                    "created_at": order.created_at
-                })
+            start_date = request.args.get('start_date')
+            end_date = request.args.get('end_date')
+            start_date = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+            end_date = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+        except ValueError:
+            return {"message": "Invalid date format. Use YYYY-MM-DD.", "status": "fail"}, 400
+        # Parsed outside the try below, whose `except Exception` would turn their 400s into 500s
+        limit = parse_limit()
+        after = decode_cursor(request.args['after']) if request.args.get('after') else None
 
-            return {"orders": order_data}, 200
+        try:
+            # Sum each order's items in the database instead of rescanning them per order in Python
+            query = (
+                select(
+                    Order.id,
+                    func.sum(OrderItem.unit_price * OrderItem.quantity).label('total_amount'),
+                    Order.status,
+                    Order.created_at,
+                )
+                .select_from(OrderItem)
+                .join(Product, Product.id == OrderItem.product_id)
+                .join(Stall, Stall.id == Product.stall_id)
+                .join(Seller, Seller.id == Stall.seller_id)
+                .join(Order, Order.id == OrderItem.order_id)
+                .where(Seller.user_id == user_id)
+                .group_by(Order.id, Order.status, Order.created_at)
+                .order_by(Order.id)
+                .limit(limit + 1)
+            )
+            if after is not None:
+                query = query.where(Order.id > after)
+            if start_date:
+                query = query.where(Order.created_at >= start_date)
+            if end_date:
+                query = query.where(Order.created_at < end_date)
+
+            rows = db.session.execute(query).all()
+            next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+
+            order_data = [{
+                "order_id": row.id,
+                # Prices are floats, so the sum is rounded back to cents
+                "total_amount": round(row.total_amount, 2),
+                "status": row.status,
+                "created_at": row.created_at.strftime(DATETIME_FORMAT) if row.created_at else None
+            } for row in rows[:limit]]
+
+            return {"orders": order_data, "next_cursor": next_cursor}, 200
         except Exception as e:
             logger.error(f"Error retrieving orders: {e}")
             return {"message": "Error retrieving orders", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required('seller')
     def delete(self):
         """Delete a product"""
         data = request.get_json()
         user_id = get_jwt_identity()['id']
 
         try:
-            user = User.query.get(user_id)
-            if user.role != 'seller':
-                return {"message": "Unauthorized access", "status": "fail"}, 403
-
             product = Product.query.filter_by(id=data['product_id'], artisan_id=user_id).first()
 
             if not product:
@@ -1,17 +1,22 @@
 from flask import request
 from flask_restful import Resource
 from model import Stall, db
+from utils.geo import distance_m, nearest, parse_point
+from utils.pagination import paginate, parse_limit, cursor_headers
+from utils.response_cache import cached_response
+from utils.serializers import serializer_for
 
 class StallResource(Resource):
     
-    only = ('id', 'stall_name', 'description', 'image_url', 'created_at', 'location',)
+    only = ('id', 'stall_name', 'description', 'image_url', 'created_at', 'location', 'latitude', 'longitude')
+    @cached_response('stalls')
     def get(self, stall_id=None):
         if stall_id:
             stall = Stall.query.get_or_404(stall_id)
-            return stall.to_dict(), 200
+            return stall.to_dict(only=self.only), 200
         else:
-            stalls = Stall.query.all()
-            return [stall.to_dict(only=self.only) for stall in stalls], 200
+            page = paginate(Stall, self.only)
+            return page.items, 200, cursor_headers(page)
 
     def post(self):
         data = request.get_json()
@@ -20,11 +25,13 @@ class StallResource(Resource):
             stall_name=data['stall_name'],
             description=data.get('description'),
             location=data['location'],
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude'),
             image_url=data['image_url']
         )
         db.session.add(new_stall)
         db.session.commit()
-        return new_stall.to_dict(), 201
+        return new_stall.to_dict(only=self.only), 201
 
     def put(self, stall_id):
         stall = Stall.query.get_or_404(stall_id)
@@ -32,12 +39,29 @@ class StallResource(Resource):
         stall.stall_name = data['stall_name']
         stall.description = data.get('description')
         stall.location = data['location']
+        # Coordinates left out of the body stay as they are
+        for field in ('latitude', 'longitude'):
+            if field in data:
+                setattr(stall, field, data[field])
         stall.image_url = data['image_url']
         db.session.commit()
-        return stall.to_dict(), 200
+        return stall.to_dict(only=self.only), 200
 
     def delete(self, stall_id):
         stall = Stall.query.get_or_404(stall_id)
         db.session.delete(stall)
         db.session.commit()
         return {'message': 'Stall deleted'}, 200
+
+
+class StallNearbyResource(Resource):
+    @cached_response('stalls')
+    def get(self):
+        """
+        The `limit` stalls nearest `lat`,`lng` within `radius` meters, nearest first,
+        each with its `distance_m`. Found through the stalls' spatial index.
+        """
+        lat, lng, radius = parse_point()
+        serializer = serializer_for(Stall, StallResource.only)
+        return [dict(serializer.row_to_dict(row), distance_m=distance_m(row))
+                for row in nearest(Stall, StallResource.only, lat, lng, radius, parse_limit())], 200
@@ -1,10 +1,44 @@
-from flask import request, jsonify, make_response
+from flask import request, jsonify, make_response, Response, stream_with_context
 from flask_restful import Resource
+from itertools import chain, groupby
+from sqlalchemy import select
 from model import db, Driver, Route, Ticket
 import json
+from utils.pagination import paginate, stream, stream_format
+
+
+def stream_manifest(rows):
+    """
+    Yield the driver manifest as JSON, one route at a time. `rows` come from the
+    route/ticket join ordered by route, so each route's tickets are contiguous.
+    """
+    yield '{"routes": ['
+    first = True
+    for route_id, route_rows in groupby(rows, key=lambda row: row.route_id):
+        route_rows = list(route_rows)
+        tickets_list = [{
+            "ticket_id": row.ticket_id,
+            "passenger_id": row.passenger_id,
+            "seat_number": row.seat_number,
+        } for row in route_rows if row.ticket_id is not None]
+        # Routes without tickets are left out, as before
+        if not tickets_list:
+            continue
+
+        yield ('' if first else ', ') + json.dumps({
+            "route_id": route_id,
+            "origin": route_rows[0].origin,
+            "destination": route_rows[0].destination,
+            "booked_seats": len(tickets_list),
+            "tickets": tickets_list,
+        })
+        first = False
+    yield ']}'
+
 
 class TicketResource(Resource):
-    
+    only = ('id', 'passenger_id', 'seat_number', 'route_id')
+
     def get(self, driver_id=None, ticket_id=None):
         """
         Get tickets:
@@ -12,6 +46,14 @@ class TicketResource(Resource):
         - If `ticket_id` is provided, get details for a specific ticket.
         - If neither is provided, get all tickets.
         """
+        fmt = stream_format()
+        if fmt and not (driver_id or ticket_id):
+            # Every ticket, streamed instead of paged
+            return stream(Ticket, self.only, fmt=fmt, rename={'id': 'ticket_id'},
+                          envelope=('{"tickets": [', '], "next_cursor": null}'))
+        if not (driver_id or ticket_id):
+            # Paged before the try below, whose `except Exception` would turn its 400s for bad paging params into 500s
+            page = paginate(Ticket, self.only)
         try:
             if ticket_id:
                 # Fetch a specific ticket
@@ -31,53 +73,42 @@ class TicketResource(Resource):
                 return make_response(json.dumps(ticket_data), 200, {'Content-Type': 'application/json'})
 
             elif driver_id:
-                # Fetch all tickets for the routes assigned to a specific driver
-                routes = Route.query.filter_by(driver_id=driver_id).all()
-                if not routes:
+                # One query for every route of the driver and all of their tickets;
+                # the outer join keeps routes without tickets so we can tell them from no routes
+                query = (
+                    select(
+                        Route.id.label('route_id'), Route.origin, Route.destination,
+                        Ticket.id.label('ticket_id'), Ticket.passenger_id, Ticket.seat_number,
+                    )
+                    .outerjoin(Ticket, Ticket.route_id == Route.id)
+                    .where(Route.driver_id == driver_id)
+                    .order_by(Route.id, Ticket.id)
+                    .execution_options(yield_per=500)
+                )
+                rows = db.session.execute(query)
+                first_row = next(rows, None)
+                if first_row is None:
                     return make_response(json.dumps({
                         "message": "No routes found for this driver",
                         "status": "fail"
                     }), 404, {'Content-Type': 'application/json'})
 
-                tickets_data = []
-                for route in routes:
-                    tickets = Ticket.query.filter_by(route_id=route.id).all()
-                    if tickets:
-                        tickets_list = [{
-                            "ticket_id": ticket.id,
-                            "passenger_id": ticket.passenger_id,
-                            "seat_number": ticket.seat_number,
-                        } for ticket in tickets]
-
-                        tickets_data.append({
-                            "route_id": route.id,
-                            "start_location": route.start_location,
-                            "end_location": route.end_location,
-                            "departure_time": route.departure_time,
-                            "arrival_time": route.arrival_time,
-                            "booked_seats": len(tickets),
-                            "tickets": tickets_list,
-                        })
-
-                return make_response(json.dumps({"routes": tickets_data}), 200, {'Content-Type': 'application/json'})
+                return Response(stream_with_context(stream_manifest(chain([first_row], rows))), status=200, mimetype='application/json')
 
             else:
-                # Fetch all tickets if no driver_id or ticket_id is provided
-                tickets = Ticket.query.all()
-                if not tickets:
+                # The page of tickets fetched above, when no driver_id or ticket_id is provided
+                if not page.items and not request.args.get('after'):
                     return make_response(json.dumps({
                         "message": "No tickets found",
                         "status": "fail"
                     }), 404, {'Content-Type': 'application/json'})
 
                 tickets_list = [{
-                    "ticket_id": ticket.id,
-                    "passenger_id": ticket.passenger_id,
-                    "seat_number": ticket.seat_number,
-                    "route_id": ticket.route_id,
-                } for ticket in tickets]
+                    ("ticket_id" if field == 'id' else field): value
+                    for field, value in ticket.items()
+                } for ticket in page.items]
 
-                return make_response(json.dumps({"tickets": tickets_list}), 200, {'Content-Type': 'application/json'})
+                return make_response(json.dumps({"tickets": tickets_list, "next_cursor": page.next_cursor}), 200, {'Content-Type': 'application/json'})
 
         except Exception as e:
             return make_response(json.dumps({
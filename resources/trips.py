@@ -0,0 +1,54 @@
+from flask import request
+from flask_restful import Resource
+from sqlalchemy import select
+from datetime import datetime
+from model import db, Bus, Route, Schedule
+from utils.serializers import TIME_FORMAT
+
+class TripSearchResource(Resource):
+    def get(self):
+        """
+        Departures from `origin` to `destination` on `date`, earliest first, with the
+        seats still available on each. Answered by one query that walks the
+        routes (origin, destination) index into the schedules (route_id, date,
+        departure_time) index.
+        """
+        origin = request.args.get('origin', '').strip()
+        destination = request.args.get('destination', '').strip()
+        if not origin or not destination or not request.args.get('date'):
+            return {"message": "origin, destination and date are required", "status": "fail"}, 400
+
+        try:
+            travel_date = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        except ValueError:
+            return {"message": "Invalid date format. Use YYYY-MM-DD.", "status": "fail"}, 400
+
+        query = (
+            select(
+                Schedule.id, Schedule.route_id, Schedule.bus_id, Schedule.departure_time,
+                Schedule.arrival_time, Schedule.available_seats, Bus.bus_number, Bus.seat_capacity,
+            )
+            .select_from(Route)
+            .join(Schedule, Schedule.route_id == Route.id)
+            .outerjoin(Bus, Bus.id == Schedule.bus_id)
+            .where(Route.origin == origin, Route.destination == destination, Schedule.date == travel_date)
+            .order_by(Schedule.departure_time, Schedule.id)
+        )
+
+        trips = [{
+            "schedule_id": row.id,
+            "route_id": row.route_id,
+            "bus_id": row.bus_id,
+            "bus_number": row.bus_number,
+            "departure_time": row.departure_time.strftime(TIME_FORMAT),
+            "arrival_time": row.arrival_time.strftime(TIME_FORMAT),
+            "available_seats": row.available_seats,
+            "seat_capacity": row.seat_capacity,
+        } for row in db.session.execute(query)]
+
+        return {
+            "origin": origin,
+            "destination": destination,
+            "date": travel_date.isoformat(),
+            "trips": trips,
+        }, 200
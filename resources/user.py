@@ -1,14 +1,14 @@
 from flask import request, jsonify
 from flask_restful import Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
 from model import db, User
+from utils.auth import invalidate_user, role_required
 import logging
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class UserResource(Resource):
-    @jwt_required()
+    @role_required()
     def get(self):
         """View user profile"""
         user_id = get_jwt_identity()['id']
@@ -23,7 +23,7 @@ class UserResource(Resource):
             logger.error(f"Error retrieving profile: {e}")
             return {"message": "Error retrieving profile", "status": "fail", "error": str(e)}, 500
 
-    @jwt_required()
+    @role_required()
     def put(self):
         """Update user profile"""
         user_id = get_jwt_identity()['id']
@@ -41,6 +41,7 @@ class UserResource(Resource):
                 user.password = data['password']  # Ensure you hash the password
 
             db.session.commit()
+            invalidate_user(user_id)
 
             return {"message": "Profile updated successfully", "status": "success"}, 200
         except Exception as e:
@@ -1,558 +1,385 @@
-from datetime import datetime, time, date
+"""
+Synthetic data for development and capacity tests. Every row is derived from --seed,
+so a given scale and seed always produce the same database, and the row counts grow
+linearly with --scale (1 is about 1.35M rows). Rows are written with executemany in
+chunks of --chunk, one commit per table.
+
+    DATABASE_URI=sqlite:///capacity.db python seed.py --scale 5 --seed 42
+
+Every user can log in as <role><n>@example.com (e.g. passenger1@example.com) with
+the password "password123". Seed an empty database; ids are assigned here, not by it.
+"""
+import argparse
 import random
-import string
-from sqlalchemy.exc import IntegrityError
-from werkzeug.security import generate_password_hash
-from app import db, app
-from faker import Faker
+import sys
+import time as clock
+from array import array
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app
+from sqlalchemy import func, insert, select, text, update
+
 from model import (
-    User, Driver, Bus, Route, Schedule, Booking, Product, Order, OrderItem,
+    db, User, Driver, Bus, Route, Schedule, Booking, Product, Order, OrderItem,
     Comment, Review, Payment, Seller, Passenger, Stall, Ticket
 )
-from resources import user
-
-faker = Faker()
-
-# Helper function to generate a random ticket number
-def generate_ticket_number(length=8):
-    letters_and_digits = string.ascii_uppercase + string.digits
-    return ''.join(random.choice(letters_and_digits) for i in range(length))
-
-# Seed Users
-def seed_users():
-    users = [
-        User(
-            username='john_doe',
-            email='john.doe@example.com',
-            password_hash=generate_password_hash('password123'),
-            role='admin',
-            profile_picture='profile_john_doe.jpg',
-            is_verified=True,
-            is_active=True
-        ),
-        User(
-            username='jane_smith',
-            email='jane.smith@example.com',
-            password_hash=generate_password_hash('securepassword'),
-            role='seller',
-            profile_picture='profile_jane_smith.jpg',
-            is_verified=True,
-            is_active=True
-        ),
-        User(
-            username='michael_brown',
-            email='michael.brown@example.com',
-            password_hash=generate_password_hash('mypass456'),
-            role='customer',
-            profile_picture='profile_michael_brown.jpg',
-            is_verified=False,
-            is_active=True
-        ),
-        User(
-            username='emily_white',
-            email='emily.white@example.com',
-            password_hash=generate_password_hash('emilypass789'),
-            role='customer',
-            profile_picture='profile_emily_white.jpg',
-            is_verified=True,
-            is_active=True
-        ),
-        User(
-            username='alice_green',
-            email='alice.green@example.com',
-            password_hash=generate_password_hash('alicepass101'),
-            role='seller',
-            profile_picture='profile_alice_green.jpg',
-            is_verified=True,
-            is_active=False
-        )
-    ]
-
+from utils.passwords import hash_password
+
+# Rows at scale 1. Bookings follow from `occupancy`, and order items and payments
+# from the bookings and orders.
+COUNTS = {
+    'users': 20000,
+    'drivers': 200,
+    'buses': 200,
+    'routes': 120,
+    'schedules': 24000,
+    'stalls': 1000,
+    'products': 20000,
+    'orders': 100000,
+    'reviews': 20000,
+    'comments': 20000,
+    'tickets': 10000,
+}
+
+# In the order they are written. A table needs its parents seeded with it or before.
+TABLES = ('users', 'drivers', 'buses', 'routes', 'schedules', 'bookings', 'stalls', 'products', 'orders',
+          'reviews', 'comments', 'tickets')
+
+START = date(2024, 8, 1)
+DEFAULT_PASSWORD = 'password123'
+
+PLACES = [
+    'CBD', 'Westlands', 'Kilimani', 'Kibera', "Lang'ata", 'Karen', 'Ngong', 'Rongai', 'Embakasi', 'Thika',
+    'Gikambura', 'Mombasa Road', 'JKIA', 'Ruaka', 'Muthaiga', 'Kasarani', 'Kikuyu', 'Ruiru', 'Juja',
+    'Syokimau', 'Kitengela', 'Eastleigh', 'Githurai', 'Kawangware',
+]
+MARKETS = ['Gikomba', 'Toi Market', 'Wakulima', 'Kariokor', 'City Market', 'Muthurwa', 'Ngara', 'Kangemi']
+GOODS = ['Shirt', 'Dress', 'Jeans', 'Sukuma Wiki', 'Sufuria', 'Kikoi', 'Kiondo', 'Sandals', 'Radio', 'Phone Cover',
+         'Maize Flour', 'Mangoes', 'Charcoal Jiko', 'Kanga', 'School Bag', 'Thermos']
+NAMES = ['Wanjiku', 'Otieno', 'Achieng', 'Kamau', 'Njeri', 'Mutua', 'Chebet', 'Kiprop', 'Akinyi', 'Mwangi',
+         'Wafula', 'Nyambura', 'Omondi', 'Jeptoo', 'Karanja', 'Moraa']
+REMARKS = ['Great value.', 'Arrived on time.', 'Would buy again.', 'Not as described.', 'Friendly seller.',
+           'Too expensive.', 'Good quality for the price.', 'Average.']
+# Approximate (latitude, longitude) of the markets and places above
+COORDINATES = {
+    'CBD': (-1.2864, 36.8172), 'Westlands': (-1.2676, 36.8108), 'Kilimani': (-1.2921, 36.7836),
+    'Kibera': (-1.3133, 36.7870), "Lang'ata": (-1.3467, 36.7563), 'Karen': (-1.3197, 36.7073),
+    'Ngong': (-1.3527, 36.6699), 'Rongai': (-1.3961, 36.7440), 'Embakasi': (-1.3190, 36.8990),
+    'Thika': (-1.0333, 37.0693), 'Gikambura': (-1.2460, 36.6480), 'Mombasa Road': (-1.3200, 36.8400),
+    'JKIA': (-1.3192, 36.9278), 'Ruaka': (-1.2090, 36.7780), 'Muthaiga': (-1.2480, 36.8350),
+    'Kasarani': (-1.2210, 36.8970), 'Kikuyu': (-1.2460, 36.6630), 'Ruiru': (-1.1460, 36.9610),
+    'Juja': (-1.1020, 37.0140), 'Syokimau': (-1.3590, 36.9380), 'Kitengela': (-1.4760, 36.9610),
+    'Eastleigh': (-1.2730, 36.8480), 'Githurai': (-1.2000, 36.9150), 'Kawangware': (-1.2830, 36.7500),
+    'Gikomba': (-1.2833, 36.8394), 'Toi Market': (-1.3110, 36.7870), 'Wakulima': (-1.2889, 36.8311),
+    'Kariokor': (-1.2760, 36.8340), 'City Market': (-1.2833, 36.8195), 'Muthurwa': (-1.2872, 36.8350),
+    'Ngara': (-1.2740, 36.8240), 'Kangemi': (-1.2660, 36.7480),
+}
+BUS_SIZES = [14, 25, 33, 51, 62]
+BCRYPT_ALPHABET = './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def plan(scale=1.0, **counts):
+    """Row counts for `scale`; keyword arguments override entries of COUNTS"""
+    planned = {table: max(1, round(count * scale)) for table, count in COUNTS.items()}
+    planned.update(counts)
+    # Every stall has its own seller account, and one user in 2000 is an admin
+    planned['sellers'] = planned['stalls']
+    planned['admins'] = max(1, planned['users'] // 2000)
+    rest = max(2, planned['users'] - planned['sellers'] - planned['admins'])
+    planned['passengers'] = rest * 7 // 10
+    planned['buyers'] = rest - planned['passengers']
+    planned['users'] = planned['admins'] + planned['sellers'] + planned['passengers'] + planned['buyers']
+    return planned
+
+
+class _Loader:
+    """Buffers rows per table and writes each table's rows with one executemany per chunk"""
+
+    def __init__(self, chunk):
+        self.chunk = chunk
+        self.pending = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        rows = self.pending.setdefault(model.__table__, [])
+        rows.append(row)
+        if len(rows) >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        # Tables are written in the order their first row arrived, so parents go first
+        for table, rows in self.pending.items():
+            if rows:
+                db.session.execute(insert(table), rows)
+                self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+                rows.clear()
+
+    def commit(self):
+        self.flush()
+        self.pending = {}
+        db.session.commit()
+
+
+class _Generator:
+    """
+    Writes the tables for one plan. Ids are assigned in order from 1, so children
+    can point at their parents without reading them back, and the state kept
+    between tables is a few arrays sized by the smaller tables.
+    """
+
+    def __init__(self, counts, rng, loader, days, occupancy):
+        self.counts = counts
+        self.rng = rng
+        self.loader = loader
+        self.days = days
+        self.occupancy = occupancy
+        self.payment_id = 0
+        # First user id of each role; users are numbered admins, sellers, passengers, buyers
+        self.first_user = {'admin': 1}
+        self.first_user['seller'] = self.first_user['admin'] + counts['admins']
+        self.first_user['passenger'] = self.first_user['seller'] + counts['sellers']
+        self.first_user['buyer'] = self.first_user['passenger'] + counts['passengers']
+
+    @staticmethod
+    def near(place, n, spread):
+        """
+        A point up to `spread` degrees either way of `place`, spread evenly over the
+        square by n without drawing from the rng, so the rest of the data is unchanged
+        """
+        lat, lng = COORDINATES[place]
+        return (round(lat + spread * (2 * (n * 0.7548776662) % 2 - 1), 6),
+                round(lng + spread * (2 * (n * 0.5698402910) % 2 - 1), 6))
+
+    def moment(self, day, days_before=0):
+        """A time of day on `day`, or up to `days_before` days earlier"""
+        day -= timedelta(days=self.rng.randint(0, days_before))
+        return datetime.combine(day, time()) + timedelta(seconds=self.rng.randrange(6 * 3600, 22 * 3600))
+
+    def users(self):
+        counts, rng, add = self.counts, self.rng, self.loader.add
+        # One hash for everyone, with a salt from the seed so reruns match byte for byte.
+        # The last of bcrypt's 22 salt characters only carries 4 bits.
+        rounds = current_app.config.get('PASSWORD_HASH_ROUNDS', 12)
+        salt = f'$2b${rounds:02d}$' + ''.join(rng.choice(BCRYPT_ALPHABET) for _ in range(21)) + '.'
+        password_hash = hash_password(DEFAULT_PASSWORD, rounds, salt)
+        for role in ('admin', 'seller', 'passenger', 'buyer'):
+            for n in range(1, counts[f'{role}s'] + 1):
+                add(User, {
+                    'id': self.first_user[role] + n - 1, 'username': f'{role}{n}', 'email': f'{role}{n}@example.com',
+                    'password_hash': password_hash, 'role': role, 'created_at': self.moment(START, 365),
+                    'is_verified': rng.random() < 0.9, 'is_active': rng.random() < 0.98,
+                })
+        for n in range(1, counts['sellers'] + 1):
+            add(Seller, {'id': n, 'user_id': self.first_user['seller'] + n - 1, 'stall_name': f'{rng.choice(NAMES)} Stall {n}',
+                         'location': MARKETS[n % len(MARKETS)], 'contact_info': f'+25471{n:07d}',
+                         'created_at': self.moment(START, 365)})
+        for n in range(1, counts['passengers'] + 1):
+            add(Passenger, {'id': n, 'user_id': self.first_user['passenger'] + n - 1, 'contact_info': f'+25472{n:07d}',
+                            'created_at': self.moment(START, 365)})
+
+    def drivers(self):
+        for n in range(1, self.counts['drivers'] + 1):
+            self.loader.add(Driver, {'id': n, 'name': f'{self.rng.choice(NAMES)} {self.rng.choice(NAMES)}',
+                                     'email': f'driver{n}@example.com', 'contact_info': f'+25473{n:07d}'})
+
+    def buses(self):
+        self.capacities = array('H', [0])
+        for n in range(1, self.counts['buses'] + 1):
+            self.capacities.append(self.rng.choice(BUS_SIZES))
+            place = self.rng.choice(PLACES)
+            latitude, longitude = self.near(place, n, 0.02)
+            self.loader.add(Bus, {'id': n, 'driver_id': (n - 1) % self.counts['drivers'] + 1, 'bus_number': f'KB{n:06d}',
+                                  'seat_capacity': self.capacities[n], 'current_location': place,
+                                  'latitude': latitude, 'longitude': longitude,
+                                  'created_at': self.moment(START, 365), 'updated_at': self.moment(START)})
+
+    def routes(self):
+        # Each pair of places is served in both directions at the same fare
+        pairs = [(a, b) for i, a in enumerate(PLACES) for b in PLACES[i + 1:]]
+        self.rng.shuffle(pairs)
+        self.fares = array('H', [0])
+        for n in range(1, self.counts['routes'] + 1):
+            origin, destination = pairs[(n - 1) // 2 % len(pairs)]
+            if n % 2:
+                fare = self.rng.randrange(50, 500, 10)
+            else:
+                origin, destination = destination, origin
+            self.fares.append(fare)
+            self.loader.add(Route, {'id': n, 'driver_id': (n - 1) % self.counts['drivers'] + 1, 'origin': origin,
+                                    'destination': destination, 'description': f'{origin} to {destination}',
+                                    'created_at': self.moment(START, 365), 'updated_at': self.moment(START)})
+
+    def schedules(self, with_bookings):
+        rng = self.rng
+        # Per schedule: route, bus capacity and seats booked
+        self.trips = [None]
+        for n in range(1, self.counts['schedules'] + 1):
+            bus_id, route_id = rng.randint(1, self.counts['buses']), rng.randint(1, self.counts['routes'])
+            departure = rng.randrange(5 * 60, 22 * 60, 5)
+            arrival = min(departure + rng.randrange(30, 120, 5), 23 * 60 + 59)
+            capacity = self.capacities[bus_id]
+            booked = min(capacity, rng.randint(0, round(2 * self.occupancy * capacity))) if with_bookings else 0
+            self.trips.append((route_id, capacity, booked))
+            self.loader.add(Schedule, {
+                'id': n, 'bus_id': bus_id, 'route_id': route_id, 'date': START + timedelta(days=(n - 1) % self.days),
+                'departure_time': time(departure // 60, departure % 60), 'arrival_time': time(arrival // 60, arrival % 60),
+                'available_seats': capacity - booked, 'created_at': self.moment(START, 30), 'updated_at': self.moment(START),
+            })
+
+    def bookings(self):
+        """The seats taken off each schedule's available_seats, each with its payment"""
+        rng, add = self.rng, self.loader.add
+        booking_id = 0
+        for schedule_id in range(1, len(self.trips)):
+            route_id, capacity, booked = self.trips[schedule_id]
+            day = START + timedelta(days=(schedule_id - 1) % self.days)
+            for seat in rng.sample(range(1, capacity + 1), booked):
+                booking_id += 1
+                self.payment_id += 1
+                passenger = rng.randint(1, self.counts['passengers'])
+                paid = rng.random() < 0.9
+                created_at = self.moment(day, 14)
+                add(Booking, {
+                    'id': booking_id, 'user_id': self.first_user['passenger'] + passenger - 1, 'schedule_id': schedule_id,
+                    'passenger_id': passenger, 'seat_number': seat, 'payment_status': paid,
+                    'ticket_number': f'TKT{booking_id:010d}', 'created_at': created_at,
+                })
+                add(Payment, {
+                    'id': self.payment_id, 'booking_id': booking_id, 'amount': self.fares[route_id],
+                    'status': 'completed' if paid else rng.choice(('pending', 'cancelled', 'failed')),
+                    'transaction_id': f'ws_CO_{self.payment_id:012d}', 'created_at': created_at, 'updated_at': created_at,
+                })
+
+    def stalls(self):
+        for n in range(1, self.counts['stalls'] + 1):
+            market = MARKETS[n % len(MARKETS)]
+            latitude, longitude = self.near(market, n, 0.005)
+            self.loader.add(Stall, {'id': n, 'seller_id': n, 'stall_name': f'{NAMES[n % len(NAMES)]} Stall {n}',
+                                    'description': f'{self.rng.choice(GOODS)} and more', 'location': market,
+                                    'latitude': latitude, 'longitude': longitude, 'created_at': self.moment(START, 365)})
+
+    def products(self):
+        # Product n belongs to stall (n - 1) % stalls + 1, so a stall's products are every stalls-th id
+        stalls = self.counts['stalls']
+        self.prices = array('d', [0])
+        for n in range(1, self.counts['products'] + 1):
+            stall_id = (n - 1) % stalls + 1
+            self.prices.append(round(self.rng.uniform(20, 5000), 2))
+            self.loader.add(Product, {
+                'id': n, 'name': f'{self.rng.choice(GOODS)} {n}', 'description': self.rng.choice(REMARKS),
+                'price': self.prices[n], 'available_quantity': self.rng.randint(0, 500), 'sold_quantity': 0,
+                'stall_id': stall_id, 'stall_name': f'{NAMES[stall_id % len(NAMES)]} Stall {stall_id}',
+                'location': MARKETS[stall_id % len(MARKETS)], 'created_at': self.moment(START, 365),
+            })
+
+    def orders(self):
+        """Orders of up to five products from one stall, each with its items and payment"""
+        rng, add = self.rng, self.loader.add
+        stalls, products = self.counts['stalls'], self.counts['products']
+        item_id = 0
+        for order_id in range(1, self.counts['orders'] + 1):
+            stall_id = rng.randint(1, min(stalls, products))
+            choices = range(stall_id, products + 1, stalls)
+            items = [(product_id, rng.randint(1, 4)) for product_id in rng.sample(choices, min(len(choices), rng.randint(1, 5)))]
+            total = round(sum(self.prices[product_id] * quantity for product_id, quantity in items), 2)
+            status = rng.choices(('paid', 'pending', 'cancelled'), (8, 1, 1))[0]
+            created_at = self.moment(START + timedelta(days=rng.randrange(self.days)), 0)
+            add(Order, {'id': order_id, 'user_id': self.first_user['buyer'] + rng.randint(0, self.counts['buyers'] - 1),
+                        'total_price': total, 'status': status, 'created_at': created_at, 'updated_at': created_at})
+            for product_id, quantity in items:
+                item_id += 1
+                add(OrderItem, {'id': item_id, 'order_id': order_id, 'product_id': product_id, 'quantity': quantity,
+                                'unit_price': self.prices[product_id]})
+            self.payment_id += 1
+            add(Payment, {
+                'id': self.payment_id, 'order_id': order_id, 'amount': total,
+                'status': {'paid': 'completed', 'pending': 'pending', 'cancelled': 'cancelled'}[status],
+                'transaction_id': f'ws_CO_{self.payment_id:012d}', 'created_at': created_at, 'updated_at': created_at,
+            })
+
+    def reviews(self):
+        stalls, products = self.counts['stalls'], self.counts['products']
+        for n in range(1, self.counts['reviews'] + 1):
+            product_id = self.rng.randint(1, products)
+            self.loader.add(Review, {
+                'id': n, 'user_id': self.first_user['buyer'] + self.rng.randint(0, self.counts['buyers'] - 1),
+                'shop_id': (product_id - 1) % stalls + 1, 'product_id': product_id, 'rating': self.rng.randint(1, 5),
+                'review': self.rng.choice(REMARKS), 'created_at': self.moment(START, 60),
+            })
+
+    def comments(self):
+        for n in range(1, self.counts['comments'] + 1):
+            self.loader.add(Comment, {
+                'id': n, 'user_id': self.rng.randint(1, self.counts['users']), 'entity_id': self.rng.randint(1, self.counts['products']),
+                'entity_type': 'Product', 'rating': self.rng.randint(1, 5), 'comment': self.rng.choice(REMARKS),
+                'created_at': self.moment(START, 60),
+            })
+
+    def tickets(self):
+        for n in range(1, self.counts['tickets'] + 1):
+            self.loader.add(Ticket, {'id': n, 'route_id': self.rng.randint(1, self.counts['routes']),
+                                     'passenger_id': self.rng.randint(1, self.counts['passengers']),
+                                     'seat_number': str(self.rng.randint(1, max(BUS_SIZES)))})
+
+
+def seed_db(scale=1.0, seed=42, tables=TABLES, chunk=10000, days=60, occupancy=0.4, **counts):
+    """
+    Fill the current app's (empty) database. `tables` picks which of TABLES to seed,
+    `days` spreads the schedules and orders from START, `occupancy` is the mean share
+    of seats booked, and keyword arguments override COUNTS. Returns rows written per table.
+    """
+    planned = plan(scale, **counts)
+    loader = _Loader(chunk)
+    generator = _Generator(planned, random.Random(seed), loader, days, occupancy)
+    for table in tables:
+        if table == 'schedules':
+            generator.schedules(with_bookings='bookings' in tables)
+        else:
+            getattr(generator, table)()
+        loader.commit()
+
+    if 'orders' in tables:
+        sold = select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == Product.id)
+        db.session.execute(update(Product).values(sold_quantity=sold.scalar_subquery())
+                           .execution_options(synchronize_session=False))
+        db.session.commit()
+
+    if db.engine.dialect.name == 'postgresql':
+        # Ids were given explicitly, so move each sequence past them
+        for name in loader.counts:
+            db.session.execute(text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT MAX(id) FROM {name}))"))
+        db.session.commit()
+    return loader.counts
+
+
+def main():
+    from flask_migrate import upgrade
+    from app import create_app, init_migrations
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk', type=int, default=10000, help="rows per executemany")
+    parser.add_argument('--days', type=int, default=60, help="days of schedules and orders from 2024-08-01")
+    args = parser.parse_args()
+
+    # Seeding serves no requests, so it runs without the M-Pesa callback token
+    app = create_app({'TESTING': True})
+    init_migrations(app)
     with app.app_context():
-        for user in users:
-            if not User.query.filter_by(email=user.email).first():
-                db.session.add(user)
-        
-        try:
-            db.session.commit()
-        except IntegrityError:
-            db.session.rollback()  # Rollback the session if there was an IntegrityError
-
-# Call the function to seed the data
-seed_users()
-
-# Seed Drivers
-def seed_drivers():
-    drivers = [
-        Driver(name="Michael Scott", email="michael.scott@example.com", contact_info="+254700000004"),
-        Driver(name="Dwight Schrute", email="dwight.schrute@example.com", contact_info="+254700000005"),
-        Driver(name="Jim Halpert", email="jim.halpert@example.com", contact_info="+254700000006"),
-        Driver(name="Pam Beesly", email="pam.beesly@example.com", contact_info="+254700000007"),
-        Driver(name="Stanley Hudson", email="stanley.hudson@example.com", contact_info="+254700000008"),
-        Driver(name="Phyllis Vance", email="phyllis.vance@example.com", contact_info="+254700000009"),
-        Driver(name="Andy Bernard", email="andy.bernard@example.com", contact_info="+254700000010"),
-        Driver(name="Ryan Howard", email="ryan.howard@example.com", contact_info="+254700000011"),
-        Driver(name="Kelly Kapoor", email="kelly.kapoor@example.com", contact_info="+254700000012"),
-        Driver(name="Toby Flenderson", email="toby.flenderson@example.com", contact_info="+254700000013"),
-    ]
-    db.session.add_all(drivers)
-    db.session.commit()
-# Seed Buses
-def seed_buses():
-    # Clear existing buses
-    db.session.query(Bus).delete()
-    db.session.commit()
-
-    bus_numbers = set()
-    for _ in range(10):  # Adjust the range as needed
-        while True:
-            # Generate a bus number in the format "KAA-XXX" where XXX is a random 3-digit number
-            bus_number = f"KAA-{random.randint(100, 999)}"
-            if bus_number not in bus_numbers:
-                bus_numbers.add(bus_number)
-                break
-
-        new_bus = Bus(
-            driver_id=random.randint(1, 10),
-            bus_number=bus_number,
-            seat_capacity=random.randint(30, 50),
-            current_location="Nairobi"
-        )
-        db.session.add(new_bus)
-    
-    db.session.commit()
-
-# Seed Routes
-def seed_routes():
-    routes_data = [
-        # Original routes
-        {"origin": "CBD", "destination": "Westlands", "description": "Route from Nairobi Central Business District to Westlands"},
-        {"origin": "CBD", "destination": "Kilimani", "description": "Route from Nairobi Central Business District to Kilimani"},
-        {"origin": "CBD", "destination": "Kibera", "description": "Route from Nairobi Central Business District to Kibera"},
-        {"origin": "CBD", "destination": "Lang'ata", "description": "Route from Nairobi Central Business District to Lang'ata"},
-        {"origin": "CBD", "destination": "Karen", "description": "Route from Nairobi Central Business District to Karen"},
-        {"origin": "CBD", "destination": "Ngong", "description": "Route from Nairobi Central Business District to Ngong"},
-        {"origin": "CBD", "destination": "Rongai", "description": "Route from Nairobi Central Business District to Rongai"},
-        {"origin": "CBD", "destination": "Embakasi", "description": "Route from Nairobi Central Business District to Embakasi"},
-        {"origin": "CBD", "destination": "Thika", "description": "Route from Nairobi Central Business District to Thika"},
-        {"origin": "CBD", "destination": "Gikambura", "description": "Route from Nairobi Central Business District to Gikambura in Kikuyu"},
-
-        # Additional useful routes
-        {"origin": "CBD", "destination": "Mombasa Road", "description": "Route from Nairobi Central Business District to Mombasa Road"},
-        {"origin": "CBD", "destination": "Jomo Kenyatta International Airport", "description": "Route from Nairobi Central Business District to JKIA"},
-        {"origin": "CBD", "destination": "Ruaka", "description": "Route from Nairobi Central Business District to Ruaka"},
-        {"origin": "CBD", "destination": "Muthaiga", "description": "Route from Nairobi Central Business District to Muthaiga"},
-        {"origin": "CBD", "destination": "Kasarani", "description": "Route from Nairobi Central Business District to Kasarani"},
-        {"origin": "CBD", "destination": "Kikuyu", "description": "Route from Nairobi Central Business District to Kikuyu"},
-        {"origin": "CBD", "destination": "Ruiru", "description": "Route from Nairobi Central Business District to Ruiru"},
-        {"origin": "CBD", "destination": "Juja", "description": "Route from Nairobi Central Business District to Juja"},
-        {"origin": "CBD", "destination": "Syokimau", "description": "Route from Nairobi Central Business District to Syokimau"},
-        {"origin": "CBD", "destination": "Kitengela", "description": "Route from Nairobi Central Business District to Kitengela"},
-    ]
-
-    routes = [Route(**route_data, created_at=datetime.now(), updated_at=datetime.now()) for route_data in routes_data]
-    db.session.add_all(routes)
-    db.session.commit()
-
-# Seed Schedules
-def seed_schedules():
-    buses = Bus.query.all()
-    routes = Route.query.all()
-
-    if len(buses) < 5 or len(routes) < 5:
-        raise ValueError("Not enough buses or routes in the database to seed schedules.")
-
-    schedules_data = [
-        {"bus_id": buses[0].id, "route_id": routes[0].id, "departure_time": time(7, 30), "arrival_time": time(8, 15), "date": date(2024, 8, 15), "available_seats": 40},
-        {"bus_id": buses[1].id, "route_id": routes[1].id, "departure_time": time(8, 00), "arrival_time": time(8, 45), "date": date(2024, 8, 15), "available_seats": 35},
-        {"bus_id": buses[2].id, "route_id": routes[2].id, "departure_time": time(8, 30), "arrival_time": time(9, 15), "date": date(2024, 8, 15), "available_seats": 30},
-        {"bus_id": buses[3].id, "route_id": routes[3].id, "departure_time": time(9, 00), "arrival_time": time(9, 45), "date": date(2024, 8, 15), "available_seats": 50},
-        {"bus_id": buses[4].id, "route_id": routes[4].id, "departure_time": time(9, 00), "arrival_time": time(9, 50), "date": date(2024, 8, 15), "available_seats": 40},
-
-        # Additional schedules for diversity
-        {"bus_id": buses[0].id, "route_id": routes[5].id, "departure_time": time(10, 00), "arrival_time": time(10, 45), "date": date(2024, 8, 15), "available_seats": 35},
-        {"bus_id": buses[1].id, "route_id": routes[6].id, "departure_time": time(10, 30), "arrival_time": time(11, 15), "date": date(2024, 8, 15), "available_seats": 30},
-        {"bus_id": buses[2].id, "route_id": routes[7].id, "departure_time": time(11, 00), "arrival_time": time(11, 50), "date": date(2024, 8, 15), "available_seats": 45},
-        {"bus_id": buses[3].id, "route_id": routes[8].id, "departure_time": time(11, 30), "arrival_time": time(12, 15), "date": date(2024, 8, 15), "available_seats": 40},
-        {"bus_id": buses[4].id, "route_id": routes[9].id, "departure_time": time(12, 00), "arrival_time": time(12, 50), "date": date(2024, 8, 15), "available_seats": 50},
-
-        # More schedules for variety
-        {"bus_id": buses[0].id, "route_id": routes[0].id, "departure_time": time(13, 00), "arrival_time": time(13, 45), "date": date(2024, 8, 15), "available_seats": 30},
-        {"bus_id": buses[1].id, "route_id": routes[1].id, "departure_time": time(14, 00), "arrival_time": time(14, 50), "date": date(2024, 8, 15), "available_seats": 40},
-    ]
-
-    schedules = [Schedule(**schedule_data, created_at=datetime.now(), updated_at=datetime.now()) for schedule_data in schedules_data]
-    db.session.add_all(schedules)
-    db.session.commit()
-    
-def seed_tickets():
-    tickets = [
-        {'route_id': 1, 'passenger_id': 101, 'seat_number': 'A1'},
-        {'route_id': 1, 'passenger_id': 102, 'seat_number': 'A2'},
-        {'route_id': 1, 'passenger_id': 103, 'seat_number': 'A3'},
-        {'route_id': 2, 'passenger_id': 104, 'seat_number': 'B1'},
-        {'route_id': 2, 'passenger_id': 105, 'seat_number': 'B2'},
-        {'route_id': 2, 'passenger_id': 106, 'seat_number': 'B3'},
-        {'route_id': 3, 'passenger_id': 107, 'seat_number': 'C1'},
-        {'route_id': 3, 'passenger_id': 108, 'seat_number': 'C2'},
-        {'route_id': 3, 'passenger_id': 109, 'seat_number': 'C3'},
-        {'route_id': 4, 'passenger_id': 110, 'seat_number': 'D1'},
-        {'route_id': 4, 'passenger_id': 111, 'seat_number': 'D2'},
-        {'route_id': 4, 'passenger_id': 112, 'seat_number': 'D3'},
-        {'route_id': 5, 'passenger_id': 113, 'seat_number': 'E1'},
-        {'route_id': 5, 'passenger_id': 114, 'seat_number': 'E2'},
-        {'route_id': 5, 'passenger_id': 115, 'seat_number': 'E3'},
-    ]
-
-    db.session.add_all([Ticket(**ticket) for ticket in tickets])
-    db.session.commit()
-    
-# Seed Bookings
-def seed_bookings():
-    users = User.query.all()
-    schedules = Schedule.query.all()
-    bookings_data = [
-        {"user_id": users[0].id, "schedule_id": schedules[0].id, "passenger_id": 1, "seat_number": 1, "payment_status": True, "ticket_number": generate_ticket_number()},
-        {"user_id": users[1].id, "schedule_id": schedules[1].id, "passenger_id": 2, "seat_number": 2, "payment_status": False, "ticket_number": generate_ticket_number()},
-        {"user_id": users[2].id, "schedule_id": schedules[2].id, "passenger_id": 3, "seat_number": 3, "payment_status": True, "ticket_number": generate_ticket_number()},
-    ]
-    bookings = [Booking(**booking_data, created_at=datetime.now()) for booking_data in bookings_data]
-    db.session.add_all(bookings)
-    db.session.commit()
-
-# Seed Products
-from datetime import datetime
-
-def seed_products():
-    products = [
-        # Fashion Hub - Clothes
-        {'name': 'Casual Shirt', 'description': 'Comfortable casual shirt', 'price': 29.99, 'available_quantity': 50, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/65/8b/95/658b9511a99127c65c0410a43940850b.jpg'},
-        {'name': 'Formal Suit', 'description': 'Stylish formal suit', 'price': 199.99, 'available_quantity': 30, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/d4/c2/be/d4c2be1c665e61e9598fe8cae93e1c66.jpg'},
-        {'name': 'Denim Jeans', 'description': 'Trendy denim jeans', 'price': 49.99, 'available_quantity': 60, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/ef/23/83/ef23838bf2e41a4bcffc3b1474bec4b2.jpg'},
-        {'name': 'Summer Dress', 'description': 'Light and airy summer dress', 'price': 39.99, 'available_quantity': 40, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/3a/27/6f/3a276fb307fbb45337ca6a5b3c081e26.jpg'},
-        {'name': 'Winter Jacket', 'description': 'Warm winter jacket', 'price': 149.99, 'available_quantity': 20, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/52/16/5a/52165a61af64fd3ad1d186bc5c3067af.jpg'},
-        {'name': 'Leather Jacket', 'description': 'Stylish leather jacket', 'price': 179.99, 'available_quantity': 15, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/31/a8/2a/31a82a3c0f2ae03053ae200462fe82bf.jpg'},
-        {'name': 'Turtleneck Sweater', 'description': 'Warm turtleneck sweater', 'price': 39.99, 'available_quantity': 25, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/2b/87/e1/2b87e14dc1f13703a715def266367221.jpg'},
-        {'name': 'Polo Shirt', 'description': 'Classic polo shirt', 'price': 34.99, 'available_quantity': 45, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/c2/68/39/c26839d442276305b897b6148eadb9f3.jpg'},
-        {'name': 'Cardigan Sweater', 'description': 'Cozy cardigan sweater', 'price': 44.99, 'available_quantity': 20, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/67/c8/c1/67c8c1339100eace3a1e6ee9535bade2.jpg'},
-        {'name': 'Cargo Pants', 'description': 'Durable cargo pants', 'price': 39.99, 'available_quantity': 30, 'stall_id': 1, 'created_at': datetime.utcnow(), 'location': 1, 'stall_name': 'Fashion Hub', 'image_url': 'https://i.pinimg.com/236x/37/74/1f/37741fc0d2455766c778953aaec64f2c.jpg'},
-
-        # Shoe Paradise - Shoes
-        {'name': 'Running Shoes', 'description': 'Comfortable running shoes', 'price': 89.99, 'available_quantity': 40, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/2c/9c/ad/2c9cad166f77d3a8394e0c234c865c5a.jpg'},
-        {'name': 'Leather Boots', 'description': 'Durable leather boots', 'price': 129.99, 'available_quantity': 20, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/cc/d4/f9/ccd4f9d26ac01b3c7586fc56a4df6d6d.jpg'},
-        {'name': 'High Heels', 'description': 'Elegant high heels', 'price': 99.99, 'available_quantity': 35, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/c1/3c/3a/c13c3a2e65cf98a8c3744ce9f5e2cd9c.jpg'},
-        {'name': 'Sneakers', 'description': 'Stylish everyday sneakers', 'price': 79.99, 'available_quantity': 50, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/cc/42/b8/cc42b8e76033a7b9d829e99c05e87f13.jpg'},
-        {'name': 'Sandals', 'description': 'Comfortable summer sandals', 'price': 49.99, 'available_quantity': 60, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/d3/4b/3b/d34b3bfb392b1b979bc0032585574fa8.jpg'},
-        {'name': 'Loafers', 'description': 'Casual leather loafers', 'price': 89.99, 'available_quantity': 25, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://example.com/images/loafers.jpg'},
-        {'name': 'Chelsea Boots', 'description': 'Sleek Chelsea boots', 'price': 139.99, 'available_quantity': 15, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/c3/4e/ab/c34eab72703a1bb6127a5347c83c746d.jpg'},
-        {'name': 'Flip Flops', 'description': 'Casual flip flops', 'price': 19.99, 'available_quantity': 70, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/e3/af/52/e3af52993146bc07272800dac109b04b.jpg'},
-        {'name': 'Oxford Shoes', 'description': 'Classic Oxford shoes', 'price': 109.99, 'available_quantity': 20, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/39/af/f2/39aff2691751ea79a501956858e0775c.jpg'},
-        {'name': 'Hiking Boots', 'description': 'Durable hiking boots', 'price': 149.99, 'available_quantity': 15, 'stall_id': 2, 'created_at': datetime.utcnow(), 'location': 2, 'stall_name': 'Shoe Paradise', 'image_url': 'https://i.pinimg.com/236x/75/3d/a4/753da4a64026ec2a74077d49f3f1ba80.jpg'},
-
-        # Perfume Palace - Perfumes
-        {'name': 'Chanel No. 5', 'description': 'Classic Chanel fragrance', 'price': 99.99, 'available_quantity': 25, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/25/51/63/255163b135d1e9c837b079828bc1ef94.jpg'},
-        {'name': 'Dior Sauvage', 'description': 'Masculine Dior fragrance', 'price': 79.99, 'available_quantity': 35, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/41/db/a4/41dba438abe65e730db76815df2444fd.jpg'},
-        {'name': 'Gucci Bloom', 'description': 'Floral Gucci fragrance', 'price': 89.99, 'available_quantity': 30, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/0a/ad/3f/0aad3fbfd965278f88e251459d5e2e4b.jpg'},
-        {'name': 'YSL Black Opium', 'description': 'Bold YSL fragrance', 'price': 109.99, 'available_quantity': 20, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/c4/1b/30/c41b309b6e77271bea4696eb24a4ed33.jpg'},
-        {'name': 'Versace Eros', 'description': 'Sensual Versace fragrance', 'price': 99.99, 'available_quantity': 25, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/b3/b4/07/b3b407f29b2f666e2b8c151fceabe766.jpg'},
-        {'name': 'Tom Ford Oud Wood', 'description': 'Luxurious Tom Ford fragrance', 'price': 149.99, 'available_quantity': 15, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/90/b3/fc/90b3fc94418dbf6c2bbeaf5812c7f39c.jpg'},
-        {'name': 'Creed Aventus', 'description': 'Iconic Creed fragrance', 'price': 199.99, 'available_quantity': 10, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/e0/ba/43/e0ba43f5ab9c57954c5a55b713ad7c32.jpg'},
-        {'name': 'Marc Jacobs Daisy', 'description': 'Light Marc Jacobs fragrance', 'price': 89.99, 'available_quantity': 30, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/82/21/b3/8221b347a88cedc8d6a1cad5d42094b6.jpg'},
-        {'name': 'Jo Malone Lime Basil & Mandarin', 'description': 'Citrus Jo Malone fragrance', 'price': 129.99, 'available_quantity': 15, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/f5/53/e2/f553e29494604ef5f1e7d00687315969.jpg.jpg'},
-        {'name': 'Calvin Klein CK One', 'description': 'Fresh Calvin Klein fragrance', 'price': 69.99, 'available_quantity': 40, 'stall_id': 3, 'created_at': datetime.utcnow(), 'location': 3, 'stall_name': 'Perfume Palace', 'image_url': 'https://i.pinimg.com/236x/23/95/28/23952839a10896d9770e56c2acf33d9a.jpg'},
-          # Electronics World - Electronics
-        {'name': 'Smartphone', 'description': 'Latest model smartphone', 'price': 699.99, 'available_quantity': 25, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/66/c2/3f/66c23f9566266ec63f39b2dac1a56585.jpg'},
-        {'name': 'Laptop', 'description': 'High-performance laptop', 'price': 1099.99, 'available_quantity': 15, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/05/71/a1/0571a140c8f2c73d60ad88ffd4a2bbb4.jpg'},
-        {'name': 'Smartwatch', 'description': 'Stylish smartwatch', 'price': 199.99, 'available_quantity': 30, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/65/7a/5e/657a5e304359ba0a7078b41106165d7a.jpg'},
-        {'name': 'Bluetooth Headphones', 'description': 'Noise-cancelling headphones', 'price': 149.99, 'available_quantity': 40, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/474x/68/9c/9b/689c9b23e5254514197b9b209310e34d.jpg'},
-        {'name': 'Gaming Console', 'description': 'Next-gen gaming console', 'price': 499.99, 'available_quantity': 10, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/2c/5b/02/2c5b02812870dfbb3ea99fb7b78f9613.jpg'},
-        {'name': '4K TV', 'description': 'Ultra HD 4K television', 'price': 899.99, 'available_quantity': 20, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/3f/15/f0/3f15f028b7e18bd4a0667aba31481705.jpg'},
-        {'name': 'Wireless Earbuds', 'description': 'Compact wireless earbuds', 'price': 129.99, 'available_quantity': 50, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/93/1b/f7/931bf73e5f0a90fcc0c68e93927c98e6.jpg'},
-        {'name': 'Tablet', 'description': 'Portable high-resolution tablet', 'price': 499.99, 'available_quantity': 30, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/31/05/64/310564954f727378364e446d8012d346.jpg'},
-        {'name': 'Digital Camera', 'description': 'High-resolution digital camera', 'price': 749.99, 'available_quantity': 15, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/c8/c2/46/c8c246382350d0f66561a5d4c2b30baa.jpg'},
-        {'name': 'Home Theater System', 'description': 'Immersive home theater experience', 'price': 599.99, 'available_quantity': 10, 'stall_id': 4, 'created_at': datetime.utcnow(), 'location': 4, 'stall_name': 'Electronics World', 'image_url': 'https://i.pinimg.com/236x/a0/98/42/a098425deff5334369b35cb52e5c6c07.jpg'},
-
-        # Food Basket - Food
-        {'name': 'Organic Apples', 'description': 'Fresh organic apples', 'price': 3.99, 'available_quantity': 100, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/b3/fa/eb/b3faeb903bd3e503b96a9cc08540547e.jpg'},
-        {'name': 'Granola Bars', 'description': 'Healthy granola bars', 'price': 5.99, 'available_quantity': 50, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/92/28/10/9228106e7457f9c609650b620a0386e2.jpg'},
-        {'name': 'Almond Milk', 'description': 'Vegan almond milk', 'price': 4.99, 'available_quantity': 40, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/20/28/9c/20289c04c9fe6341588a7d33c5457c25.jpg'},
-        {'name': 'Quinoa', 'description': 'Healthy quinoa grains', 'price': 6.99, 'available_quantity': 60, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/ed/57/be/ed57beb78569aac634c6978040062348.jpg'},
-        {'name': 'Organic Honey', 'description': 'Pure organic honey', 'price': 7.99, 'available_quantity': 35, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/ec/65/bc/ec65bcb0bc2912e015e927d50678217d.jpg'},
-        {'name': 'Greek Yogurt', 'description': 'Creamy Greek yogurt', 'price': 3.49, 'available_quantity': 80, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/6c/1e/9a/6c1e9a24ad599212c76b3bd1de0c1fa9.jpg'},
-        {'name': 'Avocado', 'description': 'Fresh avocados', 'price': 1.99, 'available_quantity': 120, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/a9/10/f7/a910f76ccc5a6a547078d18eb4a3189d.jpg'},
-        {'name': 'Whole Grain Bread', 'description': 'Healthy whole grain bread', 'price': 2.99, 'available_quantity': 50, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/fe/05/a8/fe05a8428596dddcb50e83c90247aaae.jpg'},
-        {'name': 'Dark Chocolate', 'description': 'Rich dark chocolate', 'price': 3.99, 'available_quantity': 70, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/93/a8/64/93a864df6dd119e12bc99c07635c99ad.jpg'},
-        {'name': 'Kombucha', 'description': 'Refreshing kombucha drink', 'price': 3.49, 'available_quantity': 50, 'stall_id': 5, 'created_at': datetime.utcnow(), 'location': 5, 'stall_name': 'Food Basket', 'image_url': 'https://i.pinimg.com/236x/45/30/39/4530394df6c81be2abf1a99af04a1b8f.jpg'},
-
-        # Jewel Collection - Jewelry
-        {'name': 'Gold Necklace', 'description': 'Elegant gold necklace', 'price': 499.99, 'available_quantity': 5, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/92/5d/f4/925df42973535e40357afab9ee52d8dd.jpg'},
-        {'name': 'Silver Bracelet', 'description': 'Beautiful silver bracelet', 'price': 199.99, 'available_quantity': 10, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/8c/54/46/8c5446ba4a9a1921aa98550964da16e8.jpg'},
-        {'name': 'Diamond Ring', 'description': 'Stunning diamond ring', 'price': 999.99, 'available_quantity': 3, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/e0/5a/0a/e05a0a735a1a568d8fd8cd42a069eb35.jpg'},
-        {'name': 'Pearl Earrings', 'description': 'Classic pearl earrings', 'price': 299.99, 'available_quantity': 8, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/c5/61/6b/c5616b91d3b47169e7fc909cc5b8ee26.jpg'},
-        {'name': 'Ruby Pendant', 'description': 'Elegant ruby pendant', 'price': 799.99, 'available_quantity': 4, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/15/d7/66/15d766e56aff14864d6dff4e030a631b.jpg'},
-        {'name': 'Gold Watch', 'description': 'Luxury gold watch', 'price': 1199.99, 'available_quantity': 2, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/96/e8/7d/96e87d00ffab073cf5888f7ca418bee1.jpg'},
-        {'name': 'Emerald Brooch', 'description': 'Vintage emerald brooch', 'price': 699.99, 'available_quantity': 3, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/34/4a/52/344a522a95aadd12c62e7a0cdb77da57.jpg'},
-        {'name': 'Sapphire Cufflinks', 'description': 'Sophisticated sapphire cufflinks', 'price': 249.99, 'available_quantity': 6, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/ae/83/13/ae8313d150597c3d55b245733c104f48.jpg'},
-        {'name': 'Platinum Band', 'description': 'Sleek platinum band', 'price': 599.99, 'available_quantity': 5, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/6a/d3/8c/6ad38c4faab092676e71d5bfffed7b2a.jpg'},
-        {'name': 'Opal Ring', 'description': 'Unique opal ring', 'price': 399.99, 'available_quantity': 4, 'stall_id': 6, 'created_at': datetime.utcnow(), 'location': 6, 'stall_name': 'Jewel Collection', 'image_url': 'https://i.pinimg.com/236x/f4/f0/f0/f4f0f0ac61d7c58c6a02399b55612c99.jpg'},
-    ]
-
-    db.session.add_all([Product(**product) for product in products])
-    db.session.commit()
-
-
-# Seed Orders
-def seed_orders():
-    users = User.query.all()
-    orders_data = [
-        {"user_id": users[0].id, "total_price": 299.97, "status": "completed"},
-        {"user_id": users[1].id, "total_price": 129.99, "status": "pending"},
-    ]
-    orders = [Order(**order_data, created_at=datetime.now(), updated_at=datetime.now()) for order_data in orders_data]
-    db.session.add_all(orders)
-    db.session.commit()
-
-# Seed Order Items
-def seed_order_items():
-    orders = Order.query.all()
-    products = Product.query.all()
-    order_items_data = [
-        {"order_id": orders[0].id, "product_id": products[0].id, "quantity": 1, "price": 29.99},
-        {"order_id": orders[0].id, "product_id": products[2].id, "quantity": 2, "price": 89.99},
-        {"order_id": orders[1].id, "product_id": products[3].id, "quantity": 1, "price": 129.99},
-    ]
-    order_items = [OrderItem(**item_data) for item_data in order_items_data]
-    db.session.add_all(order_items)
-    db.session.commit()
-
-# Seed Payments
-def seed_payments():
-    orders = Order.query.all()
-    payments_data = [
-        {"order_id": orders[0].id, "payment_method": "M-Pesa", "amount_paid": 299.97, "payment_date": datetime.now()},
-        {"order_id": orders[1].id, "payment_method": "Credit Card", "amount_paid": 129.99, "payment_date": datetime.now()},
-    ]
-    payments = [Payment(**payment_data) for payment_data in payments_data]
-    db.session.add_all(payments)
-    db.session.commit()
-
-# Seed Comments
-def seed_comments():
-    users = User.query.all()
-    products = Product.query.all()
-    comments_data = [
-        {"user_id": users[0].id, "entity_id": products[0].id, "entity_type": "Product", "rating": 5, "comment": "Excellent product! Highly recommend."},
-        {"user_id": users[1].id, "entity_id": products[1].id, "entity_type": "Product", "rating": 4, "comment": "Very good, but could use some improvements."},
-        {"user_id": users[2].id, "entity_id": products[2].id, "entity_type": "Product", "rating": 3, "comment": "Average quality, not as expected."},
-        {"user_id": users[0].id, "entity_id": products[3].id, "entity_type": "Product", "rating": 4, "comment": "Good value for the price."},
-        {"user_id": users[1].id, "entity_id": products[4].id, "entity_type": "Product", "rating": 2, "comment": "Not worth the price."},
-    ]
-    comments = [Comment(**comment_data, created_at=datetime.now(), updated_at=datetime.now()) for comment_data in comments_data]
-    db.session.add_all(comments)
-    db.session.commit()
-
-# Seed Reviews
-def seed_reviews():
-    users = User.query.all()
-    products = Product.query.all()
-    reviews_data = [
-        {"user_id": users[0].id, "entity_id": products[0].id, "entity_type": "Product", "rating": 4, "comment": "Nice product, but delivery was slow."},
-        {"user_id": users[1].id, "entity_id": products[1].id, "entity_type": "Product", "rating": 5, "comment": "Loved it! Highly recommend."},
-        {"user_id": users[2].id, "entity_id": products[2].id, "entity_type": "Product", "rating": 3, "comment": "It's okay, nothing special."},
-        {"user_id": users[0].id, "entity_id": products[3].id, "entity_type": "Product", "rating": 2, "comment": "Not satisfied with the quality."},
-        {"user_id": users[1].id, "entity_id": products[4].id, "entity_type": "Product", "rating": 4, "comment": "Good product, but a bit expensive."},
-    ]
-    reviews = [Review(**review_data, created_at=datetime.now(), updated_at=datetime.now()) for review_data in reviews_data]
-    db.session.add_all(reviews)
-    db.session.commit()
-    
-from datetime import datetime
-
-def seed_payment():
-    booking_ids = [booking.id for booking in Booking.query.all()]
-    order_ids = [order.id for order in Order.query.all()]
-    
-    payments = [
-        Payment(booking_id=booking_ids[0], order_id=None, amount=150.75, status='completed', transaction_id='TXN123456'),
-        Payment(booking_id=booking_ids[1], order_id=None, amount=200.00, status='pending', transaction_id='TXN123457'),
-        Payment(booking_id=booking_ids[2], order_id=None, amount=320.40, status='cancelled', transaction_id='TXN123458'),
-        
-        Payment(booking_id=None, order_id=order_ids[0], amount=500.00, status='completed', transaction_id='TXN123459'),
-        Payment(booking_id=None, order_id=order_ids[1], amount=750.25, status='completed', transaction_id='TXN123460'),
-        Payment(booking_id=None, order_id=order_ids[2], amount=1000.00, status='pending', transaction_id='TXN123461'),
-    ]
-
-    # Add payments to the database
-    db.session.add_all(payments)
-    db.session.commit()
-    
-def seed_sellers():
-    users = User.query.all()
-    
-    if not users:
-        raise ValueError("No users found. Please seed the users first.")
-
-    sellers = [
-        Seller(
-            user_id=users[0].id,  
-            stall_name='Trendy Apparel',
-            location='Sarit Center',  
-            contact_info='contact@trendyapparel.com, +254712345678',
-            created_at=datetime.utcnow()
-        ),
-        Seller(
-            user_id=users[1].id,  
-            stall_name='Gadget Corner',
-            location='Two Rivers Mall',  
-            contact_info='contact@gadgetcorner.com, +254723456789',
-            created_at=datetime.utcnow()
-        ),
-        Seller(
-            user_id=users[2].id,  
-            stall_name='Fragrance World',
-            location='Yaya Center',  
-            contact_info='contact@fragranceworld.com, +254734567890',
-            created_at=datetime.utcnow()
-        ),
-        Seller(
-            user_id=users[3].id,  
-            stall_name='Footwear Haven',
-            location='Westlands Mall',  
-            contact_info='contact@footwearhaven.com, +254745678901',
-            created_at=datetime.utcnow()
-        ),
-        Seller(
-            user_id=users[4].id,  
-            stall_name='Gourmet Delights',
-            location='Village Market', 
-            contact_info='contact@gourmetdelights.com, +254756789012',
-            created_at=datetime.utcnow()
-        ),
-        
-    ]
-
-    # Add sellers to the database
-    db.session.add_all(sellers)
-    db.session.commit()
-
-    
-    
-# Seed Stalls
-   
-def seed_stalls():
-    
-    seller_ids = [seller.id for seller in Seller.query.all()]
-
-    if not seller_ids:
-        raise ValueError("No sellers found. Please seed the sellers first.")
-
-    stalls = [
-        Stall(
-            seller_id=seller_ids[0],  # Replace with appropriate seller_id
-            stall_name='Trendy Apparel',
-            description='A stall offering the latest in fashion and accessories.',
-            location='Sarit Center',
-            image_url='https://i.pinimg.com/474x/2a/2a/b3/2a2ab349f8b7209fa1a9f194039204a9.jpg'
-        ),
-        Stall(
-            seller_id=seller_ids[1],  # Replace with appropriate seller_id
-            stall_name='Gadget Corner',
-            description='Your go-to place for the latest electronics and gadgets.',
-            location='Two Rivers Mall',
-            image_url='hhttps://i.pinimg.com/236x/ae/36/75/ae367543511117be8542192617b4947a.jpg'
-        ),
-        Stall(
-            seller_id=seller_ids[2],  # Replace with appropriate seller_id
-            stall_name='Fragrance World',
-            description='A stall specializing in perfumes and colognes from top brands.',
-            location='Yaya Center',
-            image_url='https://i.pinimg.com/474x/a0/e4/57/a0e457165a5b3afbd5c88fa8130224c7.jpg'
-        ),
-        Stall(
-            seller_id=seller_ids[3],  # Replace with appropriate seller_id
-            stall_name='Footwear Haven',
-            description='A wide selection of shoes for every occasion.',
-            location='Westlands Mall',
-            image_url='https://i.pinimg.com/236x/b5/23/a4/b523a4aa3f91feb4be1916710dc7eed5.jpg'
-        ),
-        Stall(
-            seller_id=seller_ids[4],  # Replace with appropriate seller_id
-            stall_name='Gourmet Delights',
-            description='Delicious food products and gourmet ingredients.',
-            location='Village Market',
-            image_url='https://i.pinimg.com/236x/05/27/b1/0527b176f9ba860d735e9912fa24b403.jpg'
-        ),
-       
-    ]
-
-    # Add stalls to the database
-    db.session.add_all(stalls)
-    db.session.commit()
-    
-def seed_passengers():
-    users = User.query.all()
-    
-    if not users:
-        raise ValueError("No users found. Please seed the users first.")
-
-    passengers = [
-        Passenger(
-            user_id=users[0].id,  
-            contact_info='1234 Elm Street, Nairobi, +254712345678',
-            created_at=datetime.utcnow()
-        ),
-        Passenger(
-            user_id=users[1].id,  
-            contact_info='5678 Maple Avenue, Nairobi, +254723456789',
-            created_at=datetime.utcnow()
-        ),
-        Passenger(
-            user_id=users[2].id,  
-            contact_info='9101 Oak Drive, Nairobi, +254734567890',
-            created_at=datetime.utcnow()
-        ),
-        Passenger(
-            user_id=users[3].id,  
-            contact_info='1213 Pine Road, Nairobi, +254745678901',
-            created_at=datetime.utcnow()
-        ),
-        Passenger(
-            user_id=users[4].id,  
-            contact_info='1415 Cedar Lane, Nairobi, +254756789012',
-            created_at=datetime.utcnow()
-        ),
-    ]
-
-    # Add passengers to the database
-    db.session.add_all(passengers)
-    db.session.commit()
-    
-
-# Run all seed functions
-def  seed_db():
-    seed_users()
-    seed_sellers()
-    seed_stalls()
-    seed_drivers()
-    seed_buses()
-    seed_routes()
-    seed_tickets()
-    seed_passengers()
-    seed_schedules()
-    seed_bookings()
-    seed_products()
-    seed_orders()
-    seed_order_items()
-    seed_payments()
-    seed_comments()
-    seed_reviews()
-    
-    
-    
-    
+        # Bring the schema up to date before seeding a fresh database
+        upgrade()
+        if db.session.execute(select(User.id).limit(1)).first():
+            sys.exit("The database already has users; point DATABASE_URI at an empty one")
+        start = clock.perf_counter()
+        written = seed_db(args.scale, args.seed, chunk=args.chunk, days=args.days)
+        elapsed = clock.perf_counter() - start
+
+    for table, rows in written.items():
+        print(f"  {table:<12} {rows:>10,}")
+    total = sum(written.values())
+    print(f"{total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+
 if __name__ == '__main__':
-    with app.app_context():
-        seed_db()
-    
-    # 
-    # 
+    main()
@@ -0,0 +1,62 @@
+"""
+Shared fixtures. Each test gets the real app from create_app() on its own SQLite file
+with the schema created from model.py, so tests never touch instance/. A test module
+can override `app_config` to change settings.
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app
+from model import db
+
+
+@pytest.fixture
+def app_config():
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, app_config):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "app.db"}',
+        'JWT_SECRET_KEY': 'test-secret-key-that-is-long-enough',
+        'MPESA_CALLBACK_TOKEN': 'test-callback-token',
+        'MPESA_CALLBACK_QUEUE_DB': str(tmp_path / 'callbacks.db'),
+        'MPESA_CALLBACK_WORKER': False,
+        # Hash on the test's own thread rather than starting a process pool
+        'PASSWORD_HASH_WORKERS': 0,
+        **app_config,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """auth_headers(user_id, role) -> an Authorization header for that user"""
+    def headers(user_id, role):
+        with app.app_context():
+            token = create_access_token(identity={'id': user_id, 'role': role})
+        return {'Authorization': f'Bearer {token}'}
+    return headers
+
+
+@pytest.fixture
+def sql_statements(app):
+    """Every (statement, parameters) the app's engine runs from here on"""
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters)))
+    return statements
@@ -0,0 +1,129 @@
+"""
+POST /bookings never sells a seat twice, even when bookings race for the last one, and
+PUT /bookings moves a booking to another seat or schedule with the seat counts right
+"""
+import threading
+from collections import Counter
+from datetime import date, time
+
+import pytest
+from sqlalchemy import select
+
+from model import db, Booking, Bus, Schedule, User
+
+PASSENGER = 1
+
+
+@pytest.fixture
+def schedules(app):
+    """Schedules 1 and 2 on a 4-seat bus, selling 2 and 3 seats, and the passenger's account"""
+    with app.app_context():
+        db.session.add(User(id=PASSENGER, username='wanjiku', email='wanjiku@example.com',
+                            password_hash='x', role='passenger'))
+        db.session.add(Bus(id=1, bus_number='KDA 001A', seat_capacity=4))
+        for schedule_id, available in ((1, 2), (2, 3)):
+            db.session.add(Schedule(id=schedule_id, bus_id=1, departure_time=time(8), arrival_time=time(10),
+                                    date=date(2026, 1, 1), available_seats=available))
+        db.session.commit()
+
+
+def book(client, headers, schedule_id, seat_number):
+    response = client.post('/bookings', headers=headers, json={
+        'schedule_id': schedule_id, 'passenger_id': PASSENGER, 'seat_number': seat_number,
+    })
+    assert response.status_code == 201
+    return response.get_json()['id']
+
+
+def state(app):
+    """({schedule_id: available_seats}, {booking_id: (schedule_id, seat_number)})"""
+    with app.app_context():
+        available = dict(db.session.execute(select(Schedule.id, Schedule.available_seats)).all())
+        seats = {id: (schedule_id, seat) for id, schedule_id, seat in
+                 db.session.execute(select(Booking.id, Booking.schedule_id, Booking.seat_number)).all()}
+    return available, seats
+
+
+RACERS = 12
+
+
+def test_racing_for_the_last_seat(app, auth_headers, schedules):
+    """Schedule 2 has one seat left to sell; half the racers ask for seat 3 or 4, half for any"""
+    headers = auth_headers(PASSENGER, 'passenger')
+    client = app.test_client()
+    for seat in (1, 2):
+        book(client, headers, 2, seat)
+
+    statuses = Counter()
+    lock = threading.Lock()
+    start = threading.Barrier(RACERS)
+
+    def racer(n):
+        seat_number = (None, 3, 4)[n % 3]
+        start.wait()
+        response = app.test_client().post('/bookings', headers=headers, json={
+            'schedule_id': 2, 'passenger_id': PASSENGER, 'seat_number': seat_number,
+        })
+        with lock:
+            statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=racer, args=(n,)) for n in range(RACERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == {201: 1, 409: RACERS - 1}
+    available, seats = state(app)
+    assert available[2] == 0
+    booked = [seat for schedule_id, seat in seats.values() if schedule_id == 2]
+    assert len(booked) == 3 and len(set(booked)) == 3
+
+
+@pytest.fixture
+def full(client, auth_headers, schedules):
+    """Seats 1 and 2 booked on schedule 1, which sells no more"""
+    headers = auth_headers(PASSENGER, 'passenger')
+    return headers, [book(client, headers, 1, seat) for seat in (1, 2)]
+
+
+def test_move_seat_on_full_schedule(app, client, full):
+    headers, (first, second) = full
+    response = client.put(f'/bookings/{first}', headers=headers, json={'seat_number': 3})
+    assert response.status_code == 200
+    assert response.get_json()['seat_number'] == 3
+    assert state(app) == ({1: 0, 2: 3}, {first: (1, 3), second: (1, 2)})
+
+
+@pytest.mark.parametrize('seat_number, status', [(2, 409), (5, 409), ('front', 400)])
+def test_rejected_move_changes_nothing(app, client, full, seat_number, status):
+    headers, (first, second) = full
+    before = state(app)
+    response = client.put(f'/bookings/{first}', headers=headers, json={'seat_number': seat_number})
+    assert response.status_code == status
+    assert state(app) == before
+
+
+def test_same_seat_is_not_a_move(app, client, full):
+    headers, (first, second) = full
+    before = state(app)
+    response = client.put(f'/bookings/{first}', headers=headers, json={'seat_number': '1', 'payment_status': True})
+    assert response.status_code == 200
+    assert response.get_json()['payment_status'] is True
+    assert state(app) == before
+
+
+def test_move_to_another_schedule(app, client, full):
+    headers, (first, second) = full
+    response = client.put(f'/bookings/{first}', headers=headers, json={'schedule_id': 2, 'seat_number': 1})
+    assert response.status_code == 200
+    assert state(app) == ({1: 1, 2: 2}, {first: (2, 1), second: (1, 2)})
+
+
+def test_move_into_full_schedule_is_refused(app, client, full):
+    headers, (first, second) = full
+    other = book(client, headers, 2, 1)
+    before = state(app)
+    response = client.put(f'/bookings/{other}', headers=headers, json={'schedule_id': 1, 'seat_number': 3})
+    assert response.status_code == 409
+    assert state(app) == before
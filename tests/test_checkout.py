@@ -0,0 +1,99 @@
+"""POST /checkout: whole carts in one transaction, and stock that never goes negative"""
+import threading
+from collections import Counter
+
+import pytest
+from sqlalchemy import func, select
+
+from model import db, Order, OrderItem, Product, Stall, User
+
+STOCK = 50
+BUYERS = 16
+CHECKOUTS_PER_BUYER = 10
+
+
+@pytest.fixture
+def products(app):
+    """Products 1-3 with STOCK units each, and buyers 1..BUYERS"""
+    with app.app_context():
+        db.session.add(Stall(id=1, seller_id=1, stall_name='Mama Mboga', location='Gikomba'))
+        db.session.bulk_insert_mappings(Product, [
+            {'id': product_id, 'name': f'Product {product_id}', 'price': 10.0 * product_id, 'available_quantity': STOCK,
+             'sold_quantity': 0, 'stall_id': 1, 'stall_name': 'Mama Mboga'} for product_id in (1, 2, 3)
+        ])
+        db.session.bulk_insert_mappings(User, [
+            {'id': user_id, 'username': f'buyer{user_id}', 'email': f'buyer{user_id}@example.com',
+             'password_hash': 'x', 'role': 'buyer'} for user_id in range(1, BUYERS + 1)
+        ])
+        db.session.commit()
+
+
+def stock(app):
+    with app.app_context():
+        return dict(db.session.execute(select(Product.id, Product.available_quantity)).all())
+
+
+def test_cart_is_ordered_in_full(app, client, auth_headers, products):
+    response = client.post('/checkout', headers=auth_headers(1, 'buyer'), json={'items': [
+        {'product_id': 2, 'quantity': 3}, {'product_id': 1, 'quantity': 1}, {'product_id': 2, 'quantity': 1},
+    ]})
+    assert response.status_code == 201
+    order = response.get_json()['order']
+    assert order['total_price'] == 90
+    assert [(item['product_id'], item['quantity']) for item in order['items']] == [(1, 1), (2, 4)]
+    assert stock(app) == {1: STOCK - 1, 2: STOCK - 4, 3: STOCK}
+
+
+def test_short_item_rolls_back_the_whole_cart(app, client, auth_headers, products):
+    response = client.post('/checkout', headers=auth_headers(1, 'buyer'), json={'items': [
+        {'product_id': 1, 'quantity': 1}, {'product_id': 3, 'quantity': STOCK + 1},
+    ]})
+    assert response.status_code == 409
+    assert response.get_json()['product_id'] == 3
+    assert stock(app) == {1: STOCK, 2: STOCK, 3: STOCK}
+    with app.app_context():
+        assert db.session.execute(select(func.count(Order.id))).scalar() == 0
+
+
+@pytest.mark.parametrize('items, status', [
+    ([{'product_id': 99, 'quantity': 1}], 404),
+    ([{'product_id': 1, 'quantity': 0}], 400),
+    ([], 400),
+])
+def test_bad_carts_are_rejected(app, client, auth_headers, products, items, status):
+    assert client.post('/checkout', headers=auth_headers(1, 'buyer'), json={'items': items}).status_code == status
+    assert stock(app) == {1: STOCK, 2: STOCK, 3: STOCK}
+
+
+def test_concurrent_buyers_never_oversell(app, auth_headers, products):
+    """Every buyer keeps buying the same hot product (plus another) until it runs out"""
+    statuses = Counter()
+    lock = threading.Lock()
+    start = threading.Barrier(BUYERS)
+
+    def buyer(user_id):
+        client, headers = app.test_client(), auth_headers(user_id, 'buyer')
+        start.wait()
+        for n in range(CHECKOUTS_PER_BUYER):
+            response = client.post('/checkout', headers=headers, json={'items': [
+                {'product_id': 1, 'quantity': 1 + (user_id + n) % 3}, {'product_id': 2 + n % 2, 'quantity': 1},
+            ]})
+            with lock:
+                statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=buyer, args=(user_id,)) for user_id in range(1, BUYERS + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(statuses) <= {201, 409}
+    assert statuses[409], "the hot product should have run out"
+    with app.app_context():
+        ordered = dict(db.session.execute(
+            select(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(OrderItem.product_id)).all())
+        assert db.session.execute(select(func.count(Order.id))).scalar() == statuses[201]
+        for product in db.session.execute(select(Product)).scalars():
+            assert product.available_quantity >= 0
+            assert product.available_quantity == STOCK - ordered.get(product.id, 0)
+            assert product.sold_quantity == ordered.get(product.id, 0)
@@ -0,0 +1,103 @@
+"""Callbacks for seats held during an STK push: booked when paid in time, flagged for refund when not"""
+import json
+import time
+from datetime import date, time as clock
+
+import pytest
+from sqlalchemy import func, select
+
+from model import db, Booking, Bus, Payment, Schedule, User
+from utils import seat_holds
+from utils.payment_callbacks import REFUND_DUE, drain, get_callback_queue
+from utils.seat_holds import get_hold_store, hold_seat
+
+PASSENGER = 1
+TTL = 300
+
+
+class Daraja:
+    """Answers STK push queries with the result code each transaction was given"""
+
+    def __init__(self):
+        self.results = {}
+
+    def stk_query(self, transaction_id):
+        return {'ResultCode': str(self.results[transaction_id])}
+
+
+@pytest.fixture
+def app_config():
+    return {'SEAT_HOLD_TTL': TTL}
+
+
+@pytest.fixture
+def daraja(app):
+    """A 4-seat schedule, the passenger's account, and a fake Daraja"""
+    with app.app_context():
+        db.session.add(User(id=PASSENGER, username='akinyi', email='akinyi@example.com', password_hash='x', role='passenger'))
+        db.session.add(Bus(id=1, bus_number='KDA 001A', seat_capacity=4))
+        db.session.add(Schedule(id=1, bus_id=1, departure_time=clock(8), arrival_time=clock(10),
+                                date=date(2026, 1, 1), available_seats=4))
+        db.session.commit()
+        app.extensions['mpesa'] = Daraja()
+        return app.extensions['mpesa']
+
+
+def pay_for_seat(daraja, transaction_id, seat_number):
+    """What POST /stkpush does for a held seat: hold it, bind the hold, and record a pending payment"""
+    hold = hold_seat(1, PASSENGER, PASSENGER, seat_number)
+    get_hold_store().bind(hold.hold_id, transaction_id)
+    db.session.add(Payment(transaction_id=transaction_id, amount=100, status='pending', schedule_id=1))
+    db.session.commit()
+    daraja.results[transaction_id] = 0
+
+
+def settle(transaction_id):
+    """Queue Daraja's success callback, apply it, and return (payment status, booking id, seats left)"""
+    get_callback_queue().put(json.dumps({'Body': {'stkCallback': {
+        'MerchantRequestID': 'test', 'CheckoutRequestID': transaction_id, 'ResultCode': 0,
+        'ResultDesc': 'The service request is processed successfully.',
+    }}}))
+    drain()
+    status, booking_id = db.session.execute(
+        select(Payment.status, Payment.booking_id).where(Payment.transaction_id == transaction_id)).one()
+    return status, booking_id, db.session.get(Schedule, 1).available_seats
+
+
+def test_paid_in_time(app, daraja):
+    with app.app_context():
+        pay_for_seat(daraja, 'ws_CO_1', 2)
+        status, booking_id, available = settle('ws_CO_1')
+        assert (status, available) == ('completed', 3)
+        assert db.session.get(Booking, booking_id).seat_number == 2
+        assert get_hold_store().get_by_transaction('ws_CO_1') is None
+
+
+def test_paid_after_the_hold_expired(app, client, auth_headers, daraja, monkeypatch):
+    with app.app_context():
+        pay_for_seat(daraja, 'ws_CO_1', 2)
+        later = time.time() + TTL + 1
+        monkeypatch.setattr(seat_holds.time, 'time', lambda: later)
+        assert settle('ws_CO_1') == (REFUND_DUE, None, 4)
+        assert db.session.execute(select(func.count(Booking.id))).scalar() == 0
+
+    response = client.get('/payment_status/ws_CO_1', headers=auth_headers(PASSENGER, 'passenger'))
+    assert response.get_json() == {'status': REFUND_DUE}
+
+
+def test_paid_after_the_seat_was_taken(app, daraja):
+    with app.app_context():
+        pay_for_seat(daraja, 'ws_CO_1', 2)
+        # Booked at the counter without checking holds
+        db.session.add(Booking(schedule_id=1, passenger_id=2, seat_number=2, ticket_number='T1'))
+        db.session.commit()
+        assert settle('ws_CO_1') == (REFUND_DUE, None, 4)
+        assert get_hold_store().get_by_transaction('ws_CO_1') is None
+
+
+def test_payment_without_a_seat_completes(app, daraja):
+    with app.app_context():
+        db.session.add(Payment(transaction_id='ws_CO_1', amount=100, status='pending'))
+        db.session.commit()
+        daraja.results['ws_CO_1'] = 0
+        assert settle('ws_CO_1') == ('completed', None, 4)
@@ -0,0 +1,72 @@
+"""GET /stalls/nearby against a full scan, and coordinates through PUT /stalls"""
+import math
+import random
+
+import pytest
+
+from model import db, Stall
+from utils.geo import CROWD, METERS_PER_DEGREE
+
+MARKET = (-1.2833, 36.8219)
+
+
+@pytest.fixture
+def app_config():
+    return {'RESPONSE_CACHE_BACKEND': 'none'}
+
+
+@pytest.fixture
+def stalls(app):
+    """A crowded market, more stalls than CROWD on one spot, and stalls scattered around"""
+    rng = random.Random(3)
+    points = [(MARKET[0] + rng.uniform(-0.002, 0.002), MARKET[1] + rng.uniform(-0.002, 0.002)) for _ in range(2000)]
+    points += [(MARKET[0] + 0.01, MARKET[1] + 0.01)] * (CROWD * 2)
+    points += [(MARKET[0] + rng.uniform(-0.3, 0.3), MARKET[1] + rng.uniform(-0.3, 0.3)) for _ in range(300)]
+    with app.app_context():
+        db.session.bulk_insert_mappings(Stall, [
+            {'id': n, 'stall_name': f'Stall {n}', 'location': 'Gikomba', 'latitude': lat, 'longitude': lng}
+            for n, (lat, lng) in enumerate(points, 1)
+        ])
+        db.session.commit()
+    return dict(enumerate(points, 1))
+
+
+def nearby(client, lat, lng, radius, limit=10):
+    response = client.get('/stalls/nearby', query_string={'lat': lat, 'lng': lng, 'radius': radius, 'limit': limit})
+    assert response.status_code == 200
+    return [stall['id'] for stall in response.get_json()]
+
+
+def scan(stalls, lat, lng, radius, limit=10):
+    scale = math.cos(math.radians(lat))
+    reach = radius / METERS_PER_DEGREE
+    near = sorted((math.hypot(row_lat - lat, (row_lng - lng) * scale), id) for id, (row_lat, row_lng) in stalls.items())
+    return [id for distance, id in near if distance <= reach][:limit]
+
+
+@pytest.mark.parametrize('lat, lng', [
+    MARKET,
+    (MARKET[0] + 0.01, MARKET[1] + 0.01),
+    (MARKET[0] + 0.0101, MARKET[1] + 0.0099),
+    (MARKET[0] + 0.05, MARKET[1] - 0.04),
+    (MARKET[0] - 0.25, MARKET[1] + 0.25),
+])
+@pytest.mark.parametrize('radius', [1000, 50000])
+def test_same_stalls_as_a_full_scan(client, stalls, lat, lng, radius):
+    assert nearby(client, lat, lng, radius) == scan(stalls, lat, lng, radius)
+
+
+def test_nothing_within_radius(client, stalls):
+    assert nearby(client, 1.0, 38.0, 1000) == []
+
+
+def test_put_without_coordinates_keeps_them(app, client, stalls):
+    body = {'stall_name': 'Renamed', 'location': 'Gikomba', 'image_url': None}
+    assert client.put('/stalls/1', json=body).status_code == 200
+    with app.app_context():
+        stall = db.session.get(Stall, 1)
+        assert (stall.latitude, stall.longitude) == stalls[1]
+    assert 1 in nearby(client, *stalls[1], 100)
+
+    assert client.put('/stalls/1', json=dict(body, latitude=None, longitude=None)).status_code == 200
+    assert 1 not in nearby(client, *stalls[1], 100)
@@ -0,0 +1,30 @@
+"""Bad `limit`, `after` and `fields` params are the client's mistake: 400, never 500"""
+import pytest
+
+from model import db, Driver, Ticket, User
+
+ADMIN = 1
+
+
+@pytest.fixture
+def rows(app):
+    with app.app_context():
+        db.session.add(User(id=ADMIN, username='admin', email='admin@example.com', password_hash='x', role='admin'))
+        db.session.add(Ticket(id=1, route_id=1, passenger_id=1, seat_number='A1'))
+        db.session.add(Driver(id=1, name='Otieno', email='otieno@example.com', contact_info='0711000000'))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('url', ['/admin', '/tickets', '/drivers'])
+@pytest.mark.parametrize('params', ['limit=abc', 'limit=0', 'after=garbage', 'fields=password_hash'])
+def test_bad_paging_params(client, auth_headers, rows, url, params):
+    response = client.get(f'{url}?{params}', headers=auth_headers(ADMIN, 'admin'))
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'fail'
+
+
+@pytest.mark.parametrize('url, key', [('/admin', 'users'), ('/tickets', 'tickets')])
+def test_good_paging_params(client, auth_headers, rows, url, key):
+    response = client.get(f'{url}?limit=1', headers=auth_headers(ADMIN, 'admin'))
+    assert response.status_code == 200
+    assert len(response.get_json()[key]) == 1
@@ -0,0 +1,51 @@
+"""GET /products/search: which matches are ranked, and in what order"""
+import pytest
+
+from model import db, Product, Stall
+from utils.product_search import SEARCH_CANDIDATES
+
+
+@pytest.fixture
+def app_config():
+    return {'RESPONSE_CACHE_BACKEND': 'none'}
+
+
+@pytest.fixture
+def stall(app):
+    with app.app_context():
+        db.session.add(Stall(id=1, seller_id=1, stall_name='Zawadi Stall', location='Gikomba'))
+        db.session.commit()
+
+
+def add_products(app, *products):
+    with app.app_context():
+        db.session.add_all([Product(price=450, available_quantity=5, stall_id=1, stall_name='Zawadi Stall', **product)
+                            for product in products])
+        db.session.commit()
+
+
+def names(client, q, limit=10):
+    response = client.get('/products/search', query_string={'q': q, 'limit': limit})
+    assert response.status_code == 200
+    return [product['name'] for product in response.get_json()]
+
+
+def test_name_match_outranks_a_bestseller_in_the_description(app, client, stall):
+    add_products(app, {'name': 'Kiondo Bag', 'description': 'Woven leso pattern', 'sold_quantity': 400},
+                 {'name': 'Leso Wrap', 'description': 'Printed cotton', 'sold_quantity': 0})
+    assert names(client, 'leso') == ['Leso Wrap', 'Kiondo Bag']
+
+
+def test_old_bestseller_is_not_crowded_out_by_newer_matches(app, client, stall):
+    add_products(app, {'name': 'Leso Classic', 'description': 'Printed cotton', 'sold_quantity': 250})
+    add_products(app, *[{'name': f'Leso {n}', 'description': 'Printed cotton', 'sold_quantity': n % 2}
+                        for n in range(SEARCH_CANDIDATES + 50)])
+    assert names(client, 'leso', 3)[0] == 'Leso Classic'
+    assert names(client, 'les', 3)[0] == 'Leso Classic'
+
+
+def test_every_word_must_match(app, client, stall):
+    add_products(app, {'name': 'Leso Wrap', 'description': 'Printed cotton', 'sold_quantity': 0},
+                 {'name': 'Leso Scarf', 'description': 'Silk', 'sold_quantity': 9})
+    assert names(client, 'leso cot') == ['Leso Wrap']
+    assert names(client, 'leso cotton') == ['Leso Wrap']
@@ -0,0 +1,105 @@
+"""
+Query-plan regression tests. Each request is driven through the test client, every
+SELECT/UPDATE/DELETE it issues is recorded, and EXPLAIN QUERY PLAN must not show a
+full table scan.
+
+A bare `SCAN <table>` is only accepted for an unfiltered, LIMITed walk in primary-key
+order (the first page of a keyset-paginated listing) that needs no temp B-tree to sort.
+"""
+from datetime import date, time
+
+import pytest
+
+from model import db, Booking, Bus, Driver, Order, OrderItem, Payment, Product, Route, Schedule, Seller, Stall, Ticket, User
+
+# (method, url, role, json body, expected status); role None means no token
+REQUESTS = [
+    ('GET', '/routes', None, None, 200),
+    ('GET', '/routes?after=WzFd&limit=1', None, None, 200),
+    ('GET', '/routes/1', None, None, 200),
+    ('GET', '/schedules', None, None, 200),
+    ('GET', '/schedules/1', None, None, 200),
+    ('GET', '/trips/search?origin=CBD&destination=Westlands&date=2024-08-15', None, None, 200),
+    ('GET', '/buses', None, None, 200),
+    ('GET', '/stalls', None, None, 200),
+    ('GET', '/stalls/1', None, None, 200),
+    ('GET', '/products', None, None, 200),
+    ('GET', '/products/Mama%20Mboga', None, None, 200),
+    ('GET', '/orders', None, None, 200),
+    ('GET', '/orders/1', None, None, 200),
+    ('GET', '/order_items', None, None, 200),
+    ('GET', '/order_items/1', None, None, 200),
+    ('GET', '/drivers', None, None, 200),
+    ('GET', '/drivers/1', None, None, 200),
+    ('GET', '/tickets', None, None, 200),
+    ('GET', '/tickets/1', None, None, 200),
+    ('GET', '/drivers/1/tickets', None, None, 200),
+    ('GET', '/bookings', 'passenger', None, 200),
+    ('POST', '/bookings', 'passenger', {'schedule_id': 1, 'passenger_id': 1}, 201),
+    ('GET', '/buyers', 'buyer', None, 200),
+    ('POST', '/checkout', 'buyer', {'items': [{'product_id': 1, 'quantity': 2}]}, 201),
+    ('POST', '/buyers', 'buyer', {'product_id': 1, 'quantity': 1}, 200),
+    ('GET', '/sellers', 'seller', None, 200),
+    ('GET', '/sellers?start_date=2024-01-01&end_date=2030-12-31&after=WzBd', 'seller', None, 200),
+    ('GET', '/admin', 'admin', None, 200),
+    ('GET', '/profile', 'passenger', None, 200),
+    ('GET', '/user', 'passenger', None, 200),
+    ('GET', '/payment_status/ws_CO_1', 'passenger', None, 200),
+    ('POST', '/login', None, {'email': 'pass@example.com', 'password': 'wrong'}, 401),
+    ('POST', '/forgot-password', None, {'email': 'pass@example.com'}, 200),
+]
+
+USERS = {'admin': 1, 'buyer': 2, 'passenger': 3, 'seller': 4}
+
+
+def seed():
+    for role, user_id in USERS.items():
+        db.session.add(User(id=user_id, username=role, email=f'{role[:4]}@example.com', password_hash='x', role=role))
+    db.session.add(Driver(id=1, name='Otieno', email='otieno@example.com', contact_info='0711000000'))
+    db.session.add(Bus(id=1, driver_id=1, bus_number='KBZ-001', seat_capacity=40))
+    db.session.add(Route(id=1, driver_id=1, origin='CBD', destination='Westlands'))
+    db.session.add(Schedule(id=1, bus_id=1, route_id=1, date=date(2024, 8, 15), departure_time=time(7), arrival_time=time(8), available_seats=40))
+    db.session.add(Ticket(id=1, route_id=1, passenger_id=3, seat_number='A1'))
+    db.session.add(Seller(id=1, user_id=4, stall_name='Mama Mboga', location='Gikomba', contact_info='0722000000'))
+    db.session.add(Stall(id=1, seller_id=1, stall_name='Mama Mboga', location='Gikomba'))
+    db.session.add(Product(id=1, name='Sukuma', price=20, available_quantity=10, stall_id=1, stall_name='Mama Mboga'))
+    db.session.add(Order(id=1, user_id=2, total_price=20))
+    db.session.add(OrderItem(id=1, order_id=1, product_id=1, quantity=1, unit_price=20))
+    db.session.add(Booking(id=1, user_id=3, passenger_id=3, schedule_id=1, seat_number=1, ticket_number='T1'))
+    db.session.add(Payment(id=1, amount=20, status='pending', transaction_id='ws_CO_1'))
+    db.session.commit()
+
+
+def full_scans(plan, statement):
+    statement = ' '.join(statement.split())
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        if not detail.startswith('SCAN ') or 'USING' in detail or detail == 'SCAN CONSTANT ROW':
+            continue
+        paginated = (' LIMIT ' in statement and ' WHERE ' not in statement
+                     and not any('TEMP B-TREE' in r[-1] for r in plan))
+        if not paginated:
+            scans.append(detail)
+    return scans
+
+
+@pytest.mark.parametrize('method, url, role, body, status', REQUESTS, ids=[f'{method} {url}' for method, url, *_ in REQUESTS])
+def test_no_full_scans(app, client, auth_headers, sql_statements, method, url, role, body, status):
+    with app.app_context():
+        seed()
+    headers = auth_headers(USERS[role], role) if role else {}
+    sql_statements.clear()
+    response = client.open(url, method=method, json=body, headers=headers)
+    assert response.status_code == status
+    assert sql_statements
+
+    scanned = []
+    recorded = list(sql_statements)
+    with app.app_context(), db.engine.connect() as conn:
+        for statement, parameters in recorded:
+            if statement.lstrip().split(None, 1)[0].upper() not in ('SELECT', 'UPDATE', 'DELETE'):
+                continue
+            plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+            scanned += [f"{scan}: {' '.join(statement.split())[:200]}" for scan in full_scans(plan, statement)]
+    assert not scanned
@@ -0,0 +1,72 @@
+"""Token bucket stores: buckets are only forgotten once they have refilled by their own limits"""
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import MemoryBucketStore, SqliteBucketStore
+
+STRICT = (3, 3 / 3600)
+LENIENT = (20, 20 / 60)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(rate_limit.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, clock, tmp_path):
+    if request.param == 'memory':
+        return MemoryBucketStore(prune_interval=60)
+    return SqliteBucketStore(str(tmp_path / 'rate_limit.db'))
+
+
+def bucket_count(store):
+    if isinstance(store, MemoryBucketStore):
+        return len(store._buckets)
+    return store._connect().execute('SELECT COUNT(*) FROM rate_buckets').fetchone()[0]
+
+
+def spend(store, key, limit):
+    allowed = 0
+    while not store.take(key, *limit):
+        allowed += 1
+    return allowed
+
+
+def test_burst_then_throttled(store):
+    assert spend(store, 'forgot-password:email:a', STRICT) == 3
+    assert store.take('forgot-password:email:a', *STRICT) == pytest.approx(1200, abs=1)
+
+
+def test_lenient_traffic_does_not_reset_a_strict_bucket(store, clock):
+    spend(store, 'forgot-password:email:a', STRICT)
+    for n in range(50):
+        store.take(f'login:ip:10.0.0.{n}', *LENIENT)
+    # Long enough for every login bucket to refill, and for a prune to run
+    clock[0] += 120
+    store.take('login:ip:10.0.1.1', *LENIENT)
+    assert store.take('forgot-password:email:a', *STRICT)
+
+
+def test_partly_spent_bucket_is_kept(store, clock):
+    store.take('forgot-password:email:a', *STRICT)
+    clock[0] += 600
+    store.take('login:ip:10.0.0.1', *LENIENT)
+    # Two tokens left plus what refilled in ten minutes, not a fresh burst of three
+    assert spend(store, 'forgot-password:email:a', STRICT) == 2
+
+
+def test_full_buckets_are_pruned_on_schedule(store, clock):
+    for n in range(10):
+        store.take(f'login:ip:10.0.0.{n}', *LENIENT)
+    spend(store, 'forgot-password:email:a', STRICT)
+    clock[0] += 30
+    store.take('login:ip:10.0.1.1', *LENIENT)
+    assert bucket_count(store) == 12
+
+    clock[0] += 31
+    store.take('login:ip:10.0.1.2', *LENIENT)
+    # The login buckets filled up within 3 seconds; the strict one stays, plus the newest
+    assert bucket_count(store) == 2
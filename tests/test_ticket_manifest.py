@@ -0,0 +1,59 @@
+"""GET /drivers/<id>/tickets builds the whole manifest from a fixed number of statements"""
+import pytest
+
+from model import db, Driver, Route, Ticket
+
+
+def add_driver(driver_id, routes, tickets_per_route, first_route_id):
+    db.session.add(Driver(id=driver_id, name=f'Driver {driver_id}', email=f'd{driver_id}@example.com',
+                          contact_info=f'07000000{driver_id:02d}'))
+    route_ids = range(first_route_id, first_route_id + routes)
+    db.session.bulk_insert_mappings(Route, [
+        {'id': route_id, 'driver_id': driver_id, 'origin': 'CBD', 'destination': f'Stop {route_id}'} for route_id in route_ids
+    ])
+    db.session.bulk_insert_mappings(Ticket, [
+        {'route_id': route_id, 'passenger_id': n, 'seat_number': f'A{n}'}
+        for route_id in route_ids for n in range(tickets_per_route)
+    ])
+
+
+@pytest.fixture
+def drivers(app):
+    """Drivers 1-4 with 1, 10, 100 and 500 routes of 3 tickets each"""
+    with app.app_context():
+        first_route_id = 1
+        for driver_id, routes in enumerate((1, 10, 100, 500), start=1):
+            add_driver(driver_id, routes, 3, first_route_id)
+            first_route_id += routes
+        db.session.commit()
+    return {1: 1, 2: 10, 3: 100, 4: 500}
+
+
+def test_statement_count_does_not_grow_with_routes(client, drivers, sql_statements):
+    counts = set()
+    for driver_id, routes in drivers.items():
+        sql_statements.clear()
+        response = client.get(f'/drivers/{driver_id}/tickets')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['routes']) == routes
+        assert all(route['booked_seats'] == 3 and len(route['tickets']) == 3 for route in body['routes'])
+        counts.add(len(sql_statements))
+    assert len(counts) == 1
+    assert counts.pop() <= 2
+
+
+def test_routes_without_tickets_are_left_out(app, client):
+    with app.app_context():
+        add_driver(1, 2, 0, 1)
+        db.session.add(Ticket(route_id=2, passenger_id=1, seat_number='A1'))
+        db.session.commit()
+    routes = client.get('/drivers/1/tickets').get_json()['routes']
+    assert [route['booked_seats'] for route in routes] == [1]
+
+
+def test_driver_without_routes_is_404(app, client):
+    with app.app_context():
+        add_driver(1, 0, 0, 1)
+        db.session.commit()
+    assert client.get('/drivers/1/tickets').status_code == 404
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import select
+
+from model import db, User
+
+
+class UserStatusCache:
+    """
+    Bounded LRU of user id -> whether the account may still use its tokens, with
+    entries expiring after `ttl` seconds. The cache lives in each worker process, so
+    invalidate() only reaches the worker that made the change. Other workers pick it
+    up within `ttl`.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        """Cached status, or None when unknown or expired"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            active, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return active
+
+    def set(self, user_id, active):
+        with self._lock:
+            self._entries[user_id] = (active, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_status_cache():
+    """The app's user status cache, built on first use from AUTH_CACHE_SIZE and AUTH_CACHE_TTL"""
+    cache = current_app.extensions.get('user_status')
+    if cache is None:
+        cache = UserStatusCache(current_app.config.get('AUTH_CACHE_SIZE', 10000),
+                                current_app.config.get('AUTH_CACHE_TTL', 60))
+        current_app.extensions['user_status'] = cache
+    return cache
+
+
+def user_is_active(user_id):
+    """False once the user is deleted or deactivated; only queries on a cache miss"""
+    cache = get_status_cache()
+    active = cache.get(user_id)
+    if active is None:
+        row = db.session.execute(select(User.is_active).where(User.id == user_id)).first()
+        # Rows from before is_active existed hold NULL and count as active
+        active = row is not None and row.is_active is not False
+        cache.set(user_id, active)
+    return active
+
+
+def invalidate_user(user_id):
+    """Forget the cached status after the user is deleted, deactivated or edited"""
+    get_status_cache().invalidate(user_id)
+
+
+def role_required(*roles):
+    """
+    Replacement for @jwt_required() that also authorizes the caller. The role is
+    read from the signed identity that LoginResource puts in the token, so it is
+    trusted without loading the user. Only the user's active status is checked,
+    through the cache. With no `roles`, any active user is let through.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            identity = get_jwt_identity()
+            if roles and identity.get('role') not in roles:
+                return {"message": "Unauthorized access", "status": "fail"}, 403
+            if not user_is_active(identity['id']):
+                return {"message": "User not found or inactive", "status": "fail"}, 401
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,96 @@
+from collections import Counter
+
+from sqlalchemy import insert, select, update
+
+from model import db, Order, OrderItem, Product
+
+
+class OutOfStock(Exception):
+    """Raised when a cart asks for more of a product than is left"""
+
+    def __init__(self, product_id, message=None):
+        super().__init__(message or f"Product {product_id} does not have enough stock")
+        self.product_id = product_id
+
+
+class ProductNotFound(Exception):
+    """Raised when a cart refers to products that do not exist"""
+
+    def __init__(self, product_ids):
+        super().__init__(f"Products not found: {', '.join(map(str, product_ids))}")
+        self.product_ids = product_ids
+
+
+def parse_cart(items):
+    """
+    Turn [{'product_id': .., 'quantity': ..}, ...] into {product_id: quantity}, merging
+    repeated products. Raises ValueError on malformed lines.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError("'items' must be a non-empty list")
+
+    cart = Counter()
+    for item in items:
+        try:
+            product_id, quantity = int(item['product_id']), int(item['quantity'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Each item needs an integer 'product_id' and 'quantity'")
+        if quantity < 1:
+            raise ValueError("'quantity' must be greater than 0")
+        cart[product_id] += quantity
+    return cart
+
+
+def checkout(user_id, cart):
+    """
+    Place one order for every product in `cart` ({product_id: quantity}) inside the
+    current transaction. Returns the Order and the dicts its items were inserted from.
+
+    All products are read with a single IN query, which catches unknown products and
+    obvious shortfalls before anything is written. Stock is then taken with one
+    conditional UPDATE per product that only matches while enough is left, so two
+    buyers can never both take the last units: whoever loses sees no matching row
+    and gets OutOfStock. Products are updated in id order so concurrent carts lock
+    rows in the same order. The order and all of its items are inserted in two
+    statements. The caller commits, or rolls back on any exception.
+    """
+    product_ids = sorted(cart)
+    products = {
+        row.id: row for row in db.session.execute(
+            select(Product.id, Product.price, Product.available_quantity).where(Product.id.in_(product_ids))
+        )
+    }
+    missing = [product_id for product_id in product_ids if product_id not in products]
+    if missing:
+        raise ProductNotFound(missing)
+    for product_id in product_ids:
+        if products[product_id].available_quantity < cart[product_id]:
+            raise OutOfStock(product_id)
+
+    for product_id in product_ids:
+        quantity = cart[product_id]
+        taken = db.session.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.available_quantity >= quantity)
+            .values(
+                available_quantity=Product.available_quantity - quantity,
+                sold_quantity=db.func.coalesce(Product.sold_quantity, 0) + quantity,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not taken:
+            raise OutOfStock(product_id)
+
+    total_price = round(sum(products[product_id].price * cart[product_id] for product_id in product_ids), 2)
+    order = Order(user_id=user_id, total_price=total_price, status='pending')
+    db.session.add(order)
+    db.session.flush()
+
+    items = [{
+        'order_id': order.id,
+        'product_id': product_id,
+        'quantity': cart[product_id],
+        'unit_price': products[product_id].price,
+    } for product_id in product_ids]
+    db.session.execute(insert(OrderItem), items)
+    return order, items
@@ -0,0 +1,51 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from model import db
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database. Server databases get a
+    bounded pool per worker whose connections are checked before use and replaced
+    before the server or a proxy drops them. SQLite keeps SQLAlchemy's pool; its
+    settings are applied per connection by init_database().
+    """
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+
+def sqlite_pragmas(journal_mode='WAL', synchronous='NORMAL', busy_timeout=5000, mmap_size=0):
+    """
+    A connect listener for SQLite. In WAL mode readers no longer wait for a writer to
+    commit, and synchronous=NORMAL only syncs at checkpoints, which can lose the last
+    commits on power loss but never corrupts the database. Writers still take turns;
+    busy_timeout (ms) is how long one waits for the lock before "database is locked".
+    """
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+        cursor.execute(f'PRAGMA synchronous={synchronous}')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout)}')
+        cursor.execute(f'PRAGMA mmap_size={int(mmap_size)}')
+        cursor.close()
+
+    return on_connect
+
+
+def init_database(app):
+    """Set SQLite's pragmas on every connection the app's engines open. Call after db.init_app()."""
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', sqlite_pragmas(
+                    app.config['SQLITE_JOURNAL_MODE'], app.config['SQLITE_SYNCHRONOUS'],
+                    app.config['SQLITE_BUSY_TIMEOUT'], app.config['SQLITE_MMAP_SIZE'],
+                ))
@@ -0,0 +1,182 @@
+import heapq
+import math
+from contextlib import closing
+
+from flask import request
+from flask_restful import abort
+from sqlalchemy import DDL, event, select, text
+
+from model import db, Bus, Stall
+
+# Tables with latitude/longitude columns under a spatial index, named after them
+GEO_TABLES = (Stall.__table__, Bus.__table__)
+
+
+def sqlite_ddl(table):
+    """
+    An R-tree of the rows' points, kept in step by triggers. Rows without both
+    coordinates aren't in it, so they are never near anything.
+    """
+    return (
+        f"CREATE VIRTUAL TABLE {table}_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+        f"""CREATE TRIGGER {table}_rtree_insert AFTER INSERT ON {table}
+            WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+            INSERT INTO {table}_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+        END""",
+        f"""CREATE TRIGGER {table}_rtree_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM {table}_rtree WHERE id = old.id;
+        END""",
+        f"""CREATE TRIGGER {table}_rtree_update AFTER UPDATE OF latitude, longitude ON {table} BEGIN
+            DELETE FROM {table}_rtree WHERE id = old.id;
+            INSERT INTO {table}_rtree SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+            WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+        END""",
+    )
+
+
+def postgres_ddl(table):
+    """A GiST index over the rows' points, which box containment queries walk"""
+    return (f"CREATE INDEX ix_{table}_location_gist ON {table} USING gist (point(longitude, latitude))",)
+
+
+# Length of a degree of latitude, and of longitude at the equator
+METERS_PER_DEGREE = 6371008.8 * math.pi / 180
+
+DEFAULT_RADIUS = 5000
+MAX_RADIUS = 50000
+
+# The most rows _rtree_nearest reads from one box of the R-tree before splitting it
+CROWD = 32
+
+
+def parse_point():
+    """`lat`, `lng` and `radius` (meters) from the query string; 400 when they're missing or out of range"""
+    try:
+        lat, lng = float(request.args['lat']), float(request.args['lng'])
+        radius = float(request.args.get('radius', DEFAULT_RADIUS))
+    except KeyError:
+        abort(400, message="'lat' and 'lng' are required", status='fail')
+    except ValueError:
+        abort(400, message="'lat', 'lng' and 'radius' must be numbers", status='fail')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        abort(400, message="'lat' must be within -90..90 and 'lng' within -180..180", status='fail')
+    if not 0 < radius <= MAX_RADIUS:
+        abort(400, message=f"'radius' must be greater than 0 and at most {MAX_RADIUS} meters", status='fail')
+    return lat, lng, radius
+
+
+def _rtree_nearest(table, lat, lng, reach, limit):
+    """
+    Ids of rows that include the `limit` nearest (lat, lng) within `reach` degrees. The
+    R-tree only answers box queries, so boxes are searched best first: they come off a
+    heap by the least distance they allow, and one holding more than CROWD rows (asked
+    for with a LIMIT, so it costs no more than that) is split in four rather than read.
+    Once `limit` rows are found, boxes farther than the farthest of them are never
+    asked for, so a crowded market only costs the few boxes on the way to the answer.
+    The R-tree keeps coordinates as 32-bit floats rounded outward, a few meters wide
+    this far from Greenwich, so each row is a tiny box too: rows that could be nearer
+    than the `limit`th could be far are kept for the exact ranking.
+    """
+    scale = math.cos(math.radians(lat))
+    read = f"""
+        SELECT id, min_lat, max_lat, min_lng, max_lng FROM {table}_rtree
+        WHERE max_lat >= :south AND min_lat <= :north AND max_lng >= :west AND min_lng <= :east LIMIT :most
+    """
+
+    def gap(south, north, west, east):
+        dy = south - lat if lat < south else lat - north if lat > north else 0.0
+        dx = (west - lng if lng < west else lng - east if lng > east else 0.0) * scale
+        return dy * dy + dx * dx
+
+    def span(south, north, west, east):
+        dy = max(abs(south - lat), abs(north - lat))
+        dx = max(abs(west - lng), abs(east - lng)) * scale
+        return dy * dy + dx * dx
+
+    # Boxes are in plain degrees; east-west they are as wide as `reach` is on the ground
+    wide = reach / max(scale, 1e-9)
+    heap = [(0.0, lat - reach, lat + reach, lng - wide, lng + wide)]
+    bound = reach * reach
+    found = {}
+    # Straight to the driver: a lookup is dozens of small reads, and SQLAlchemy's own
+    # work per statement would be most of the time
+    with closing(db.session.connection().connection.cursor()) as cursor:
+        while heap:
+            distance, south, north, west, east = heapq.heappop(heap)
+            if distance > bound:
+                break
+            # A box this small only holds rows the R-tree can't tell apart; read them all
+            tiny = north - south < 1e-7
+            rows = cursor.execute(read, {'south': south, 'north': north, 'west': west, 'east': east,
+                                         'most': -1 if tiny else CROWD + 1}).fetchall()
+            if len(rows) > CROWD and not tiny:
+                middle, center = (south + north) / 2, (west + east) / 2
+                for box in ((south, middle, west, center), (south, middle, center, east),
+                            (middle, north, west, center), (middle, north, center, east)):
+                    heapq.heappush(heap, (gap(*box), *box))
+                continue
+            for id, *box in rows:
+                found[id] = (gap(*box), span(*box))
+            if len(found) >= limit:
+                bound = min(bound, heapq.nsmallest(limit, [far for _, far in found.values()])[-1])
+    return [id for id, (near, _) in found.items() if near <= bound]
+
+
+def _postgres_nearest(table, lat, lng, reach, limit):
+    """
+    Ids of rows that include the `limit` nearest (lat, lng) within `reach` degrees. The
+    GiST index orders by distance in plain degrees, which overstates east-west
+    distances by up to 1/cos(lat); everything within that much of the farthest of the
+    first `limit` is taken for the exact ranking.
+    """
+    scale = math.cos(math.radians(lat))
+    first = db.session.execute(text(f"""
+        SELECT latitude, longitude FROM {table} WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        ORDER BY point(longitude, latitude) <-> point(:lng, :lat) LIMIT :limit
+    """), {'lat': lat, 'lng': lng, 'limit': limit}).all()
+    if len(first) == limit:
+        reach = min(reach, max(math.hypot(row.latitude - lat, (row.longitude - lng) * scale) for row in first))
+    return db.session.scalars(text(f"""
+        SELECT id FROM {table} WHERE point(longitude, latitude) <@ circle(point(:lng, :lat), :reach)
+    """), {'lat': lat, 'lng': lng, 'reach': reach / max(scale, 1e-9)}).all()
+
+
+def nearest(model, fields, lat, lng, radius, limit):
+    """
+    Rows of `fields` plus `distance` (squared, in degrees of latitude) for the `limit`
+    rows of `model` nearest (lat, lng) within `radius` meters, nearest first. The
+    spatial index narrows the table to about `limit` rows in logarithmic time, then
+    those are ranked on their stored coordinates. Distances are equirectangular: over
+    MAX_RADIUS that is within a fraction of a percent.
+    """
+    reach = radius / METERS_PER_DEGREE
+    candidates = {'postgresql': _postgres_nearest}.get(db.session.get_bind().dialect.name, _rtree_nearest)
+    ids = candidates(model.__tablename__, lat, lng, reach, limit)
+    if not ids:
+        return []
+    scale = math.cos(math.radians(lat))
+    dy = model.latitude - lat
+    dx = (model.longitude - lng) * scale
+    distance = (dy * dy + dx * dx).label('distance')
+    query = select(*[getattr(model, field) for field in fields], distance) \
+        .where(model.id.in_(ids), distance <= reach * reach) \
+        .order_by(distance, model.id).limit(limit)
+    return db.session.execute(query).all()
+
+
+def distance_m(row):
+    """A row's distance from `nearest` in meters"""
+    return round(math.sqrt(row.distance) * METERS_PER_DEGREE, 1)
+
+
+def _create_index(target, connection, **kw):
+    ddl = {'sqlite': sqlite_ddl, 'postgresql': postgres_ddl}.get(connection.dialect.name)
+    for statement in ddl(target.name) if ddl else ():
+        connection.execute(DDL(statement))
+
+
+def init_geo_index(app):
+    """Build the spatial indexes with their tables when the schema comes from create_all()"""
+    for table in GEO_TABLES:
+        if not event.contains(table, 'after_create', _create_index):
+            event.listen(table, 'after_create', _create_index)
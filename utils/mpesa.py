@@ -0,0 +1,168 @@
+import base64
+import threading
+import time
+from datetime import datetime
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SANDBOX_URL = 'https://sandbox.safaricom.co.ke'
+
+
+class MpesaError(Exception):
+    """Raised when Daraja cannot be reached or rejects a request"""
+
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class MpesaClient:
+    """
+    Daraja API client shared by every request thread of a worker.
+
+    Requests go through one keep-alive Session with a bounded connection pool and
+    (connect, read) timeouts. Failed connections are retried with exponential
+    backoff for every call. Reads and 5xx answers are only retried for the OAuth
+    GET, because replaying an STK push could prompt the customer twice.
+
+    The access token is refreshed single-flight: one thread fetches a new token while
+    the others wait for it, rather than each calling the OAuth endpoint. Within
+    `refresh_margin` seconds of expiry, the first caller refreshes early and the
+    others carry on with the old token, which is still valid.
+    """
+
+    def __init__(self, base_url, consumer_key, consumer_secret, short_code, passkey,
+                 timeout=(3.05, 15), retries=3, backoff=0.5, refresh_margin=60, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.short_code = short_code
+        self.passkey = passkey
+        self.timeout = timeout
+        self.refresh_margin = refresh_margin
+        self._credentials = base64.b64encode(f"{consumer_key}:{consumer_secret}".encode()).decode()
+
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET'}), raise_on_status=False,
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry))
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0
+
+    def _refresh(self):
+        try:
+            response = self.session.get(
+                f'{self.base_url}/oauth/v1/generate',
+                params={'grant_type': 'client_credentials'},
+                headers={'Authorization': f'Basic {self._credentials}'},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise MpesaError(f"Failed to get token: {e}")
+        if response.status_code != 200:
+            raise MpesaError("Failed to get token", response.status_code, response.text)
+
+        data = response.json()
+        self._token = data['access_token']
+        self._expires_at = time.monotonic() + int(data.get('expires_in', 3599))
+
+    def access_token(self):
+        token, expires_at, now = self._token, self._expires_at, time.monotonic()
+        if token and now < expires_at - self.refresh_margin:
+            return token
+
+        if token and now < expires_at:
+            # Still valid: refresh early unless another thread already is
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._refresh()
+                except MpesaError:
+                    pass
+                finally:
+                    self._lock.release()
+            return self._token
+
+        with self._lock:
+            if not self._token or time.monotonic() >= self._expires_at:
+                self._refresh()
+            return self._token
+
+    def invalidate_token(self, token):
+        with self._lock:
+            if self._token == token:
+                self._token, self._expires_at = None, 0
+
+    def _post(self, path, payload):
+        for attempt in range(2):
+            token = self.access_token()
+            try:
+                response = self.session.post(
+                    f'{self.base_url}{path}', json=payload,
+                    headers={'Authorization': f'Bearer {token}'}, timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                raise MpesaError(f"Error with M-Pesa request: {e}")
+            # A token revoked early is refetched once
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token(token)
+                continue
+            if response.status_code != 200:
+                raise MpesaError("M-Pesa request failed", response.status_code, response.text)
+            return response.json()
+
+    def password(self, timestamp):
+        return base64.b64encode(f"{self.short_code}{self.passkey}{timestamp}".encode()).decode()
+
+    def stk_push(self, phone, amount, callback_url, reference='NairobiKonnect',
+                 description='Payment for NairobiKonnect services'):
+        """Start an STK push to `phone` (2547XXXXXXXX); returns Daraja's response body"""
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        return self._post('/mpesa/stkpush/v1/processrequest', {
+            'BusinessShortCode': self.short_code,
+            'Password': self.password(timestamp),
+            'Timestamp': timestamp,
+            'TransactionType': 'CustomerPayBillOnline',
+            'Amount': amount,
+            'PartyA': phone,
+            'PartyB': self.short_code,
+            'PhoneNumber': phone,
+            'CallBackURL': callback_url,
+            'AccountReference': reference,
+            'TransactionDesc': description,
+        })
+
+    def stk_query(self, checkout_request_id):
+        """Daraja's own record of an STK push's result; returns its response body"""
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        return self._post('/mpesa/stkpushquery/v1/query', {
+            'BusinessShortCode': self.short_code,
+            'Password': self.password(timestamp),
+            'Timestamp': timestamp,
+            'CheckoutRequestID': checkout_request_id,
+        })
+
+
+def get_mpesa_client():
+    """The app's Daraja client, built on first use from the MPESA_* settings"""
+    client = current_app.extensions.get('mpesa')
+    if client is None:
+        config = current_app.config
+        client = MpesaClient(
+            base_url=config.get('MPESA_BASE_URL') or SANDBOX_URL,
+            consumer_key=config.get('MPESA_CONSUMER_KEY'),
+            consumer_secret=config.get('MPESA_CONSUMER_SECRET'),
+            short_code=config.get('MPESA_SHORT_CODE', '174379'),
+            passkey=config.get('MPESA_PASSKEY'),
+            timeout=(config.get('MPESA_CONNECT_TIMEOUT', 3.05), config.get('MPESA_READ_TIMEOUT', 15)),
+            retries=config.get('MPESA_RETRIES', 3),
+        )
+        current_app.extensions['mpesa'] = client
+    return client
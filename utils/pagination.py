@@ -0,0 +1,139 @@
+import base64
+import json
+from collections import namedtuple
+
+from flask import Response, request, stream_with_context
+from flask_restful import abort
+from sqlalchemy import select
+
+from model import db
+from utils.serializers import serializer_for
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Streamed lists: media type per `stream=` format, and rows fetched and encoded per chunk
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+STREAM_BATCH = 1000
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(json.dumps([last_id]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded.encode()))[0])
+    except (ValueError, TypeError, IndexError, KeyError):
+        abort(400, message="Invalid 'after' cursor", status='fail')
+
+
+def parse_limit():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        abort(400, message="'limit' must be an integer", status='fail')
+    if limit < 1:
+        abort(400, message="'limit' must be greater than 0", status='fail')
+    return min(limit, MAX_LIMIT)
+
+
+def parse_fields(only):
+    """Intersect the `fields=` query param with the fields a resource exposes"""
+    fields = request.args.get('fields')
+    if not fields:
+        return list(only)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in only]
+    if unknown:
+        abort(400, message='Unknown fields requested', status='fail', unknown_fields=unknown)
+    return requested
+
+
+def paginate(model, only, *criteria, as_json=False):
+    """
+    Keyset-paginate `model` on its primary key using the `limit`, `after` and `fields`
+    query params. Ids are assigned in insert order, so pages come out in creation order.
+    Only the projected columns are selected and the primary key index bounds the scan
+    to one page. Returns a Page of plain dicts (or a JSON array as bytes when `as_json`
+    is set) plus the cursor for the next page.
+    """
+    limit = parse_limit()
+    fields = parse_fields(only)
+    select_names = fields if 'id' in fields else fields + ['id']
+
+    query = select(*[getattr(model, name) for name in select_names]).where(*criteria)
+
+    after = request.args.get('after')
+    if after:
+        query = query.where(model.id > decode_cursor(after))
+
+    query = query.order_by(model.id).limit(limit + 1)
+    rows = db.session.execute(query).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]._mapping['id'])
+
+    serializer = serializer_for(model, tuple(fields))
+    if as_json:
+        return Page(serializer.rows_to_json(rows), next_cursor)
+    return Page([serializer.row_to_dict(row) for row in rows], next_cursor)
+
+
+def cursor_headers(page):
+    """Headers carrying the next cursor for endpoints that return a bare list"""
+    return {'X-Next-Cursor': page.next_cursor} if page.next_cursor else {}
+
+
+def stream_format():
+    """
+    'json' or 'ndjson' when the client asked for the whole list as a stream with the
+    `stream` query param, else None for a page. Being a query param, it is part of the
+    response cache key.
+    """
+    fmt = request.args.get('stream')
+    if fmt is not None and fmt not in STREAM_FORMATS:
+        abort(400, message="'stream' must be 'json' or 'ndjson'", status='fail')
+    return fmt
+
+
+def stream(model, only, *criteria, fmt='json', rename=None, envelope=('[', ']')):
+    """
+    Every row of `model` matching `criteria` (after the `after` cursor, with the `fields`
+    param applied) as a streamed response in id order. Rows are fetched STREAM_BATCH at
+    a time with yield_per and each batch is encoded and sent before the next is read,
+    so memory stays flat however many rows there are. `fmt` 'json' sends one array,
+    between the two halves of `envelope`; 'ndjson' sends one object per line.
+    `rename` maps fields to the keys they are written under.
+    """
+    fields = parse_fields(only)
+    query = select(*[getattr(model, name) for name in fields]).where(*criteria)
+
+    after = request.args.get('after')
+    if after:
+        query = query.where(model.id > decode_cursor(after))
+    query = query.order_by(model.id).execution_options(yield_per=STREAM_BATCH)
+
+    keys = tuple(rename.get(field, field) for field in fields) if rename else None
+    row_to_json = serializer_for(model, tuple(fields), keys).row_to_json
+
+    def generate():
+        batches = db.session.execute(query).partitions()
+        if fmt == 'ndjson':
+            for batch in batches:
+                yield ''.join([row_to_json(row) + '\n' for row in batch])
+            return
+        opening, closing = envelope
+        yield opening
+        separator = ''
+        for batch in batches:
+            yield separator + ','.join(map(row_to_json, batch))
+            separator = ','
+        yield closing
+
+    return Response(stream_with_context(generate()), status=200, mimetype=STREAM_FORMATS[fmt])
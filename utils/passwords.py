@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from flask import current_app
+from werkzeug.security import check_password_hash
+
+DEFAULT_ROUNDS = 12
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already queued to take another one in time"""
+
+
+def _secret(password):
+    # bcrypt only looks at the first 72 bytes; older hashes were made the same way
+    return password.encode('utf-8')[:72]
+
+
+def _bcrypt_rounds(stored_hash):
+    try:
+        return int(stored_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def hash_password(password, rounds=DEFAULT_ROUNDS, salt=None):
+    # `salt` (a full bcrypt salt string) is only passed for reproducible seed data
+    salt = salt.encode('ascii') if salt else bcrypt.gensalt(rounds)
+    return bcrypt.hashpw(_secret(password), salt).decode('utf-8')
+
+
+def verify_password(stored_hash, password, rounds=DEFAULT_ROUNDS):
+    """
+    Check `password` against a bcrypt hash (from flask_bcrypt) or a werkzeug hash
+    (pbkdf2/scrypt, from seed.py and older password changes). Returns (ok, new_hash).
+    new_hash is set when the password matched but the stored hash is in the other
+    format or uses a different cost, so the caller can store it.
+    """
+    if not stored_hash or not password:
+        return False, None
+
+    if stored_hash.startswith('$2'):
+        try:
+            ok = bcrypt.checkpw(_secret(password), stored_hash.encode('utf-8'))
+        except ValueError:
+            return False, None
+        stale = _bcrypt_rounds(stored_hash) != rounds
+    else:
+        ok = check_password_hash(stored_hash, password)
+        stale = True
+
+    if ok and stale:
+        return True, hash_password(password, rounds)
+    return ok, None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a pool of `workers` processes, so a burst of logins queues up in
+    the pool instead of pinning the web worker's CPU and request threads. At most
+    `max_pending` hashes wait at once. Callers beyond that get PasswordHasherBusy
+    after `timeout` seconds instead of piling up. With `workers=0` hashing runs
+    inline on the calling thread.
+    """
+
+    def __init__(self, rounds=DEFAULT_ROUNDS, workers=None, max_pending=None, timeout=5):
+        self.rounds = rounds
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending or max(self.workers, 1) * 16)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _executor(self):
+        with self._lock:
+            # A pool inherited through fork() has no live workers in the child
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                self._pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy("Too many password checks in progress, try again shortly")
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.rounds)
+
+    def verify(self, stored_hash, password):
+        """(ok, new_hash) as in verify_password(); store new_hash when it is set"""
+        return self._run(verify_password, stored_hash, password, self.rounds)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+def get_password_hasher():
+    """The app's hasher, built on first use from the PASSWORD_HASH_* settings"""
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None:
+        config = current_app.config
+        hasher = PasswordHasher(
+            rounds=config.get('PASSWORD_HASH_ROUNDS', DEFAULT_ROUNDS),
+            workers=config.get('PASSWORD_HASH_WORKERS'),
+            max_pending=config.get('PASSWORD_HASH_MAX_PENDING'),
+            timeout=config.get('PASSWORD_HASH_TIMEOUT', 5),
+        )
+        current_app.extensions['password_hasher'] = hasher
+    return hasher
@@ -0,0 +1,361 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+
+from model import db, Booking, Order, Payment
+from utils.mpesa import MpesaError, get_mpesa_client
+from utils.seats import SeatUnavailable
+from utils.payment_waiters import notify_payments
+from utils.seat_holds import confirm_hold, release_hold
+
+logger = logging.getLogger(__name__)
+
+Callback = namedtuple('Callback', ['checkout_request_id', 'result_code', 'result_desc', 'amount', 'receipt', 'phone'])
+QueuedCallback = namedtuple('QueuedCallback', ['id', 'payload', 'received_at', 'attempts'])
+
+# Daraja result codes with their own payment status; any other non-zero code is 'failed'
+RESULT_STATUSES = {0: 'completed', 1032: 'cancelled'}
+# A completed payment for a held seat that could not be booked, because the hold expired
+# or the seat was taken; the money has to go back to the passenger
+REFUND_DUE = 'refund_due'
+
+# Stops concurrent first callbacks from each starting a worker thread
+_start_lock = threading.Lock()
+
+
+def parse_callback(payload):
+    """Pull the fields we use out of a Daraja STK callback body. Raises ValueError for anything else."""
+    try:
+        body = payload['Body']['stkCallback']
+        checkout_request_id = str(body['CheckoutRequestID'])
+        result_code = int(body['ResultCode'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Not an STK push callback")
+    items = (body.get('CallbackMetadata') or {}).get('Item') or []
+    metadata = {item.get('Name'): item.get('Value') for item in items if isinstance(item, dict)}
+    return Callback(checkout_request_id, result_code, body.get('ResultDesc'),
+                    metadata.get('Amount'), metadata.get('MpesaReceiptNumber'), metadata.get('PhoneNumber'))
+
+
+class CallbackQueue:
+    """
+    Callbacks waiting to be applied, in a SQLite file next to the app so they survive
+    restarts. Every worker process on the host can put and claim. A claim leases its
+    rows for `lease` seconds so two workers never apply the same callback at once;
+    rows that are not acked by then are claimed again. Rows that keep failing are
+    kept with a NULL available_at for inspection instead of being retried forever.
+    """
+
+    def __init__(self, path, lease=60, max_attempts=5):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS mpesa_callbacks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payload TEXT NOT NULL,
+                    received_at REAL NOT NULL,
+                    available_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS ix_mpesa_callbacks_available_at ON mpesa_callbacks (available_at);
+            ''')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Daraja does not resend a callback we acknowledged, so a put must reach the disk
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+        return conn
+
+    def put(self, payload):
+        now = time.time()
+        self._connect().execute(
+            'INSERT INTO mpesa_callbacks (payload, received_at, available_at) VALUES (?, ?, ?)', (payload, now, now)
+        )
+
+    def claim(self, limit):
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT id, payload, received_at, attempts FROM mpesa_callbacks '
+                'WHERE available_at <= ? ORDER BY available_at, id LIMIT ?', (now, limit),
+            ).fetchall()
+            conn.executemany('UPDATE mpesa_callbacks SET available_at = ? WHERE id = ?',
+                             [(now + self.lease, row[0]) for row in rows])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return [QueuedCallback(*row) for row in rows]
+
+    def ack(self, ids):
+        self._connect().executemany('DELETE FROM mpesa_callbacks WHERE id = ?', [(i,) for i in ids])
+
+    def defer(self, ids, delay):
+        """Hand rows back for another try after `delay` seconds, without counting a failure"""
+        self._connect().executemany('UPDATE mpesa_callbacks SET available_at = ? WHERE id = ?',
+                                    [(time.time() + delay, i) for i in ids])
+
+    def fail(self, ids, bury=False):
+        """Count a failed attempt; rows are retried with backoff until max_attempts"""
+        self._connect().executemany('''
+            UPDATE mpesa_callbacks SET attempts = attempts + 1,
+                available_at = CASE WHEN :bury OR attempts + 1 >= :max THEN NULL
+                                    ELSE :now + (1 << attempts) END
+            WHERE id = :id
+        ''', [{'id': i, 'bury': bury, 'max': self.max_attempts, 'now': time.time()} for i in ids])
+
+    def counts(self):
+        """(rows waiting to be applied, rows given up on)"""
+        return self._connect().execute(
+            'SELECT COUNT(available_at), COUNT(*) - COUNT(available_at) FROM mpesa_callbacks'
+        ).fetchone()
+
+
+def _verify(transaction_ids):
+    """
+    Daraja's result code for each transaction, from its STK push query API rather than
+    the callback body, so a forged callback cannot settle a payment. Queries run
+    side by side on the shared client; a failed one maps to its MpesaError.
+    """
+    client = get_mpesa_client()
+
+    def query(transaction_id):
+        try:
+            return int(client.stk_query(transaction_id)['ResultCode'])
+        except MpesaError as e:
+            return e
+        except (KeyError, TypeError, ValueError):
+            return MpesaError(f"No result for {transaction_id} from Daraja")
+
+    if not transaction_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(len(transaction_ids), 8)) as pool:
+        return dict(zip(transaction_ids, pool.map(query, transaction_ids)))
+
+
+def _apply(entries, orphan_grace):
+    """
+    Apply claimed callbacks in the current session, one transaction for the batch.
+    Returns (ids to ack, ids to defer, (id, bury) of those Daraja could not confirm,
+    transaction ids whose seat holds to release once the caller has committed,
+    (transaction id, status) of the payments settled).
+    """
+    done, deferred, failed, releases, settled = [], [], [], [], []
+    callbacks = {}
+    for entry in entries:
+        callback = parse_callback(json.loads(entry.payload))
+        if callback.checkout_request_id in callbacks:
+            # Daraja sometimes delivers the same result twice
+            done.append(entry.id)
+        else:
+            callbacks[callback.checkout_request_id] = (entry, callback)
+    if not callbacks:
+        return done, deferred, failed, releases, settled
+
+    payments = {
+        row.transaction_id: row for row in db.session.execute(
+            select(Payment.id, Payment.transaction_id, Payment.status, Payment.booking_id, Payment.order_id,
+                   Payment.schedule_id)
+            .where(Payment.transaction_id.in_(callbacks))
+        )
+    }
+
+    unsettled = {}
+    now = time.time()
+    for transaction_id, (entry, callback) in callbacks.items():
+        payment = payments.get(transaction_id)
+        if payment is None and now - entry.received_at < orphan_grace:
+            # StkPush commits the pending payment after Daraja answers, and the
+            # callback can beat it here
+            deferred.append(entry.id)
+        elif payment is not None and payment.status != 'pending':
+            # Applied already
+            done.append(entry.id)
+        else:
+            unsettled[transaction_id] = (entry, callback, payment)
+
+    paid_bookings, paid_orders, orphans = [], [], []
+    for transaction_id, result_code in _verify(list(unsettled)).items():
+        entry, callback, payment = unsettled[transaction_id]
+        if isinstance(result_code, MpesaError):
+            # Daraja doesn't know a transaction it answers 4xx for; anything else is retried
+            logger.warning(f"Could not confirm the result of {transaction_id} with Daraja: {result_code}")
+            failed.append((entry.id, result_code.status_code is not None and 400 <= result_code.status_code < 500))
+            continue
+        done.append(entry.id)
+        if result_code != callback.result_code:
+            logger.warning(f"Callback for {transaction_id} says {callback.result_code}, Daraja says {result_code}")
+        status = RESULT_STATUSES.get(result_code, 'failed')
+
+        if payment is None:
+            logger.warning(f"Callback for unknown payment {transaction_id}, recording it")
+            orphans.append({'transaction_id': transaction_id, 'amount': callback.amount or 0, 'status': status})
+        else:
+            # Only the first worker to move the payment out of 'pending' applies it
+            claimed = db.session.execute(
+                update(Payment).where(Payment.id == payment.id, Payment.status == 'pending')
+                .values(status=status).execution_options(synchronize_session=False)
+            ).rowcount
+            if not claimed:
+                continue
+        settled.append((transaction_id, status))
+        if status != 'completed':
+            releases.append(transaction_id)
+            continue
+
+        if payment is not None and payment.booking_id:
+            paid_bookings.append(payment.booking_id)
+        elif payment is not None and payment.order_id:
+            paid_orders.append(payment.order_id)
+        else:
+            try:
+                with db.session.begin_nested():
+                    booking = confirm_hold(transaction_id)
+                seat_gone = booking is None and payment is not None and payment.schedule_id is not None
+                reason = "its seat hold expired"
+            except SeatUnavailable as e:
+                booking, seat_gone, reason = None, True, e
+            if seat_gone:
+                logger.warning(f"Payment {transaction_id} completed but {reason}; marking it {REFUND_DUE}")
+                if payment is None:
+                    orphans[-1]['status'] = REFUND_DUE
+                else:
+                    db.session.execute(update(Payment).where(Payment.id == payment.id)
+                                       .values(status=REFUND_DUE).execution_options(synchronize_session=False))
+                settled[-1] = (transaction_id, REFUND_DUE)
+                releases.append(transaction_id)
+                continue
+            if booking is None:
+                continue
+            releases.append(transaction_id)
+            if payment is None:
+                orphans[-1]['booking_id'] = booking.id
+            else:
+                db.session.execute(update(Payment).where(Payment.id == payment.id)
+                                   .values(booking_id=booking.id).execution_options(synchronize_session=False))
+
+    if orphans:
+        db.session.execute(insert(Payment), orphans)
+    if paid_bookings:
+        db.session.execute(update(Booking).where(Booking.id.in_(paid_bookings))
+                           .values(payment_status=True).execution_options(synchronize_session=False))
+    if paid_orders:
+        db.session.execute(update(Order).where(Order.id.in_(paid_orders), Order.status == 'pending')
+                           .values(status='paid').execution_options(synchronize_session=False))
+    return done, deferred, failed, releases, settled
+
+
+def process_batch(queue, entries, orphan_grace=30):
+    """
+    Apply `entries` and ack them. A batch that fails is retried one callback at a
+    time, so a single bad payload cannot hold back the others.
+    """
+    try:
+        done, deferred, failed, releases, settled = _apply(entries, orphan_grace)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        if len(entries) == 1:
+            logger.exception(f"Failed to apply callback {entries[0].id}")
+            queue.fail([entries[0].id], bury=isinstance(e, ValueError))
+            return
+        for entry in entries:
+            process_batch(queue, [entry], orphan_grace)
+        return
+
+    for transaction_id in releases:
+        release_hold(transaction_id)
+    notify_payments(settled)
+    queue.ack(done)
+    if deferred:
+        queue.defer(deferred, min(orphan_grace, 5))
+    for bury in (False, True):
+        ids = [id for id, buried in failed if buried == bury]
+        if ids:
+            queue.fail(ids, bury=bury)
+
+
+def drain(queue=None, batch_size=None):
+    """Apply queued callbacks until none are due; returns how many were claimed"""
+    queue = queue or get_callback_queue()
+    batch_size = batch_size or current_app.config.get('MPESA_CALLBACK_BATCH', 100)
+    orphan_grace = current_app.config.get('MPESA_CALLBACK_ORPHAN_GRACE', 30)
+    claimed = 0
+    while True:
+        entries = queue.claim(batch_size)
+        if not entries:
+            return claimed
+        claimed += len(entries)
+        process_batch(queue, entries, orphan_grace)
+
+
+class CallbackWorker:
+    """Background thread of one worker process that drains the queue whenever woken"""
+
+    def __init__(self, app, queue, idle=1.0):
+        self.app = app
+        self.queue = queue
+        self.idle = idle
+        self.pid = os.getpid()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='mpesa-callbacks', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.idle)
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    drain(self.queue)
+            except Exception:
+                logger.exception("M-Pesa callback worker failed, retrying")
+                time.sleep(self.idle)
+
+
+def get_callback_queue():
+    """The app's callback queue, built on first use from MPESA_CALLBACK_QUEUE_DB"""
+    queue = current_app.extensions.get('mpesa_callbacks')
+    if queue is None:
+        path = current_app.config.get('MPESA_CALLBACK_QUEUE_DB') or os.path.join(current_app.instance_path, 'mpesa_callbacks.db')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        queue = CallbackQueue(path)
+        current_app.extensions['mpesa_callbacks'] = queue
+    return queue
+
+
+def enqueue_callback(payload):
+    """Store a raw callback body and wake this process's worker, starting it if needed"""
+    queue = get_callback_queue()
+    queue.put(payload)
+    if not current_app.config.get('MPESA_CALLBACK_WORKER', True):
+        return
+    worker = current_app.extensions.get('mpesa_callback_worker')
+    # A worker thread does not survive a fork, so each process starts its own
+    if worker is None or worker.pid != os.getpid():
+        with _start_lock:
+            worker = current_app.extensions.get('mpesa_callback_worker')
+            if worker is None or worker.pid != os.getpid():
+                worker = CallbackWorker(current_app._get_current_object(), queue)
+                current_app.extensions['mpesa_callback_worker'] = worker
+    worker.wake()
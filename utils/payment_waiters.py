@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select
+
+from model import db, Payment
+
+logger = logging.getLogger(__name__)
+
+# Transaction ids per IN (...) when polling, well under SQLite's bound parameter limit
+POLL_CHUNK = 500
+
+# Stops concurrent first requests from each starting a watcher
+_start_lock = threading.Lock()
+
+
+class _Waiter:
+    __slots__ = ('event', 'status', 'count')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.status = None
+        self.count = 0
+
+
+class PaymentWatcher:
+    """
+    Requests waiting for payments to leave 'pending', parked on one event per
+    transaction id in a worker process. A callback applied in this process wakes its
+    waiters at once through notify(). Payments settled anywhere else are picked up by
+    one poller thread, which checks every watched transaction with a single query
+    each `interval` seconds, however many clients are waiting.
+    """
+
+    def __init__(self, app, interval=1.0):
+        self.app = app
+        self.interval = interval
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._waiters = {}
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='payment-watcher', daemon=True)
+        self._thread.start()
+
+    def wait(self, transaction_id, timeout):
+        """Block until the payment settles; returns its status, or None after `timeout` seconds"""
+        with self._lock:
+            waiter = self._waiters.get(transaction_id)
+            if waiter is None:
+                waiter = self._waiters[transaction_id] = _Waiter()
+            waiter.count += 1
+        self._wake.set()
+        try:
+            waiter.event.wait(timeout)
+            return waiter.status
+        finally:
+            with self._lock:
+                waiter.count -= 1
+                if not waiter.count and self._waiters.get(transaction_id) is waiter:
+                    del self._waiters[transaction_id]
+
+    def notify(self, transaction_id, status):
+        with self._lock:
+            waiter = self._waiters.pop(transaction_id, None)
+        if waiter:
+            waiter.status = status
+            waiter.event.set()
+
+    def watching(self):
+        with self._lock:
+            return len(self._waiters)
+
+    def _poll(self, watched):
+        with self.app.app_context():
+            for start in range(0, len(watched), POLL_CHUNK):
+                rows = db.session.execute(
+                    select(Payment.transaction_id, Payment.status)
+                    .where(Payment.transaction_id.in_(watched[start:start + POLL_CHUNK]), Payment.status != 'pending')
+                )
+                for transaction_id, status in rows:
+                    self.notify(transaction_id, status)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                watched = list(self._waiters)
+            if not watched:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                self._poll(watched)
+            except Exception:
+                logger.exception("Payment status poll failed")
+            time.sleep(self.interval)
+
+
+def get_payment_watcher():
+    """This worker process's watcher, started on first use"""
+    watcher = current_app.extensions.get('payment_watcher')
+    # The poller thread does not survive a fork, so each process starts its own
+    if watcher is None or watcher.pid != os.getpid():
+        with _start_lock:
+            watcher = current_app.extensions.get('payment_watcher')
+            if watcher is None or watcher.pid != os.getpid():
+                watcher = PaymentWatcher(current_app._get_current_object(),
+                                         current_app.config.get('PAYMENT_STATUS_POLL_INTERVAL', 1.0))
+                current_app.extensions['payment_watcher'] = watcher
+    return watcher
+
+
+def notify_payments(settled):
+    """Wake this process's waiters for (transaction id, status) pairs that were just committed"""
+    watcher = current_app.extensions.get('payment_watcher')
+    if watcher is None or watcher.pid != os.getpid():
+        return
+    for transaction_id, status in settled:
+        watcher.notify(transaction_id, status)
@@ -0,0 +1,164 @@
+import re
+
+from sqlalchemy import DDL, Integer, case, event, func, or_, select, text
+
+from model import db, Product
+
+# SQLite: an FTS5 index over the products table, which it reads the text back from, kept
+# in step by triggers. Quantity changes from checkout don't touch it. Prefix indexes on
+# the first two and three characters keep type-ahead queries from scanning the terms.
+SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, description, stall_name,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description, stall_name)
+        VALUES (new.id, new.name, new.description, new.stall_name);
+    END""",
+    """CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, stall_name)
+        VALUES ('delete', old.id, old.name, old.description, old.stall_name);
+    END""",
+    """CREATE TRIGGER products_fts_update AFTER UPDATE OF name, description, stall_name ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, stall_name)
+        VALUES ('delete', old.id, old.name, old.description, old.stall_name);
+        INSERT INTO products_fts (rowid, name, description, stall_name)
+        VALUES (new.id, new.name, new.description, new.stall_name);
+    END""",
+)
+
+# SQLite: the sold products' ids with their sales, small enough that looking up every match
+# in it is cheap; it is how the best-selling matches are found.
+SQLITE_BESTSELLERS_INDEX = "CREATE INDEX ix_products_bestsellers ON products (id, sold_quantity) WHERE sold_quantity > 0"
+
+# Postgres: a generated tsvector column, which the database keeps current, under a GIN index
+POSTGRES_DDL = (
+    """ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(stall_name, '') || ' ' || coalesce(description, ''))
+    ) STORED""",
+    "CREATE INDEX ix_products_search_vector ON products USING gin (search_vector)",
+)
+
+# Only the newest SEARCH_CANDIDATES matches and the SEARCH_CANDIDATES best-selling ones
+# are ranked, so newer listings can't crowd out an older bestseller. Finding those reads
+# every match's sales (20-40ms for a two-letter prefix over 500k products); scoring every
+# match with bm25() instead, which reads each term's whole list, takes 100ms+. What can
+# still be missed is an older product that sold little but matches in a better field.
+SEARCH_CANDIDATES = 300
+
+# What a term is worth by the field it starts a word in, best first
+FIELD_WEIGHTS = (('name', 10), ('stall_name', 4), ('description', 1))
+
+# Sales lift a match by up to POPULARITY_BOOST points, half of that at POPULARITY_HALF
+# units sold, so a bestseller can outrank a match in a lesser field but not a better one.
+POPULARITY_BOOST = 2.0
+POPULARITY_HALF = 50.0
+
+MAX_TERMS = 8
+
+# The longest prefix products_fts indexes
+PREFIX_INDEX = 3
+
+SEARCH_FIELDS = ('id', 'name', 'description', 'price', 'available_quantity', 'sold_quantity', 'image_url',
+                 'stall_id', 'stall_name', 'created_at', 'location')
+
+_SQLITE_CANDIDATES = text("""
+    SELECT id FROM (
+        SELECT rowid AS id FROM products_fts WHERE products_fts MATCH :query ORDER BY rowid DESC LIMIT :candidates
+    )
+    UNION
+    SELECT id FROM (
+        SELECT products.id FROM products_fts
+        JOIN products INDEXED BY ix_products_bestsellers ON products.id = products_fts.rowid
+        WHERE products_fts MATCH :query AND products.sold_quantity > 0
+        ORDER BY products.sold_quantity DESC LIMIT :candidates
+    )
+""").columns(id=Integer)
+
+_POSTGRES_CANDIDATES = text("""
+    (SELECT id FROM products WHERE search_vector @@ to_tsquery('simple', :query) ORDER BY id DESC LIMIT :candidates)
+    UNION
+    (SELECT id FROM products WHERE search_vector @@ to_tsquery('simple', :query) AND sold_quantity > 0
+     ORDER BY sold_quantity DESC LIMIT :candidates)
+""").columns(id=Integer)
+
+
+def search_terms(q):
+    """The words in a search box, lowercased, at most MAX_TERMS of them"""
+    return re.findall(r'\w+', q.lower())[:MAX_TERMS]
+
+
+def match_query(terms, dialect, prefix=True):
+    """
+    Every term must match, the last one as a prefix so results follow the user's typing.
+    Terms are only word characters, so nothing in them is query syntax.
+    """
+    if dialect == 'postgresql':
+        return ' & '.join(terms) + (':*' if prefix else '')
+    return ' '.join(f'"{term}"' for term in terms) + ('*' if prefix else '')
+
+
+def _starts_word(column, term):
+    term = term.replace('\\', '\\\\').replace('_', '\\_')
+    return column.ilike(f'{term}%', escape='\\') | column.ilike(f'% {term}%', escape='\\')
+
+
+def _score(terms):
+    """Each term's best field weight, plus the sales boost"""
+    score = sum(case(*[(_starts_word(getattr(Product, field), term), weight) for field, weight in FIELD_WEIGHTS[:-1]],
+                     else_=FIELD_WEIGHTS[-1][1])
+                for term in terms)
+    sold = func.coalesce(Product.sold_quantity, 0)
+    return score + POPULARITY_BOOST * sold / (sold + POPULARITY_HALF)
+
+
+def _search(terms, indexed, limit, dialect):
+    """Rank the candidates for the `indexed` terms; when those aren't all of `terms`, keep the ones with the last"""
+    candidates = (_POSTGRES_CANDIDATES if dialect == 'postgresql' else _SQLITE_CANDIDATES).subquery('candidates')
+    query = select(*[getattr(Product, field) for field in SEARCH_FIELDS]) \
+        .join(candidates, Product.id == candidates.c.id) \
+        .order_by(_score(terms).desc(), Product.id.desc()).limit(limit)
+    if indexed != terms:
+        query = query.where(or_(*[_starts_word(getattr(Product, field), terms[-1]) for field, _ in FIELD_WEIGHTS]))
+    # Without the last term, the words before it were typed in full
+    match = match_query(indexed, dialect, prefix=len(indexed) == len(terms))
+    return db.session.execute(query, {'query': match, 'candidates': SEARCH_CANDIDATES}).all()
+
+
+def search_products(q, limit):
+    """Rows of SEARCH_FIELDS for products matching `q`, best first; [] when `q` has no words"""
+    terms = search_terms(q)
+    if not terms:
+        return []
+    *words, last = terms
+    dialect = db.session.get_bind().dialect.name
+    # Only prefixes of PREFIX_INDEX characters or fewer are in the index. A longer one, or
+    # a single letter, has the index merge the lists of every word it starts ('stall*' is
+    # 20ms over 500k products), so the index is asked for what it has and the candidates
+    # are filtered for the rest. When that leaves too few, the longer prefix is rare
+    # enough to ask for.
+    if len(last) == 1 and words:
+        indexed = words
+    elif len(last) > PREFIX_INDEX:
+        indexed = words + [last[:PREFIX_INDEX]]
+    else:
+        indexed = terms
+    rows = _search(terms, indexed, limit, dialect)
+    if len(rows) < limit and len(last) > PREFIX_INDEX:
+        rows = _search(terms, terms, limit, dialect)
+    return rows
+
+
+def _create_index(target, connection, **kw):
+    statements = {'sqlite': SQLITE_DDL + (SQLITE_BESTSELLERS_INDEX,),
+                  'postgresql': POSTGRES_DDL}.get(connection.dialect.name, ())
+    for statement in statements:
+        connection.execute(DDL(statement))
+
+
+def init_product_search(app):
+    """Build the search index with the products table when the schema comes from create_all()"""
+    if not event.contains(Product.__table__, 'after_create', _create_index):
+        event.listen(Product.__table__, 'after_create', _create_index)
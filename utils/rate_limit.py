@@ -0,0 +1,157 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+
+# Per endpoint and key kind: (burst, tokens refilled per second)
+DEFAULT_LIMITS = {
+    'login': {'ip': (20, 20 / 60), 'email': (5, 5 / 300)},
+    'forgot-password': {'ip': (5, 5 / 300), 'email': (3, 3 / 3600)},
+    'reset-password': {'ip': (5, 5 / 300), 'email': (3, 3 / 3600)},
+}
+
+
+class MemoryBucketStore:
+    """
+    Token buckets for a single worker process. Each bucket keeps the time it will be
+    full again by its own burst and rate; one that has refilled completely is the same
+    as no bucket, so those are dropped every `prune_interval` seconds. Buckets still
+    refilling are never dropped, which would hand their burst back early.
+    """
+
+    def __init__(self, prune_interval=60):
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._next_prune = time.time() + prune_interval
+
+    def take(self, key, burst, rate):
+        """Take one token. Returns 0 when allowed, else seconds until a token is free."""
+        now = time.time()
+        with self._lock:
+            if now >= self._next_prune:
+                self._prune(now)
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+                return (1 - tokens) / rate
+            tokens -= 1
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return 0
+
+    def _prune(self, now):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        self._next_prune = now + self.prune_interval
+
+
+class SqliteBucketStore:
+    """
+    Token buckets shared by every worker on the host through a small SQLite file.
+    Refill, check and take happen in one upsert, which only writes when a token is
+    available, so concurrent workers cannot both spend the last one. Each row keeps
+    the time it will be full again by its own burst and rate, and rows past that are
+    deleted every PRUNE_INTERVAL seconds.
+    """
+
+    PRUNE_INTERVAL = 60
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._next_prune = time.time() + self.PRUNE_INTERVAL
+        with self._connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    full_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_rate_buckets_full_at ON rate_buckets (full_at);
+            ''')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, burst, rate):
+        now = time.time()
+        conn = self._connect()
+        if now >= self._next_prune:
+            self._next_prune = now + self.PRUNE_INTERVAL
+            conn.execute('DELETE FROM rate_buckets WHERE full_at <= ?', (now,))
+
+        # SET expressions all see the row as it was before the update
+        taken = conn.execute('''
+            INSERT INTO rate_buckets (key, tokens, updated, full_at) VALUES (:key, :burst - 1, :now, :now + 1 / :rate)
+            ON CONFLICT (key) DO UPDATE
+            SET tokens = MIN(:burst, tokens + (:now - updated) * :rate) - 1, updated = :now,
+                full_at = :now + (:burst + 1 - MIN(:burst, tokens + (:now - updated) * :rate)) / :rate
+            WHERE MIN(:burst, tokens + (:now - updated) * :rate) >= 1
+        ''', {'key': key, 'burst': burst, 'rate': rate, 'now': now}).rowcount
+        if taken:
+            return 0
+        row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+        tokens = min(burst, row[0] + (now - row[1]) * rate) if row else 0
+        return max((1 - tokens) / rate, 0.001)
+
+
+def get_bucket_store():
+    """The app's bucket store, built on first use from RATE_LIMIT_BACKEND"""
+    store = current_app.extensions.get('rate_limit')
+    if store is None:
+        if current_app.config.get('RATE_LIMIT_BACKEND') == 'sqlite':
+            path = current_app.config.get('RATE_LIMIT_DB') or os.path.join(current_app.instance_path, 'rate_limit.db')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            store = SqliteBucketStore(path)
+        else:
+            store = MemoryBucketStore()
+        current_app.extensions['rate_limit'] = store
+    return store
+
+
+def _request_email():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = request.form
+    email = data.get('email')
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def rate_limited(name):
+    """
+    Throttle a handler by client IP and by the `email` in the request body, using the
+    (burst, rate) pairs in RATE_LIMITS[name]. Over-limit requests get a 429 with
+    Retry-After before the handler runs, so they cost no database or hashing work.
+    Behind a reverse proxy, wrap the app in werkzeug's ProxyFix so remote_addr is
+    the client's address.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+                return fn(*args, **kwargs)
+
+            limits = current_app.config.get('RATE_LIMITS', DEFAULT_LIMITS)[name]
+            store = get_bucket_store()
+            keys = [('ip', request.remote_addr or 'unknown'), ('email', _request_email())]
+            for kind, value in keys:
+                if value is None or kind not in limits:
+                    continue
+                retry_after = store.take(f'{name}:{kind}:{value}', *limits[kind])
+                if retry_after:
+                    return ({"message": "Too many attempts, try again later", "status": "fail"}, 429,
+                            {'Retry-After': str(math.ceil(retry_after))})
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,297 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict, namedtuple
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Response, current_app, has_app_context, request
+from flask_restful import unpack
+from flask_restful.representations.json import output_json
+from sqlalchemy import event
+
+from model import db
+from utils.response_pipeline import body_etag
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'etag', 'headers'])
+
+
+class MemoryResponseCache:
+    """
+    Bounded LRU of serialized responses for a single worker process. Each entry is
+    tagged with the tables it was read from. Invalidating a tag drops its entries and
+    bumps the tag's version, so a response that was built from data read before the
+    change is not stored afterwards.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_tag = defaultdict(set)
+        self._versions = defaultdict(int)
+
+    def versions(self, tags):
+        with self._lock:
+            return tuple(self._versions[tag] for tag in tags)
+
+    def get(self, key):
+        """Cached response, or None when unknown or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            response, tags, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key, response, tags, versions):
+        """Store `response` unless one of `tags` was invalidated since `versions` was read"""
+        with self._lock:
+            if tuple(self._versions[tag] for tag in tags) != versions:
+                return False
+            self._drop(key)
+            self._entries[key] = (response, tags, time.monotonic() + self.ttl)
+            for tag in tags:
+                self._keys_by_tag[tag].add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+            return True
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for tag in entry[1]:
+                self._keys_by_tag[tag].discard(key)
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] += 1
+                for key in self._keys_by_tag.pop(tag, ()):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+
+class SqliteResponseCache:
+    """
+    Serialized responses shared by every worker on the host through a small SQLite
+    file, so a change made through one worker is seen by all of them. Tag versions
+    live in the same file and are checked in the transaction that stores an entry.
+    When the file outgrows `maxsize` entries the ones closest to expiry go first.
+    """
+
+    def __init__(self, path, maxsize=1024, ttl=300):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    etag TEXT NOT NULL,
+                    headers TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_responses_expires_at ON responses (expires_at);
+                CREATE TABLE IF NOT EXISTS response_tags (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS tag_versions (
+                    tag TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                );
+            ''')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _versions(self, conn, tags):
+        rows = dict(conn.execute(
+            f'SELECT tag, version FROM tag_versions WHERE tag IN ({",".join("?" * len(tags))})', tags,
+        ).fetchall())
+        return tuple(rows.get(tag, 0) for tag in tags)
+
+    def _drop(self, conn, keys):
+        conn.executemany('DELETE FROM responses WHERE key = ?', [(key,) for key in keys])
+        conn.executemany('DELETE FROM response_tags WHERE key = ?', [(key,) for key in keys])
+
+    def versions(self, tags):
+        return self._versions(self._connect(), tags)
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT body, etag, headers FROM responses WHERE key = ? AND expires_at > ?', (key, time.time()),
+        ).fetchone()
+        return CachedResponse(row[0], row[1], json.loads(row[2])) if row else None
+
+    def set(self, key, response, tags, versions):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._versions(conn, tags) != versions:
+                conn.execute('ROLLBACK')
+                return False
+            self._drop(conn, [key])
+            conn.execute('INSERT INTO responses (key, body, etag, headers, expires_at) VALUES (?, ?, ?, ?, ?)',
+                         (key, response.body, response.etag, json.dumps(response.headers), time.time() + self.ttl))
+            conn.executemany('INSERT INTO response_tags (tag, key) VALUES (?, ?)', [(tag, key) for tag in tags])
+            excess = conn.execute('SELECT count(*) FROM responses').fetchone()[0] - self.maxsize
+            if excess > 0:
+                self._drop(conn, [row[0] for row in conn.execute(
+                    'SELECT key FROM responses ORDER BY expires_at LIMIT ?', (excess,))])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return True
+
+    def invalidate(self, tags):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT INTO tag_versions (tag, version) VALUES (?, 1) '
+                             'ON CONFLICT (tag) DO UPDATE SET version = version + 1', [(tag,) for tag in tags])
+            keys = [row[0] for row in conn.execute(
+                f'SELECT key FROM response_tags WHERE tag IN ({",".join("?" * len(tags))})', tags)]
+            self._drop(conn, keys)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def clear(self):
+        self._connect().executescript('DELETE FROM responses; DELETE FROM response_tags;')
+
+
+def get_response_cache():
+    """The app's response cache, built on first use from RESPONSE_CACHE_BACKEND; None when it is off"""
+    if 'response_cache' not in current_app.extensions:
+        backend = current_app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        maxsize = current_app.config.get('RESPONSE_CACHE_SIZE', 1024)
+        ttl = current_app.config.get('RESPONSE_CACHE_TTL', 300)
+        if backend == 'none':
+            cache = None
+        elif backend == 'sqlite':
+            path = current_app.config.get('RESPONSE_CACHE_DB') or os.path.join(current_app.instance_path, 'response_cache.db')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            cache = SqliteResponseCache(path, maxsize, ttl)
+        else:
+            cache = MemoryResponseCache(maxsize, ttl)
+        current_app.extensions['response_cache'] = cache
+    return current_app.extensions['response_cache']
+
+
+def cache_key():
+    """The request path plus its query params in a stable order"""
+    return f'{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+
+
+def _to_response(rv):
+    """What Flask-RESTful would send for a handler's return value"""
+    if isinstance(rv, Response):
+        return rv
+    data, code, headers = unpack(rv)
+    return output_json(data, code, headers)
+
+
+def _send(entry):
+    # finish_response() turns this into a 304 when the client already has it
+    response = Response(entry.body, status=200, mimetype='application/json', headers=entry.headers)
+    response.set_etag(entry.etag)
+    return response
+
+
+def cached_response(*tags):
+    """
+    Cache a GET handler's 200 responses as JSON bytes with an ETag, keyed by path and
+    query params and tagged with the tables in `tags`. A hit skips the handler, so a
+    conditional request for it is answered without any SQL. Entries are dropped when
+    a commit writes to one of their tables (see init_response_cache()), or after
+    RESPONSE_CACHE_TTL seconds for writes made outside the app.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            if cache is None:
+                return fn(*args, **kwargs)
+            key = cache_key()
+            entry = cache.get(key)
+            if entry is None:
+                versions = cache.versions(tags)
+                response = _to_response(fn(*args, **kwargs))
+                # Streamed lists are unbounded; they are never read into memory to be cached
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                headers = {name: value for name, value in response.headers.items()
+                           if name not in ('Content-Type', 'Content-Length')}
+                entry = CachedResponse(body, body_etag([body]), headers)
+                cache.set(key, entry, tags, versions)
+            return _send(entry)
+        return wrapper
+    return decorator
+
+
+def _written_tables(session):
+    return session.info.setdefault('response_cache_tags', set())
+
+
+def _record_flush(session, flush_context):
+    tables = _written_tables(session)
+    for instance in session.new | session.deleted:
+        tables.add(instance.__table__.name)
+    for instance in session.dirty:
+        if session.is_modified(instance, include_collections=False):
+            tables.add(instance.__table__.name)
+
+
+def _record_statement(orm_execute_state):
+    # Bulk update(), delete() and insert() statements bypass the unit of work
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        _written_tables(orm_execute_state.session).add(orm_execute_state.statement.table.name)
+
+
+def _invalidate_committed(session):
+    tables = session.info.pop('response_cache_tags', None)
+    if tables and has_app_context():
+        cache = get_response_cache()
+        if cache is not None:
+            cache.invalidate(sorted(tables))
+
+
+def _forget_rolled_back(session):
+    session.info.pop('response_cache_tags', None)
+
+
+def init_response_cache(app):
+    """
+    Invalidate cached responses by table whenever a session commits, whichever handler
+    made the change. The listeners are on the shared session, so they are registered
+    once however many apps are built.
+    """
+    for name, listener in (('after_flush', _record_flush), ('do_orm_execute', _record_statement),
+                           ('after_commit', _invalidate_committed), ('after_rollback', _forget_rolled_back)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
@@ -0,0 +1,149 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+from werkzeug.http import remove_entity_headers
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Bodies up to this many bytes and the (gzip level, brotli quality) they get. Small bodies
+# are cheap to squeeze hard; on large ones the higher levels cost far more CPU than the
+# few percent of bytes they save (see benchmarks/compression.py).
+COMPRESSION_LEVELS = (
+    (64 * 1024, 6, 5),
+    (1024 * 1024, 5, 4),
+    (None, 1, 3),
+)
+
+COMPRESSIBLE = ('application/json', 'application/javascript', 'image/svg+xml')
+
+
+def body_etag(chunks):
+    """Strong ETag over a body, hashed chunk by chunk"""
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def levels_for(size):
+    for limit, gzip_level, brotli_quality in COMPRESSION_LEVELS:
+        if limit is None or size <= limit:
+            return gzip_level, brotli_quality
+
+
+def compress(body, encoding):
+    gzip_level, brotli_quality = levels_for(len(body))
+    if encoding == 'br':
+        return brotli.compress(body, mode=brotli.MODE_TEXT, quality=brotli_quality)
+    # mtime=0 keeps the output, and so its ETag, the same for the same body
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressedBodies:
+    """
+    Bounded LRU of compressed bodies by representation ETag, so the same response, e.g. a
+    hit from the response cache, is only compressed once per worker. Bounded by the
+    total size of the compressed bodies in bytes.
+    """
+
+    def __init__(self, maxbytes=16 * 1024 * 1024):
+        self.maxbytes = maxbytes
+        self.size = 0
+        self._lock = threading.Lock()
+        self._bodies = OrderedDict()
+
+    def get(self, etag):
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is not None:
+                self._bodies.move_to_end(etag)
+            return body
+
+    def set(self, etag, body):
+        if len(body) > self.maxbytes:
+            return
+        with self._lock:
+            old = self._bodies.pop(etag, None)
+            self.size += len(body) - (len(old) if old else 0)
+            self._bodies[etag] = body
+            while self.size > self.maxbytes:
+                self.size -= len(self._bodies.popitem(last=False)[1])
+
+
+def get_compressed_bodies():
+    """The app's compressed body cache, built on first use from COMPRESS_CACHE_BYTES"""
+    bodies = current_app.extensions.get('compressed_bodies')
+    if bodies is None:
+        bodies = CompressedBodies(current_app.config.get('COMPRESS_CACHE_BYTES', 16 * 1024 * 1024))
+        current_app.extensions['compressed_bodies'] = bodies
+    return bodies
+
+
+def choose_encoding():
+    """br or gzip by the client's Accept-Encoding, or None for the body as is"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def etag_matches(*etags):
+    """Whether If-None-Match names any of `etags` (or is *)"""
+    return any(request.if_none_match.contains_weak(etag) for etag in etags)
+
+
+def compressible(response):
+    return (response.mimetype.startswith('text/') or response.mimetype in COMPRESSIBLE) \
+        and 'Content-Encoding' not in response.headers
+
+
+def finish_response(response):
+    """
+    after_request hook for GET and HEAD 200s with a body in memory. Adds a strong ETag
+    over the body unless the handler set one, answers a matching If-None-Match with a
+    bodiless 304, and compresses bodies of at least COMPRESS_MIN_SIZE bytes with brotli
+    or gzip. Each encoding is a separate representation with its own ETag (the body's
+    ETag plus "-br" or "-gzip"). Streamed responses go out untouched.
+    """
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200 \
+            or response.is_streamed or response.direct_passthrough:
+        return response
+
+    etag, _ = response.get_etag()
+    if etag is None:
+        etag = body_etag(response.iter_encoded())
+
+    encoding = None
+    if compressible(response) and response.calculate_content_length() >= current_app.config.get('COMPRESS_MIN_SIZE', 1024):
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding()
+    representation = f'{etag}-{encoding}' if encoding else etag
+    response.set_etag(representation)
+
+    if etag_matches(representation, etag, f'{etag}-br', f'{etag}-gzip'):
+        response.status_code = 304
+        response.response = []
+        remove_entity_headers(response.headers)
+        return response
+
+    if encoding:
+        bodies = get_compressed_bodies()
+        body = bodies.get(representation)
+        if body is None:
+            body = compress(response.get_data(), encoding)
+            bodies.set(representation, body)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_response_pipeline(app):
+    app.after_request(finish_response)
@@ -0,0 +1,233 @@
+import heapq
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict, namedtuple
+
+from flask import current_app
+
+from model import db, Booking
+from utils.seats import SeatUnavailable, allocate_seat, choose_seat, occupancy_bitmap, seat_capacity
+
+SeatHold = namedtuple('SeatHold', ['hold_id', 'schedule_id', 'seat_number', 'user_id', 'passenger_id', 'expires_at', 'transaction_id'])
+
+
+class MemoryHoldStore:
+    """
+    Seat holds for a single worker process. Holds are indexed by schedule and seat,
+    with a min-heap of expiry times beside them, so each sweep only pops the holds
+    that have actually expired instead of scanning them all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._holds = defaultdict(dict)
+        self._by_id = {}
+        self._by_transaction = {}
+        self._expiry = []
+
+    def _sweep(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            _, hold_id = heapq.heappop(self._expiry)
+            hold = self._by_id.get(hold_id)
+            # Skip heap entries for holds that were confirmed or released already
+            if hold and hold.expires_at <= now:
+                self._drop(hold)
+
+    def _drop(self, hold):
+        self._by_id.pop(hold.hold_id, None)
+        self._by_transaction.pop(hold.transaction_id, None)
+        seats = self._holds[hold.schedule_id]
+        if seats.get(hold.seat_number) is hold:
+            del seats[hold.seat_number]
+        if not seats:
+            del self._holds[hold.schedule_id]
+
+    def place(self, schedule_id, seat_number, user_id, passenger_id, ttl):
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            if seat_number in self._holds.get(schedule_id, ()):
+                return None
+            hold = SeatHold(uuid.uuid4().hex, schedule_id, seat_number, user_id, passenger_id, now + ttl, None)
+            self._holds[schedule_id][seat_number] = hold
+            self._by_id[hold.hold_id] = hold
+            heapq.heappush(self._expiry, (hold.expires_at, hold.hold_id))
+            return hold
+
+    def bind(self, hold_id, transaction_id):
+        with self._lock:
+            hold = self._by_id.get(hold_id)
+            if hold:
+                hold = hold._replace(transaction_id=transaction_id)
+                self._holds[hold.schedule_id][hold.seat_number] = hold
+                self._by_id[hold_id] = hold
+                self._by_transaction[transaction_id] = hold
+            return hold
+
+    def held_bitmap(self, schedule_id, exclude=None):
+        bitmap = 0
+        with self._lock:
+            self._sweep(time.time())
+            for seat, hold in self._holds.get(schedule_id, {}).items():
+                if hold.hold_id != exclude:
+                    bitmap |= 1 << seat
+        return bitmap
+
+    def get_by_transaction(self, transaction_id):
+        with self._lock:
+            self._sweep(time.time())
+            return self._by_transaction.get(transaction_id)
+
+    def release(self, hold_id):
+        with self._lock:
+            hold = self._by_id.get(hold_id)
+            if hold:
+                self._drop(hold)
+
+
+class SqliteHoldStore:
+    """
+    Seat holds shared by every worker on the host through a small SQLite file.
+    The (schedule_id, seat_number) primary key makes placing a hold atomic across
+    processes, and expiry is a range delete on the expires_at index.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS seat_holds (
+                    schedule_id INTEGER NOT NULL,
+                    seat_number INTEGER NOT NULL,
+                    hold_id TEXT NOT NULL UNIQUE,
+                    user_id INTEGER,
+                    passenger_id INTEGER,
+                    expires_at REAL NOT NULL,
+                    transaction_id TEXT UNIQUE,
+                    PRIMARY KEY (schedule_id, seat_number)
+                );
+                CREATE INDEX IF NOT EXISTS ix_seat_holds_expires_at ON seat_holds (expires_at);
+            ''')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _sweep(self, conn, now):
+        conn.execute('DELETE FROM seat_holds WHERE expires_at <= ?', (now,))
+
+    def place(self, schedule_id, seat_number, user_id, passenger_id, ttl):
+        now = time.time()
+        hold = SeatHold(uuid.uuid4().hex, schedule_id, seat_number, user_id, passenger_id, now + ttl, None)
+        conn = self._connect()
+        self._sweep(conn, now)
+        try:
+            conn.execute(
+                'INSERT INTO seat_holds (schedule_id, seat_number, hold_id, user_id, passenger_id, expires_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (schedule_id, seat_number, hold.hold_id, user_id, passenger_id, hold.expires_at),
+            )
+        except sqlite3.IntegrityError:
+            return None
+        return hold
+
+    def bind(self, hold_id, transaction_id):
+        conn = self._connect()
+        conn.execute('UPDATE seat_holds SET transaction_id = ? WHERE hold_id = ?', (transaction_id, hold_id))
+        return self.get_by_transaction(transaction_id)
+
+    def held_bitmap(self, schedule_id, exclude=None):
+        bitmap = 0
+        rows = self._connect().execute(
+            'SELECT seat_number FROM seat_holds WHERE schedule_id = ? AND expires_at > ? AND hold_id != ?',
+            (schedule_id, time.time(), exclude or ''),
+        )
+        for (seat,) in rows:
+            bitmap |= 1 << seat
+        return bitmap
+
+    def get_by_transaction(self, transaction_id):
+        row = self._connect().execute(
+            'SELECT hold_id, schedule_id, seat_number, user_id, passenger_id, expires_at, transaction_id '
+            'FROM seat_holds WHERE transaction_id = ? AND expires_at > ?',
+            (transaction_id, time.time()),
+        ).fetchone()
+        return SeatHold(*row) if row else None
+
+    def release(self, hold_id):
+        self._connect().execute('DELETE FROM seat_holds WHERE hold_id = ?', (hold_id,))
+
+
+def get_hold_store():
+    """The app's hold store, built on first use from SEAT_HOLD_BACKEND"""
+    store = current_app.extensions.get('seat_holds')
+    if store is None:
+        if current_app.config.get('SEAT_HOLD_BACKEND') == 'sqlite':
+            path = current_app.config.get('SEAT_HOLD_DB') or os.path.join(current_app.instance_path, 'seat_holds.db')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            store = SqliteHoldStore(path)
+        else:
+            store = MemoryHoldStore()
+        current_app.extensions['seat_holds'] = store
+    return store
+
+
+def hold_seat(schedule_id, user_id, passenger_id=None, seat_number=None):
+    """
+    Hold `seat_number` (or the lowest free seat) on `schedule_id` for SEAT_HOLD_TTL
+    seconds. Raises SeatUnavailable when the seat is booked, held or the bus is full.
+    """
+    store = get_hold_store()
+    ttl = current_app.config.get('SEAT_HOLD_TTL', 300)
+    capacity = seat_capacity(schedule_id)
+    occupied = occupancy_bitmap(schedule_id)
+
+    # Another worker may grab the seat we picked between the read and the insert
+    for _ in range(capacity or 1):
+        seat = choose_seat(capacity, occupied, seat_number, store.held_bitmap(schedule_id))
+        hold = store.place(schedule_id, seat, user_id, passenger_id, ttl)
+        if hold:
+            return hold
+        if seat_number is not None:
+            raise SeatUnavailable(f"Seat {seat} is held for another passenger")
+    raise SeatUnavailable("No seats available on this schedule")
+
+
+def confirm_hold(transaction_id):
+    """
+    Turn the hold bound to `transaction_id` into a paid Booking in the current session.
+    Returns None when there is no live hold. The caller commits, then calls
+    release_hold() so the hold survives a failed commit.
+    """
+    store = get_hold_store()
+    hold = store.get_by_transaction(transaction_id)
+    if hold is None:
+        return None
+
+    held = store.held_bitmap(hold.schedule_id, exclude=hold.hold_id)
+    seat_number = allocate_seat(hold.schedule_id, hold.seat_number, held)
+    booking = Booking(
+        user_id=hold.user_id,
+        schedule_id=hold.schedule_id,
+        passenger_id=hold.passenger_id,
+        seat_number=seat_number,
+        ticket_number=str(uuid.uuid4()),
+        payment_status=True,
+    )
+    db.session.add(booking)
+    return booking
+
+
+def release_hold(transaction_id):
+    store = get_hold_store()
+    hold = store.get_by_transaction(transaction_id)
+    if hold:
+        store.release(hold.hold_id)
@@ -0,0 +1,107 @@
+from sqlalchemy import select, update
+
+from model import db, Booking, Bus, Schedule
+
+
+class SeatUnavailable(Exception):
+    """Raised when a schedule is sold out or the requested seat is already taken"""
+
+
+def occupancy_bitmap(schedule_id):
+    """Bit n is set when seat n of the schedule is booked"""
+    bitmap = 0
+    seats = db.session.execute(select(Booking.seat_number).where(Booking.schedule_id == schedule_id)).scalars()
+    for seat in seats:
+        bitmap |= 1 << int(seat)
+    return bitmap
+
+
+def seat_capacity(schedule_id):
+    capacity = db.session.execute(
+        select(Bus.seat_capacity).join(Schedule, Schedule.bus_id == Bus.id).where(Schedule.id == schedule_id)
+    ).scalar()
+    if capacity is None:
+        # Schedules without a bus fall back to what is left plus what is already sold
+        capacity = db.session.execute(select(Schedule.available_seats).where(Schedule.id == schedule_id)).scalar() or 0
+        capacity += db.session.execute(
+            select(db.func.count(Booking.id)).where(Booking.schedule_id == schedule_id)
+        ).scalar()
+    return capacity
+
+
+def choose_seat(capacity, occupied, seat_number=None, held=0):
+    """
+    Validate `seat_number` against the booked (`occupied`) and `held` bitmaps, or pick
+    the lowest seat that is in neither when no seat is requested.
+    """
+    if seat_number is not None:
+        seat_number = int(seat_number)
+        if not 1 <= seat_number <= capacity:
+            raise SeatUnavailable(f"Seat {seat_number} does not exist on this bus")
+        if occupied & (1 << seat_number):
+            raise SeatUnavailable(f"Seat {seat_number} is already booked")
+        if held & (1 << seat_number):
+            raise SeatUnavailable(f"Seat {seat_number} is held for another passenger")
+        return seat_number
+
+    # Seats are numbered from 1, so bit 0 never counts as free
+    free = ~(occupied | held) & ((1 << (capacity + 1)) - 2)
+    if not free:
+        raise SeatUnavailable("No seats available on this schedule")
+    return (free & -free).bit_length() - 1
+
+
+def allocate_seat(schedule_id, seat_number=None, held=0):
+    """
+    Claim a seat on `schedule_id` inside the current transaction and return its number.
+
+    The conditional decrement of `available_seats` is a compare-and-swap: it only
+    succeeds while seats remain, and it write-locks the schedule row until the caller
+    commits or rolls back. Every booking for the schedule therefore runs this section
+    one at a time, so the occupancy bitmap read afterwards cannot go stale before the
+    booking is inserted. Validates `seat_number` when given, otherwise assigns the
+    lowest free seat; seats in the `held` bitmap are skipped. The caller adds the
+    Booking and commits; rolling back releases both the lock and the decrement.
+    """
+    claimed = db.session.execute(
+        update(Schedule)
+        .where(Schedule.id == schedule_id, Schedule.available_seats > 0)
+        .values(available_seats=Schedule.available_seats - 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        if db.session.get(Schedule, schedule_id) is None:
+            raise SeatUnavailable("Schedule not found")
+        raise SeatUnavailable("No seats available on this schedule")
+
+    return choose_seat(seat_capacity(schedule_id), occupancy_bitmap(schedule_id), seat_number, held)
+
+
+def move_seat(schedule_id, seat_number=None, held=0):
+    """
+    Claim another seat on `schedule_id` for a booking that already has one there, inside
+    the current transaction, and return its number. The booking keeps its share of
+    `available_seats`, so this works on a full schedule. The update that leaves the
+    count as it is still write-locks the schedule row, serializing it with
+    allocate_seat(); the caller updates the booking's seat_number and commits.
+    """
+    locked = db.session.execute(
+        update(Schedule)
+        .where(Schedule.id == schedule_id)
+        .values(available_seats=Schedule.available_seats)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not locked:
+        raise SeatUnavailable("Schedule not found")
+
+    return choose_seat(seat_capacity(schedule_id), occupancy_bitmap(schedule_id), seat_number, held)
+
+
+def release_seat(schedule_id):
+    """Give a cancelled booking's seat back to the schedule, within the caller's transaction"""
+    db.session.execute(
+        update(Schedule)
+        .where(Schedule.id == schedule_id)
+        .values(available_seats=Schedule.available_seats + 1)
+        .execution_options(synchronize_session=False)
+    )